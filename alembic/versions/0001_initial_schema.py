@@ -0,0 +1,94 @@
+"""initial schema
+
+Baseline for databases created by the JSON import or the old
+``Base.metadata.create_all()`` startup path. Existing databases that already
+have these tables should be stamped instead of upgraded:
+
+    alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("username", sa.String(50), primary_key=True),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("force_change", sa.Boolean(), default=False),
+    )
+    op.create_index("ix_users_username", "users", ["username"])
+
+    op.create_table(
+        "students",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50)),
+        sa.Column("display_name", sa.String(100)),
+        sa.Column("avatar", sa.String(255)),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_students_id", "students", ["id"])
+    op.create_index("ix_students_username", "students", ["username"], unique=True)
+
+    op.create_table(
+        "xp",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("total", sa.Integer(), default=0),
+        sa.Column("pad_practice", sa.Integer(), default=0),
+        sa.Column("attendance", sa.Integer(), default=0),
+        sa.Column("consistency", sa.Integer(), default=0),
+    )
+    op.create_index("ix_xp_id", "xp", ["id"])
+
+    op.create_table(
+        "attendance",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("grade", sa.Float()),
+    )
+    op.create_index("ix_attendance_id", "attendance", ["id"])
+
+    op.create_table(
+        "streaks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("current", sa.Integer(), default=0),
+        sa.Column("longest", sa.Integer(), default=0),
+        sa.Column("last_practice_date", sa.Date()),
+    )
+    op.create_index("ix_streaks_id", "streaks", ["id"])
+
+    op.create_table(
+        "history_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("type", sa.String(20), nullable=False),
+        sa.Column("name", sa.String(255)),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("grade", sa.Float()),
+    )
+    op.create_index("ix_history_events_id", "history_events", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("history_events")
+    op.drop_table("streaks")
+    op.drop_table("attendance")
+    op.drop_table("xp")
+    op.drop_table("students")
+    op.drop_table("users")
@@ -0,0 +1,36 @@
+"""import checksums
+
+Per-student content hashes recorded by app/scripts/import_students_data.py,
+so an incremental import can skip student directories that did not change.
+Earlier versions of the importer created this table on databases they
+bootstrapped, hence the existence check.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "import_checksums" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "import_checksums",
+        sa.Column("username", sa.String(50), primary_key=True),
+        sa.Column("digest", sa.String(64), nullable=False),
+        sa.Column("imported_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("import_checksums")
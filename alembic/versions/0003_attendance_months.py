@@ -0,0 +1,45 @@
+"""attendance months
+
+Per-student monthly lesson counts and the consistency-bonus flag, so the
+attendance write path reads one row instead of scanning every lesson.
+Backfilled from existing attendance; months with four or more lessons are
+marked as having earned the bonus. Earlier versions of the JSON importer
+created this table on databases they bootstrapped, hence the existence check.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "attendance_months" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "attendance_months",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("month", sa.String(7), primary_key=True),
+        sa.Column("lesson_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bonus_awarded", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+    bind = op.get_bind()
+    month = "to_char(date, 'YYYY-MM')" if bind.dialect.name == "postgresql" else "strftime('%Y-%m', date)"
+    op.execute(
+        "INSERT INTO attendance_months (student_id, month, lesson_count, bonus_awarded) "
+        f"SELECT student_id, {month}, COUNT(*), COUNT(*) >= 4 FROM attendance GROUP BY student_id, {month}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("attendance_months")
@@ -0,0 +1,106 @@
+"""partition history_events by month
+
+history_events is the only table that grows without bound. On PostgreSQL it
+becomes a table range-partitioned by month on ``date``. There is one
+partition per month from its oldest row through three months ahead, plus a
+default partition for anything outside those ranges. The primary key
+becomes (id, date), because a partitioned table's keys must include the
+partition column. ids keep coming from the same sequence, so they stay
+unique. Every partition gets a (student_id, date) index. After the upgrade,
+``python -m app.scripts.history_partitions`` adds future months and retires
+old ones.
+
+Other databases only get the (student_id, date) index.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, student_id, type, name, date, grade"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_table(partitioned: bool) -> None:
+    op.execute(f"""
+        CREATE TABLE history_events (
+            id INTEGER NOT NULL DEFAULT nextval('history_events_id_seq'),
+            student_id INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            type VARCHAR(20) NOT NULL,
+            name VARCHAR(255),
+            date DATE NOT NULL,
+            grade DOUBLE PRECISION,
+            {"PRIMARY KEY (id, date)) PARTITION BY RANGE (date)" if partitioned else "PRIMARY KEY (id))"}
+    """)
+
+
+def _swap_out_current_table() -> None:
+    # Free the names (and the id sequence) for the replacement table.
+    op.execute("ALTER TABLE history_events RENAME TO history_events_old")
+    op.execute("ALTER TABLE history_events_old RENAME CONSTRAINT history_events_pkey TO history_events_old_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_history_events_id")
+    op.execute("DROP INDEX IF EXISTS ix_history_events_student_date")
+    op.execute("ALTER SEQUENCE history_events_id_seq OWNED BY NONE")
+
+
+def _finish_swap() -> None:
+    op.execute(f"INSERT INTO history_events ({COLUMNS}) SELECT {COLUMNS} FROM history_events_old")
+    op.execute("DROP TABLE history_events_old")
+    op.execute("ALTER SEQUENCE history_events_id_seq OWNED BY history_events.id")
+    # Built after the copy; on the partitioned table each partition gets its own.
+    op.execute("CREATE INDEX ix_history_events_id ON history_events (id)")
+    op.execute("CREATE INDEX ix_history_events_student_date ON history_events (student_id, date)")
+    op.execute("ANALYZE history_events")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.create_index("ix_history_events_student_date", "history_events", ["student_id", "date"])
+        return
+
+    oldest = bind.execute(sa.text("SELECT MIN(date) FROM history_events")).scalar()
+    current = date.today().replace(day=1)
+    month = min(oldest.replace(day=1), current) if oldest else current
+
+    _swap_out_current_table()
+    _create_table(partitioned=True)
+    while month <= _add_months(current, MONTHS_AHEAD):
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE history_events_{month.year:04d}_{month.month:02d} PARTITION OF history_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE history_events_default PARTITION OF history_events DEFAULT")
+    _finish_swap()
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index("ix_history_events_student_date", "history_events")
+        return
+
+    _swap_out_current_table()
+    _create_table(partitioned=False)
+    _finish_swap()
+    op.execute("DROP INDEX ix_history_events_student_date")
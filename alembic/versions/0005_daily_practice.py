@@ -0,0 +1,39 @@
+"""daily practice
+
+Per-student, per-day, per-exercise counts and XP for pad events compacted
+out of history_events by app/services/history_compaction.py. Starts empty;
+nothing is compacted until the job runs. Downgrading drops the table, and
+with it every compacted pad event. Earlier versions of the JSON importer
+created this table on databases they bootstrapped, hence the existence check.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "daily_practice" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "daily_practice",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("exercise", sa.String(255), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("xp", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_practice")
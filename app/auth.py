@@ -1,3 +1,7 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
 from passlib.context import CryptContext
 
 # Import database components conditionally
@@ -18,6 +22,9 @@ pwd_context = CryptContext(
     deprecated="auto"
 )
 
+# Threads used by hash_passwords(); 0 means one per CPU core.
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", "0")) or os.cpu_count() or 1
+
 # ------------------------------------------------------------------
 # User loading helpers
 # ------------------------------------------------------------------
@@ -46,6 +53,18 @@ def load_users():
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+def hash_passwords(passwords: Iterable[str]) -> List[str]:
+    """
+    Hash many passwords in parallel, in input order. PBKDF2 runs inside
+    OpenSSL with the GIL released, so a thread pool keeps every core busy.
+    """
+    passwords = list(passwords)
+    workers = min(HASH_WORKERS, len(passwords))
+    if workers <= 1:
+        return [hash_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash") as pool:
+        return list(pool.map(hash_password, passwords))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
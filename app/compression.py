@@ -0,0 +1,206 @@
+"""
+Response compression middleware for dynamic HTML and JSON.
+Brotli is preferred when the client accepts it and the ``brotli`` package is
+installed, otherwise gzip. Responses that are small, already encoded, not in
+the content-type allowlist, or bodiless (e.g. 304) pass through untouched.
+"""
+
+import gzip
+import io
+import os
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # gzip only
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+
+DEFAULT_CONTENT_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+# Status codes that never carry a body worth compressing.
+_BODYLESS_STATUS = {204, 304}
+
+
+def accepted_encodings(scope: Scope) -> set:
+    """Content codings the request's Accept-Encoding allows (q=0 excludes one)."""
+    accept = Headers(scope=scope).get("accept-encoding", "")
+    accepted = set()
+    for item in accept.split(","):
+        coding, _, params = item.partition(";")
+        name, _, value = params.strip().partition("=")
+        try:
+            if name.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._buffer = io.BytesIO()
+        self._file = gzip.GzipFile(mode="wb", fileobj=self._buffer, compresslevel=level, mtime=0)
+
+    def compress(self, data: bytes) -> bytes:
+        self._file.write(data)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        self._file.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies for allowlisted content types.
+
+    ``minimum_size`` is checked against the first body chunk; streamed
+    responses are compressed incrementally.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(scope)
+        if brotli is not None and "br" in accepted:
+            make_encoder = lambda: _BrotliEncoder(self.brotli_quality)
+        elif "gzip" in accepted:
+            make_encoder = lambda: _GzipEncoder(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, make_encoder, self.minimum_size, self.content_types)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, make_encoder, minimum_size: int, content_types: tuple):
+        self._send = send
+        self._make_encoder = make_encoder
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self._start_message: Optional[Message] = None
+        self._encoder = None
+        self._passthrough = False
+
+    def _should_compress(self, message: Message) -> bool:
+        if message["status"] in _BODYLESS_STATUS or message["status"] < 200:
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.content_types
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            if self._should_compress(message):
+                # Defer until the first body chunk tells us the size.
+                self._start_message = message
+            else:
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if self._passthrough or self._start_message is None:
+            # Also covers messages sent before the response starts,
+            # such as the test client's http.response.debug.
+            await self._send(message)
+            return
+
+        if self._encoder is None:
+            start = self._start_message
+            if message_type != "http.response.body":
+                # e.g. http.response.pathsend: hand the file over unchanged.
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not more_body and len(body) < self.minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._encoder = self._make_encoder()
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self._encoder.name
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                compressed = self._encoder.compress(body)
+            else:
+                compressed = self._encoder.compress(body) + self._encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compressed = self._encoder.compress(body)
+        if not more_body:
+            compressed += self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
@@ -3,20 +3,51 @@ PostgreSQL database module.
 Runtime app paths require the database; JSON is not a live fallback.
 """
 
+import contextvars
 import os
 import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.slow_queries import instrument_slow_queries
+from app.pool_metrics import InstrumentedNullPool, InstrumentedQueuePool, instrument_engine, reset_after_fork
 from app.models import Base, User, Student, XP, Attendance, Streak, HistoryEvent
 
 # Initialize all variables to None by default - NO database operations during import
 DB_AVAILABLE = False
 engine = None
 SessionLocal = None
+slow_query_log = None
+# Optional read replica; None when DATABASE_REPLICA_URL is unset or unreachable.
+read_engine = None
+ReadSessionLocal = None
 
 logger = logging.getLogger(__name__)
 
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+# Set DB_SCHEMA_CHECK=off only for throwaway local databases.
+DB_SCHEMA_CHECK = os.environ.get("DB_SCHEMA_CHECK", "on").lower() not in ("0", "off", "false", "no")
+DB_POOL_PREWARM = int(os.environ.get("DB_POOL_PREWARM", "2"))
+# Total connections this host may open, shared by all worker processes.
+DB_CONNECTION_BUDGET = int(os.environ.get("DB_CONNECTION_BUDGET", "0"))
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# "queue" (default): a pool per process. "null": no app-side pool, for use
+# behind PgBouncer in transaction mode, which does the pooling instead.
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "queue").lower()
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "3600"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "on").lower() not in ("0", "off", "false", "no")
+
+# Streaming replica for read-only queries (see read_session()).
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+
+_read_from_primary = contextvars.ContextVar("read_from_primary", default=False)
+
 def _build_database_url():
     database_url = os.environ.get("DATABASE_URL")
     if database_url:
@@ -34,13 +65,177 @@ def _build_database_url():
     return None
 
 
-def _load_database():
+class SchemaVersionError(RuntimeError):
+    """The database is not at the Alembic revision this code expects."""
+
+
+def _alembic_heads():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def check_schema_revision(connection):
+    """
+    Compare the database's Alembic revision with the migration head.
+    Raises SchemaVersionError on mismatch instead of creating tables.
+    """
+    from alembic.runtime.migration import MigrationContext
+
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    expected = _alembic_heads()
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema revision {sorted(current) or 'none'} does not match "
+            f"code head {sorted(expected)}. Run `alembic upgrade head` "
+            "(or `alembic stamp 0001` once on databases created before Alembic)."
+        )
+
+
+def prewarm_pool(size: int):
+    """Open `size` pool connections up front so first requests skip connect cost."""
+    if engine is None or size <= 0:
+        return 0
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def pool_limits_for_worker(budget=None, workers=None):
+    """
+    Split the host-wide DB_CONNECTION_BUDGET across WEB_CONCURRENCY worker
+    processes. Returns (pool_size, max_overflow) for one process; without a
+    budget, DB_POOL_SIZE and DB_MAX_OVERFLOW apply (default 10 + 20).
+    A budget below the worker count cannot be met: every worker still needs
+    one connection, so this logs a warning and returns (1, 0).
+    """
+    budget = DB_CONNECTION_BUDGET if budget is None else budget
+    workers = WEB_CONCURRENCY if workers is None else workers
+    if not budget:
+        return (
+            int(os.environ.get("DB_POOL_SIZE", "10")),
+            int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        )
+    workers = max(1, workers)
+    if budget < workers:
+        logger.warning(
+            "DB_CONNECTION_BUDGET=%s is below WEB_CONCURRENCY=%s; each worker still opens "
+            "one connection, %s in total",
+            budget, workers, workers,
+        )
+    per_worker = max(1, budget // workers)
+    pool_size = max(1, (per_worker * 2) // 3)
+    return pool_size, per_worker - pool_size
+
+
+def engine_options(database_url: str) -> dict:
+    """create_engine() keyword arguments for the configured DB_POOL_MODE."""
+    if DB_POOL_MODE == "null":
+        # PgBouncer transaction pooling: a connection per checkout and no
+        # server-side prepared statements (they do not survive a switch of
+        # backend). psycopg2 never prepares; psycopg 3 and asyncpg must be told.
+        connect_args = {}
+        if "+psycopg:" in database_url:
+            connect_args["prepare_threshold"] = None
+        elif "+asyncpg" in database_url:
+            connect_args["statement_cache_size"] = 0
+        return {"poolclass": InstrumentedNullPool, "connect_args": connect_args}
+
+    if DB_POOL_MODE != "queue":
+        raise ValueError(f"DB_POOL_MODE must be 'queue' or 'null', got {DB_POOL_MODE!r}")
+
+    pool_size, max_overflow = pool_limits_for_worker()
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,          # Connections per worker process
+        "max_overflow": max_overflow,    # Extra connections per worker process
+        "pool_timeout": DB_POOL_TIMEOUT, # Seconds to wait before giving up
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+
+def dispose_engine_after_fork():
+    """
+    Drop pooled connections inherited from a parent process without closing
+    them (the parent still owns the sockets). Called from gunicorn's
+    post_fork hook and os.register_at_fork.
+    """
+    if engine is not None:
+        engine.dispose(close=False)
+    if read_engine is not None:
+        read_engine.dispose(close=False)
+    reset_after_fork()
+
+
+os.register_at_fork(after_in_child=dispose_engine_after_fork)
+
+
+def _load_read_replica(replica_url: str):
+    """
+    Connect the read replica. A replica that cannot be reached, or that is
+    not at the migration head yet, is logged and left out, so reads go to
+    the primary instead of failing startup.
+    """
+    global read_engine, ReadSessionLocal
+
+    replica = create_engine(replica_url, echo=False, pool_logging_name="replica", **engine_options(replica_url))
+    instrument_engine(replica)
+    try:
+        with replica.connect() as connection:
+            if DB_SCHEMA_CHECK:
+                check_schema_revision(connection)
+    except SchemaVersionError as e:
+        logger.warning("Read replica is not at the migration head, reading from the primary: %s", e)
+        replica.dispose()
+        return
+    except Exception as e:
+        logger.warning("Read replica not available, reading from the primary: %s", e)
+        replica.dispose()
+        return
+    instrument_slow_queries(replica)
+    read_engine = replica
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica)
+    logger.info("Read replica connected; read-only queries use it")
+
+
+@contextmanager
+def reading_from_primary():
+    """Send read_session() to the primary within this block (and its threads)."""
+    token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(token)
+
+
+def read_session():
+    """
+    Session for read-only queries: the replica when one is connected, unless
+    the current context asked for the primary (reading_from_primary(), e.g.
+    right after this user's own write).
+    """
+    if ReadSessionLocal is not None and not _read_from_primary.get():
+        return ReadSessionLocal()
+    return SessionLocal()
+
+
+def _load_database(prewarm: int = 0):
     """Load database components only when explicitly called."""
-    global DB_AVAILABLE, engine, SessionLocal
+    global DB_AVAILABLE, engine, SessionLocal, slow_query_log
 
     if DB_AVAILABLE:  # Already loaded
         return
 
+    started = time.perf_counter()
     try:
         # Prefer DATABASE_URL, fallback to DB_* environment variables
         DATABASE_URL = _build_database_url()
@@ -50,23 +245,36 @@ def _load_database():
             DB_AVAILABLE = False
             return
 
-        # Create engine with connection pooling
+        # Create engine with connection pooling (see engine_options)
         engine = create_engine(
             DATABASE_URL,
             echo=False,  # Set to True for SQL debugging
-            pool_size=10,           # Connections per instance
-            max_overflow=20,        # Extra connections
-            pool_pre_ping=True,     # Verify connections before using
-            pool_recycle=3600       # Recycle connections after 1 hour
+            **engine_options(DATABASE_URL),
         )
-        
+        instrument_engine(engine)
+        # Statements over SLOW_QUERY_MS are logged with their plan (app/slow_queries.py)
+        slow_query_log = instrument_slow_queries(engine)
+
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-        # Test connection by creating tables
-        Base.metadata.create_all(bind=engine)
+        # Test connection and verify the schema; tables are owned by Alembic
+        with engine.connect() as connection:
+            if DB_SCHEMA_CHECK:
+                check_schema_revision(connection)
+        warmed = prewarm_pool(prewarm if DB_POOL_MODE == "queue" else 0)
+        if DATABASE_REPLICA_URL:
+            _load_read_replica(DATABASE_REPLICA_URL)
         DB_AVAILABLE = True
-        logger.info("Database connection successful!")
+        logger.info(
+            "Database connection successful! (schema check %s, %d pooled connections, %.1f ms)",
+            "passed" if DB_SCHEMA_CHECK else "skipped",
+            warmed,
+            (time.perf_counter() - started) * 1000,
+        )
 
+    except SchemaVersionError:
+        DB_AVAILABLE = False
+        raise
     except Exception as e:
         # Print error for debugging (logger might not be configured)
         print(f"Warning: Database not available: {e}")
@@ -92,6 +300,8 @@ __all__ = [
     "DB_AVAILABLE",
     "engine",
     "SessionLocal",
+    "read_engine",
+    "ReadSessionLocal",
     "Base",
     "User",
     "Student",
@@ -99,6 +309,14 @@ __all__ = [
     "Attendance",
     "Streak",
     "HistoryEvent",
+    "SchemaVersionError",
+    "check_schema_revision",
+    "prewarm_pool",
+    "pool_limits_for_worker",
+    "engine_options",
+    "dispose_engine_after_fork",
+    "reading_from_primary",
+    "read_session",
     "_load_database",
     "get_db"
 ]
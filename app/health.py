@@ -0,0 +1,124 @@
+"""
+Liveness and readiness state for /livez, /readyz and /health.
+A background thread checks the database every HEALTH_PROBE_INTERVAL seconds
+with a HEALTH_PROBE_TIMEOUT bound; probe requests only read the last result
+from memory, so they stay fast and never hold a pool connection even while
+the database is slow or down.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+import app.database as database
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL = float(os.environ.get("HEALTH_PROBE_INTERVAL", "5"))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", "2"))
+# A result older than this (e.g. the prober thread died) counts as not ready.
+HEALTH_STALE_AFTER = float(os.environ.get("HEALTH_STALE_AFTER", str(HEALTH_PROBE_INTERVAL * 3)))
+
+
+def probe_database() -> str:
+    """Run ``SELECT 1`` on a pooled connection; returns the database status."""
+    if not database.DB_AVAILABLE or database.engine is None:
+        return "not_configured"
+    with database.engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return "connected"
+
+
+class HealthProber:
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        stale_after: float = HEALTH_STALE_AFTER,
+        probe: Callable[[], str] = probe_database,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.probe = probe
+        self._inflight: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._result: Dict = {"database": "unknown", "checked_at": None, "latency_ms": None}
+
+    def check_once(self) -> Dict:
+        """Run one probe, bounded by ``timeout``, and store the result."""
+        started = time.monotonic()
+        if self._inflight is not None and self._inflight.is_alive():
+            # A previous probe is still stuck; don't pile up another one.
+            status = "error: timeout (previous probe still running)"
+        else:
+            outcome = {}
+            # Daemon thread rather than an executor: a probe stuck on the
+            # network must not block interpreter or worker shutdown.
+            self._inflight = threading.Thread(
+                target=self._probe_into, args=(outcome,), name="health-probe", daemon=True
+            )
+            self._inflight.start()
+            self._inflight.join(self.timeout)
+            status = outcome.get("status", f"error: timeout after {self.timeout:g}s")
+
+        result = {
+            "database": status,
+            "checked_at": time.monotonic(),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        if status != self._result["database"]:
+            log = logger.info if status == "connected" else logger.warning
+            log("Database health changed: %s -> %s", self._result["database"], status)
+        self._result = result  # single assignment: readers never see a partial update
+        return result
+
+    def snapshot(self) -> Dict:
+        """Last result plus readiness; safe to call from request handlers."""
+        result = self._result
+        checked_at = result["checked_at"]
+        age = None if checked_at is None else time.monotonic() - checked_at
+        fresh = age is not None and age <= self.stale_after
+        ready = fresh and result["database"] == "connected"
+        return {
+            "status": "healthy" if ready else "unhealthy",
+            "database": result["database"] if fresh or checked_at is None else "stale",
+            "checked_seconds_ago": None if age is None else round(age, 1),
+            "probe_latency_ms": result["latency_ms"],
+            "ready": ready,
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.check_once()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+        self._thread = None
+
+    def _probe_into(self, outcome: Dict):
+        try:
+            outcome["status"] = self.probe()
+        except Exception as e:
+            outcome["status"] = f"error: {e}"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception:
+                logger.exception("Health prober iteration failed")
+
+
+prober = HealthProber()
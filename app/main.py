@@ -1,3 +1,8 @@
+import hmac
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 # Load environment variables from .env file FIRST (before any app imports)
 try:
     from dotenv import load_dotenv
@@ -12,14 +17,19 @@ except ImportError:
     pass  # python-dotenv not installed, use system env vars
 
 from app.auth import verify_password, update_password
-from app.database import _load_database
+from app.database import _load_database, DB_POOL_PREWARM
 
+import logging
+from contextlib import asynccontextmanager
 from datetime import date, timedelta
 
+import jinja2
+
 from app.services.exercises import DAILY_EXERCISES
 from app.services.medals import medal_labels
-from app.services.attendance import apply_attendance
-from app.services.level_utils import recalculate_levels
+from app.services.attendance import apply_attendance, apply_bulk_attendance, parse_attendance_csv
+from app.services import clock
+from app.services.practice import complete_pad_exercise, validate_streak
 from app.services.db_operations import (
     require_db_session,
     sync_student_data_to_db,
@@ -27,17 +37,45 @@ from app.services.db_operations import (
     initialize_student_records,
     delete_student,
 )
-from app.services.data_reader import get_users, get_student_stats, get_all_students, get_leaderboard_data
+from app.services.export import FORMATS as EXPORT_FORMATS, export_chunks
+from app.services.roster import import_roster, parse_roster_csv
+from app.services.data_reader import (
+    HISTORY_WINDOW_DAYS,
+    get_all_students,
+    get_history_totals,
+    get_leaderboard_data,
+    get_student_stats,
+    get_users,
+)
+from app.services.avatars import (
+    AvatarUploadError,
+    avatar_path,
+    load_avatar_manifest,
+    save_avatar_upload,
+    schedule_avatar_variants,
+)
 from app.auth import add_user
+from app.static_assets import FingerprintedStaticFiles, static_url
+from app.compression import CompressionMiddleware
+from app.profiling import ProfilingMiddleware
+from app.read_routing import ReadYourWritesMiddleware
+from app.metrics import MetricsMiddleware, register_cache, render_metrics
+from app import health, static_assets
+from app.pool_metrics import get_pool_stats
+from app.query_stats import query_budget
 
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 
-# Initialize database connection
-_load_database()
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s:     %(name)s - %(message)s",
+)
+logging.getLogger("alembic").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
 
 def format_minutes(total_minutes: int) -> str:
     if total_minutes < 60:
@@ -46,62 +84,40 @@ def format_minutes(total_minutes: int) -> str:
     minutes = total_minutes % 60
     return f"{hours}h {minutes}m"
 
-def update_streak_on_practice(stats: dict):
-    """
-    Called when a student completes a practice.
-    Updates current streak, longest streak, and last_practice_date.
-    """
-    today = date.today()
-    last_date_str = stats["streak"].get("last_practice_date")
-
-    if last_date_str:
-        last_date = date.fromisoformat(last_date_str)
-        delta = (today - last_date).days
-
-        if delta == 0:
-            # Already practiced today
-            return
-
-        elif delta == 1:
-            stats["streak"]["current"] += 1
-        else:
-            stats["streak"]["current"] = 1
-    else:
-        # First practice ever
-        stats["streak"]["current"] = 1
-
-    if stats["streak"]["current"] > stats["streak"]["longest"]:
-        stats["streak"]["longest"] = stats["streak"]["current"]
-
-    stats["streak"]["last_practice_date"] = today.isoformat()
-
+# ---------------------------------------------------
+# App & Session Middleware
+# ---------------------------------------------------
 
-def validate_streak(stats: dict) -> bool:
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """
-    Ensures the current streak is valid.
-    Resets it to 0 if at least one day was missed.
-    Returns True if the stats were modified.
+    Connect before accepting traffic: verify the Alembic revision (fails
+    fast on mismatch) and pre-open pool connections so the first request
+    after a deploy does not pay connection setup.
     """
-    last_date = stats["streak"].get("last_practice_date")
-
-    if not last_date:
-        return False
-
-    last = date.fromisoformat(last_date)
-    today = date.today()
-
-    if today - last > timedelta(days=1):
-        stats["streak"]["current"] = 0
-        return True
+    _load_database(prewarm=DB_POOL_PREWARM)
+    health.prober.start()
+    logger.info("Startup complete in %.1f ms", (time.perf_counter() - _IMPORT_STARTED) * 1000)
+    yield
+    health.prober.stop()
+    from app import database
+
+    for label, engine in (("primary", database.engine), ("replica", database.read_engine)):
+        if engine is None:
+            continue
+        pool = get_pool_stats(engine)
+        logger.info(
+            "Pool usage (%s): %d checkouts, peak %d in use, max wait %.1f ms, %d timeouts, %d pre-ping failures",
+            label,
+            pool["checkouts"],
+            pool["peak_in_use"],
+            pool["checkout_seconds_max"] * 1000,
+            pool["timeouts"],
+            pool["pre_ping_failures"],
+        )
 
-    return False
 
-
-# ---------------------------------------------------
-# App & Session Middleware
-# ---------------------------------------------------
-
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Get session secret from environment variable
 SESSION_SECRET_KEY = os.environ.get("SESSION_SECRET_KEY")
@@ -111,26 +127,77 @@ if not SESSION_SECRET_KEY:
         "Generate a secure random key (32+ bytes) and set it in your environment."
     )
 
+# Innermost, so it can read the session: profiles requests an admin asks
+# for with ?profile=1 or that carry a signed X-Profile-Token header.
+app.add_middleware(ProfilingMiddleware)
+
+# Inside the session middleware: keeps a user's reads on the primary for a
+# few seconds after their own writes when a read replica is configured.
+app.add_middleware(ReadYourWritesMiddleware)
+
 app.add_middleware(
     SessionMiddleware,
     secret_key=SESSION_SECRET_KEY
 )
 
+# Compress HTML/JSON bodies; precompressed static files and 304s already
+# carry the right encoding and pass straight through.
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: per-route latency (to the last compressed byte), status codes
+# and SQL statements per request for /metrics.
+app.add_middleware(MetricsMiddleware)
+
 # ---------------------------------------------------
 # Templates & Static files
 # ---------------------------------------------------
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
+# Outside local development templates never change on disk: skip the
+# per-render mtime checks and keep compiled bytecode across restarts.
+TEMPLATE_AUTO_RELOAD = os.environ.get("ENV", "local") == "local"
+template_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+    autoescape=jinja2.select_autoescape(),
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(os.environ.get("JINJA_BYTECODE_CACHE_DIR")),
+)
+templates = Jinja2Templates(env=template_env)
+templates.env.globals["avatar_path"] = avatar_path
+templates.env.globals["static_url"] = static_url
+
+
+def precompile_templates():
+    """Compile every template up front so first renders pay no compile cost."""
+    started = time.perf_counter()
+    names = template_env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        template_env.get_template(name)
+    logger.info(
+        "Precompiled %d templates in %.1f ms",
+        len(names),
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+precompile_templates()
+
+register_cache("templates", lambda: len(template_env.cache or ()))
+register_cache("static_assets", lambda: len(static_assets.manifest.snapshot()))
+register_cache("avatar_manifest", lambda: len(load_avatar_manifest()))
+
+# Fingerprinted URLs from static_url() are cached as immutable; precompressed
+# .br/.gz siblings are built by app.scripts.build_static_assets.
 STATIC_DIR = Path(__file__).parent / "static"
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount("/static", FingerprintedStaticFiles(directory=STATIC_DIR), name="static")
 
 # ---------------------------------------------------
 # Auth routes
 # ---------------------------------------------------
 
 @app.get("/", response_class=HTMLResponse)
+@query_budget(0)
 def login_page(request: Request):
     return templates.TemplateResponse(
         request,
@@ -140,6 +207,7 @@ def login_page(request: Request):
 
 
 @app.post("/login")
+@query_budget(4)
 def login(request: Request, username: str = Form(...), password: str = Form(...)):
     users = get_users()
     user = users.get(username)
@@ -160,6 +228,7 @@ def login(request: Request, username: str = Form(...), password: str = Form(...)
 
 
 @app.post("/change-password")
+@query_budget(3)
 def change_password_submit(
     request: Request,
     password: str = Form(...),
@@ -176,6 +245,7 @@ def change_password_submit(
 
 
 @app.get("/logout")
+@query_budget(0)
 def logout(request: Request):
     request.session.clear()
     return RedirectResponse("/", status_code=302)
@@ -185,6 +255,7 @@ def logout(request: Request):
 # ---------------------------------------------------
 
 @app.get("/change-password", response_class=HTMLResponse)
+@query_budget(0)
 def change_password_form(request: Request):
     if request.session.get("role") != "student":
         return RedirectResponse("/", status_code=302)
@@ -197,6 +268,7 @@ def change_password_form(request: Request):
 
 
 @app.post("/change-password")
+@query_budget(3)
 def change_password_submit(
     request: Request,
     password: str = Form(...),
@@ -216,6 +288,7 @@ def change_password_submit(
 # ---------------------------------------------------
 
 @app.get("/admin/dashboard", response_class=HTMLResponse)
+@query_budget(0)
 def admin_dashboard(request: Request):
     if request.session.get("role") != "admin":
         return RedirectResponse("/", status_code=302)
@@ -228,6 +301,7 @@ def admin_dashboard(request: Request):
 
 
 @app.get("/admin/students", response_class=HTMLResponse)
+@query_budget(1)
 def admin_students(request: Request):
     if request.session.get("role") != "admin":
         return RedirectResponse("/", status_code=302)
@@ -242,6 +316,7 @@ def admin_students(request: Request):
 
 
 @app.get("/admin/attendance", response_class=HTMLResponse)
+@query_budget(1)
 def admin_attendance_form(request: Request):
     if request.session.get("role") != "admin":
         return RedirectResponse("/", status_code=302)
@@ -258,6 +333,7 @@ def admin_attendance_form(request: Request):
     )
 
 @app.post("/admin/attendance")
+@query_budget(18)
 def admin_attendance_submit(
     request: Request,
     student: str = Form(...),
@@ -274,11 +350,76 @@ def admin_attendance_submit(
         status_code=302
     )
 
+# Bulk attendance never scales its statement count with the number of rows
+# (below ~1000 rows per insert batch).
+@app.get("/admin/attendance/bulk", response_class=HTMLResponse)
+@query_budget(1)
+def admin_bulk_attendance_form(request: Request):
+    if request.session.get("role") != "admin":
+        return RedirectResponse("/", status_code=302)
+
+    return _render_bulk_attendance(request, None)
+
+
+@app.post("/admin/attendance/bulk", response_class=HTMLResponse)
+@query_budget(10)
+async def admin_bulk_attendance_submit(request: Request):
+    if request.session.get("role") != "admin":
+        return RedirectResponse("/", status_code=302)
+
+    form = await request.form()
+    upload = form.get("csv_file")
+    if upload is not None and hasattr(upload, "read"):
+        rows, errors = parse_attendance_csv((await upload.read()).decode("utf-8-sig", errors="replace"))
+    else:
+        lesson_date = form.get("date", "")
+        rows = [(student, lesson_date, form.get(f"grade_{student}", "")) for student in form.getlist("student")]
+        errors = [] if rows else ["select at least one student"]
+
+    if errors:
+        result = {"applied": 0, "skipped": [], "errors": errors, "bonuses": 0}
+    else:
+        result = await run_in_threadpool(apply_bulk_attendance, rows)
+    return await run_in_threadpool(_render_bulk_attendance, request, result)
+
+
+def _render_bulk_attendance(request: Request, result):
+    students = sorted(s["username"] for s in get_all_students())
+    return templates.TemplateResponse(
+        request,
+        "admin/attendance_bulk.html",
+        {"request": request, "students": students, "result": result},
+        status_code=400 if result and result["errors"] else 200,
+    )
+
+
+@app.get("/admin/export")
+# The handler itself runs no SQL; the stream runs six queries per
+# EXPORT_BATCH_SIZE students after the response has started.
+@query_budget(0)
+def admin_export(request: Request, format: str = "ndjson", gzip: bool = False):
+    if request.session.get("role") != "admin":
+        return RedirectResponse("/", status_code=302)
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status_code=400)
+
+    filename = f"drum-dungeon-{clock.today().isoformat()}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_chunks(format, compress=gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @app.get("/admin/dashboard/student-management", response_class=HTMLResponse)
+@query_budget(1)
 def admin_student_management(request: Request):
     if request.session.get("role") != "admin":
         return RedirectResponse("/", status_code=302)
 
+    return _render_student_management(request, None)
+
+
+def _render_student_management(request: Request, roster_result):
     students = sorted(s["username"] for s in get_all_students())
 
     return templates.TemplateResponse(
@@ -286,11 +427,14 @@ def admin_student_management(request: Request):
         "admin/student_management.html",
         {
             "request": request,
-            "students": students
+            "students": students,
+            "roster_result": roster_result,
         },
+        status_code=400 if roster_result and roster_result["errors"] and not roster_result["created"] else 200,
     )
 
 @app.post("/admin/dashboard/student-management/remove")
+@query_budget(5)
 def remove_student(
     request: Request,
     student: str = Form(...)
@@ -329,12 +473,13 @@ def remove_student(
 from app.auth import add_user
 
 @app.post("/admin/dashboard/student-management/add")
+@query_budget(10)
 def add_student(
     request: Request,
     name: str = Form(...),
     username: str = Form(...),
     password: str = Form(...),
-    avatar: str = Form(...),
+    avatar: str = Form(""),
 ):
     # ------------------------------------------------------------------
     # Auth guard
@@ -374,11 +519,50 @@ def add_student(
         status_code=302
     )
 
+@app.post("/admin/dashboard/student-management/import", response_class=HTMLResponse)
+@query_budget(8)
+async def import_students(request: Request):
+    if request.session.get("role") != "admin":
+        return RedirectResponse("/", status_code=302)
+
+    form = await request.form()
+    upload = form.get("csv_file")
+    if upload is None or not hasattr(upload, "read"):
+        rows, errors = [], ["choose a CSV file to import"]
+    else:
+        rows, errors = parse_roster_csv((await upload.read()).decode("utf-8-sig", errors="replace"))
+
+    # Hashing and inserts block; keep them off the event loop.
+    result = await run_in_threadpool(import_roster, rows)
+    result["errors"] = errors + result["errors"]
+    return await run_in_threadpool(_render_student_management, request, result)
+
+@app.post("/admin/dashboard/student-management/avatar")
+@query_budget(2)
+async def upload_avatar(request: Request):
+    if request.session.get("role") != "admin":
+        return RedirectResponse("/", status_code=302)
+
+    # Parse the multipart body ourselves so it is streamed to disk with a cap.
+    try:
+        filename = await save_avatar_upload(request.headers, request.stream())
+    except AvatarUploadError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=e.status_code)
+
+    # Resizing runs in the avatar worker pool; the manifest is updated when done.
+    schedule_avatar_variants(filename)
+
+    return RedirectResponse(
+        "/admin/dashboard/student-management",
+        status_code=302
+    )
+
 # ---------------------------------------------------
 # Student routes
 # ---------------------------------------------------
 
 @app.get("/student/dashboard", response_class=HTMLResponse)
+@query_budget(14)
 def student_dashboard(request: Request):
     if request.session.get("role") != "student":
         return RedirectResponse("/", status_code=302)
@@ -416,6 +600,7 @@ def student_dashboard(request: Request):
     )
 
 @app.get("/student/dashboard/daily-pad-exercises", response_class=HTMLResponse)
+@query_budget(0)
 def daily_pad_exercises(request: Request):
     if request.session.get("role") != "student":
         return RedirectResponse("/", status_code=302)
@@ -431,6 +616,7 @@ def daily_pad_exercises(request: Request):
 
 
 @app.post("/student/dashboard/daily-pad-exercises/complete")
+@query_budget(16)
 def complete_daily_pad_exercise(
     request: Request,
     exercise_name: str = Form(...)
@@ -439,57 +625,11 @@ def complete_daily_pad_exercise(
         return RedirectResponse("/", status_code=302)
 
     student = request.session["username"]
-    stats = get_student_stats(student)
-    if stats is None:
-        return RedirectResponse("/", status_code=302)
-
-    # --------------------------------------------------
-    # DETERMINE XP FROM EXERCISE CONFIG
-    # --------------------------------------------------
-    xp_gain = 5  # fallback
-    for exercises in DAILY_EXERCISES.values():
-        for ex in exercises:
-            if ex["id"] == exercise_name:
-                xp_gain = ex.get("xp", 5)
-                break
-
-    # --------------------------------------------------
-    # APPLY XP
-    # --------------------------------------------------
-    stats.setdefault("xp", {})
-    stats["xp"].setdefault("categories", {})
-    stats["xp"]["categories"].setdefault("pad_practice", 0)
-
-    stats["xp"]["categories"]["pad_practice"] += xp_gain
-    stats["xp"]["total"] = sum(stats["xp"]["categories"].values())
-
-    # ✅ UPDATE LEVEL STATE (CRITICAL)
-    recalculate_levels(stats)
-
-    # --------------------------------------------------
-    # STREAK + HISTORY
-    # --------------------------------------------------
-    update_streak_on_practice(stats)
-
-    from datetime import date
-    history = stats.setdefault("history", {})
-    events = history.setdefault("events", [])
-
-    events.append({
-        "type": "pad",
-        "name": exercise_name,
-        "date": date.today().isoformat(),
-    })
-
-    db = require_db_session()
     try:
-        sync_student_data_to_db(db, student, stats)
-        db.commit()
+        if complete_pad_exercise(student, exercise_name) is None:
+            return RedirectResponse("/", status_code=302)
     except Exception as e:
         print(f"Warning: Failed to persist exercise completion to database: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
     return RedirectResponse(
         "/student/dashboard",
@@ -498,6 +638,7 @@ def complete_daily_pad_exercise(
 
 
 @app.get("/student/dashboard/history", response_class=HTMLResponse)
+@query_budget(6)
 def student_history(request: Request):
     if request.session.get("role") != "student":
         return RedirectResponse("/", status_code=302)
@@ -508,25 +649,23 @@ def student_history(request: Request):
     if stats is None:
         return RedirectResponse("/student/dashboard", status_code=302)
 
+    # Stats carry the last HISTORY_WINDOW_DAYS of events; lifetime numbers
+    # come from one aggregate query.
     events = stats.get("history", {}).get("events", [])
+    totals = get_history_totals(student)
 
     # ========================
     # FEATURE 3: Overall Grade (LIFETIME)
     # ========================
 
-    lesson_grades = [
-        e["grade"] for e in events
-        if e.get("type") == "attendance" and "grade" in e
-    ]
-
-    if lesson_grades:
-        overall_grade = round(sum(lesson_grades) / len(lesson_grades), 2)
+    if totals["average_grade"] is not None:
+        overall_grade = round(totals["average_grade"], 2)
     else:
         overall_grade = None
 
-    cutoff = date.today() - timedelta(days=30)
+    cutoff = clock.today() - timedelta(days=HISTORY_WINDOW_DAYS)
 
-    # Events in last 30 days (for counters)
+    # Events in the window (for counters)
     recent_events = [
         e for e in events
         if date.fromisoformat(e["date"]) >= cutoff
@@ -537,12 +676,7 @@ def student_history(request: Request):
     total_attendance = sum(1 for e in recent_events if e["type"] == "attendance")
 
     # ✅ FEATURE 2: Total time practiced (LIFETIME)
-    total_minutes = 0
-    for e in events:
-        if e["type"] == "pad":
-            total_minutes += 5
-        elif e["type"] == "attendance":
-            total_minutes += 60
+    total_minutes = totals["pad"] * 5 + totals["attendance"] * 60
 
     formatted_time = format_minutes(total_minutes)
 
@@ -568,6 +702,7 @@ def student_history(request: Request):
 # ---------------------------------------------------
 
 @app.get("/leaderboard", response_class=HTMLResponse)
+@query_budget(1)
 def leaderboard_view(request: Request):
     if not request.session.get("username"):
         return RedirectResponse("/", status_code=302)
@@ -588,38 +723,51 @@ def leaderboard_view(request: Request):
 # Health Check Endpoint
 # ---------------------------------------------------
 
+@app.get("/livez")
+@query_budget(0)
+async def liveness_check():
+    """Liveness: the process is up and serving. Never touches the database."""
+    return JSONResponse(content={"status": "alive"})
+
+
+def _readiness_response():
+    snapshot = health.prober.snapshot()
+    return JSONResponse(content=snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@app.get("/readyz")
+@query_budget(0)
+async def readiness_check():
+    """
+    Readiness: last result of the background database prober (app/health.py).
+    Served from memory, so it answers immediately during a database incident.
+    Returns 200 if ready, 503 if not.
+    """
+    return _readiness_response()
+
+
 @app.get("/health")
-def health_check():
+@query_budget(0)
+async def health_check():
     """
-    Health check endpoint for monitoring and load balancers.
+    Health check endpoint for monitoring and load balancers (same as /readyz).
     Returns 200 if healthy, 503 if unhealthy.
     """
-    from app.database import DB_AVAILABLE, SessionLocal
-    from sqlalchemy import text
-    
-    health_status = {
-        "status": "healthy",
-        "database": "unknown"
-    }
-    
-    status_code = 200
-    
-    # Check database connectivity
-    if DB_AVAILABLE and SessionLocal:
-        try:
-            db = SessionLocal()
-            # Simple query to test connection
-            db.execute(text("SELECT 1"))
-            db.close()
-            health_status["database"] = "connected"
-        except Exception as e:
-            health_status["status"] = "unhealthy"
-            health_status["database"] = f"error: {str(e)}"
-            status_code = 503
-    else:
-        health_status["database"] = "not_configured"
-        health_status["status"] = "unhealthy"
-        status_code = 503
-    
-    # Return JSON response with proper status code
-    return JSONResponse(content=health_status, status_code=status_code)
+    return _readiness_response()
+
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+
+@app.get("/metrics")
+@query_budget(0)
+def metrics(request: Request):
+    """
+    Prometheus scrape endpoint, aggregated over all worker processes.
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    supplied = request.headers.get("authorization", "")
+    if METRICS_TOKEN and not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}"):
+        return Response(status_code=401)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
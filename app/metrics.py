@@ -0,0 +1,180 @@
+"""
+Prometheus metrics for /metrics.
+Per-route latency, status codes, in-flight requests, SQL statements and DB
+time per request, pool and cache gauges. Under gunicorn every worker writes
+to PROMETHEUS_MULTIPROC_DIR (set up in gunicorn.conf.py) and the scrape
+aggregates all of them, whichever worker answers.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import pool_metrics
+from app.query_stats import track_queries
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+# Under gunicorn, how often a worker copies its gauges out after a request.
+METRICS_GAUGE_INTERVAL = float(os.environ.get("METRICS_GAUGE_INTERVAL", "5"))
+
+# Route label for requests that matched no route, to keep label cardinality bounded.
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start to the last response byte.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being handled.", ["method"], multiprocess_mode="livesum"
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in SQL statements per request.",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Pool metrics are labelled engine="primary" or engine="replica".
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time waiting for a pooled connection.",
+    ["engine"],
+    buckets=pool_metrics.CHECKOUT_BUCKETS,
+)
+POOL_EVENTS = Counter(
+    "db_pool_events_total", "Pool connects, invalidations, timeouts and pre-ping failures.", ["engine", "event"]
+)
+POOL_GAUGES = {
+    name: Gauge(f"db_pool_{name}", description, ["engine"], multiprocess_mode="livesum")
+    for name, description in (
+        ("size", "Configured pool size, summed over workers."),
+        ("in_use", "Connections checked out, summed over workers."),
+        ("idle", "Idle pooled connections, summed over workers."),
+        ("overflow", "Overflow connections open, summed over workers."),
+    )
+}
+CACHE_ENTRIES = Gauge(
+    "cache_entries", "Entries held by in-process caches.", ["cache"], multiprocess_mode="livemax"
+)
+
+_cache_sizes = {}
+_gauges_refreshed_at = None
+
+
+def register_cache(name: str, size_fn):
+    """Export ``size_fn()`` as cache_entries{cache=name}."""
+    _cache_sizes[name] = size_fn
+
+
+def _on_pool_event(name, value, engine):
+    if name == "checkout":
+        POOL_CHECKOUT.labels(engine=engine).observe(value)
+    else:
+        POOL_EVENTS.labels(engine=engine, event=name).inc(value)
+
+
+pool_metrics.add_listener(_on_pool_event)
+
+
+def refresh_gauges():
+    """Copy this process's pool and cache sizes into the exported gauges."""
+    from app import database
+
+    for engine in (database.engine, database.read_engine):
+        if engine is None:
+            continue
+        gauges = pool_metrics.pool_gauges(engine.pool)
+        label = pool_metrics.engine_name(engine.pool)
+        for name, gauge in POOL_GAUGES.items():
+            value = gauges.get("pool_size" if name == "size" else name)
+            gauge.labels(engine=label).set(value or 0)
+    for name, size_fn in _cache_sizes.items():
+        CACHE_ENTRIES.labels(cache=name).set(size_fn())
+
+
+def refresh_gauges_if_due(now=None):
+    """refresh_gauges() at most once per METRICS_GAUGE_INTERVAL seconds."""
+    global _gauges_refreshed_at
+    now = time.monotonic() if now is None else now
+    if _gauges_refreshed_at is not None and now - _gauges_refreshed_at < METRICS_GAUGE_INTERVAL:
+        return False
+    _gauges_refreshed_at = now
+    refresh_gauges()
+    return True
+
+
+def render_metrics():
+    """(body, content_type) for the /metrics response."""
+    refresh_gauges()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Time each HTTP request and count the SQL it ran, labelled by route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        try:
+            with track_queries(scope=scope) as queries:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = _route_label(scope)
+            REQUEST_LATENCY.labels(method=method, route=route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+            DB_QUERIES.labels(route=route).observe(queries.count)
+            DB_TIME.labels(route=route).observe(queries.seconds)
+            if MULTIPROCESS:
+                # The worker answering a scrape cannot read another's pool,
+                # so each one publishes its own, throttled off the hot path.
+                refresh_gauges_if_due()
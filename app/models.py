@@ -3,7 +3,7 @@ Database models for Drum Dungeon application.
 Extracted from database.py for better organization.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Date, Float, ForeignKey, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -30,7 +30,7 @@ class Student(Base):
 class XP(Base):
     __tablename__ = "xp"
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     total = Column(Integer, default=0)
     pad_practice = Column(Integer, default=0)
     attendance = Column(Integer, default=0)
@@ -40,7 +40,7 @@ class XP(Base):
 class Attendance(Base):
     __tablename__ = "attendance"
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     date = Column(Date, nullable=False)
     grade = Column(Float)
 
@@ -48,17 +48,51 @@ class Attendance(Base):
 class Streak(Base):
     __tablename__ = "streaks"
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     current = Column(Integer, default=0)
     longest = Column(Integer, default=0)
     last_practice_date = Column(Date)
 
 
 class HistoryEvent(Base):
+    # On PostgreSQL the table is range-partitioned by month on ``date``, with
+    # primary key (id, date) (migration 0004). Filter on ``date`` wherever a
+    # query can, so the planner only touches the matching partitions.
     __tablename__ = "history_events"
+    __table_args__ = (Index("ix_history_events_student_date", "student_id", "date"),)
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     type = Column(String(20), nullable=False)  # 'pad' or 'attendance'
     name = Column(String(255))
     date = Column(Date, nullable=False)
     grade = Column(Float)
+
+
+class AttendanceMonth(Base):
+    """Lessons per student and calendar month, kept current by the attendance write path."""
+
+    __tablename__ = "attendance_months"
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    lesson_count = Column(Integer, nullable=False, default=0)
+    bonus_awarded = Column(Boolean, nullable=False, default=False)
+
+
+class DailyPractice(Base):
+    """Pad exercises per student, day and exercise, compacted from old history events."""
+
+    __tablename__ = "daily_practice"
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    exercise = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    xp = Column(Integer, nullable=False, default=0)
+
+
+class ImportChecksum(Base):
+    """SHA-256 of each student's stats.json at its last import (app/scripts/import_students_data.py)."""
+
+    __tablename__ = "import_checksums"
+    username = Column(String(50), primary_key=True)
+    digest = Column(String(64), nullable=False)
+    imported_at = Column(DateTime, nullable=False)
@@ -0,0 +1,220 @@
+"""
+Connection pool instrumentation.
+Records how long checkouts wait for a connection, how many connections are
+in use or in overflow, pool timeouts and pre-ping failures, so pool sizes
+(see DB_POOL_SIZE / DB_CONNECTION_BUDGET) can be set from measurements.
+Counters are kept per engine, named by the pool's logging name ("primary"
+unless set, "replica" for the read replica).
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+logger = logging.getLogger(__name__)
+# SQLAlchemy logs pool housekeeping (dispose, recreate) under the pool class;
+# a named pool such as the replica's would report it at INFO.
+for _pool_class in ("InstrumentedQueuePool", "InstrumentedNullPool"):
+    logging.getLogger(f"{__name__}.{_pool_class}").setLevel(logging.WARNING)
+
+# Checkouts slower than this are logged; they mean requests queued for a connection.
+SLOW_CHECKOUT_MS = float(os.environ.get("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
+# Upper bounds (seconds) of the checkout latency histogram.
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+PRIMARY = "primary"
+
+# Callbacks ``(name, value, engine)`` notified of every checkout ("checkout",
+# seconds) and counter increment (counter name, 1); used by the /metrics exporter.
+_listeners = []
+
+
+def add_listener(callback):
+    _listeners.append(callback)
+
+
+def _notify(name, value, engine):
+    for callback in _listeners:
+        callback(name, value, engine)
+
+
+class PoolStats:
+    """Per-process counters of one engine's pool; all methods are thread-safe."""
+
+    def __init__(self, engine: str = PRIMARY):
+        self.engine = engine
+        self._lock = threading.Lock()
+        # Checked-out connections, tracked via events so NullPool reports it too.
+        self.in_use = _Counter()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_seconds = 0.0
+            self.max_checkout_seconds = 0.0
+            self.bucket_counts = [0] * (len(CHECKOUT_BUCKETS) + 1)  # last slot is +Inf
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.pre_ping_failures = 0
+            self.peak_in_use = 0
+        with self.in_use._lock:
+            self.in_use.value = 0
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+            self.bucket_counts[bisect.bisect_left(CHECKOUT_BUCKETS, seconds)] += 1
+        _notify("checkout", seconds, self.engine)
+        if seconds * 1000 >= SLOW_CHECKOUT_MS:
+            logger.warning("Waited %.1f ms for a database connection", seconds * 1000)
+
+    def record_in_use(self, in_use: int):
+        with self._lock:
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        _notify(counter, 1, self.engine)
+
+    def snapshot(self, pool=None) -> Dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_seconds_total": self.checkout_seconds,
+                "checkout_seconds_max": self.max_checkout_seconds,
+                "checkout_buckets": dict(zip(CHECKOUT_BUCKETS + (float("inf"),), self.bucket_counts)),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "pre_ping_failures": self.pre_ping_failures,
+                "peak_in_use": self.peak_in_use,
+            }
+        data.update(pool_gauges(pool))
+        return data
+
+
+_stats: Dict[str, PoolStats] = {}
+_stats_lock = threading.Lock()
+
+
+def engine_name(pool) -> str:
+    """Name a pool's counters are kept under: its logging name, or "primary"."""
+    return getattr(pool, "logging_name", None) or PRIMARY
+
+
+def stats_for(engine: str) -> PoolStats:
+    with _stats_lock:
+        if engine not in _stats:
+            _stats[engine] = PoolStats(engine)
+        return _stats[engine]
+
+
+def pool_gauges(pool) -> Dict[str, Optional[int]]:
+    """Live size, in-use and overflow counts (None where the pool has no such notion)."""
+    if isinstance(pool, QueuePool):
+        return {
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        }
+    in_use = stats_for(engine_name(pool)).in_use.value if pool is not None else None
+    return {"pool_size": None, "in_use": in_use, "idle": None, "overflow": None}
+
+
+class _Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def add(self, delta: int) -> int:
+        with self._lock:
+            self.value += delta
+            return self.value
+
+
+class _TimedCheckoutMixin:
+    """Time ``_do_get``: queue wait plus connect time when the pool grows."""
+
+    def _do_get(self):
+        stats = stats_for(engine_name(self))
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.increment("timeouts")
+            logger.warning(
+                "Database pool %s exhausted after %.1f s (size=%s, overflow=%s)",
+                stats.engine,
+                time.perf_counter() - started,
+                getattr(self, "size", lambda: "n/a")(),
+                getattr(self, "overflow", lambda: "n/a")(),
+            )
+            raise
+        stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+
+def instrument_engine(engine):
+    """Attach pool and error listeners to ``engine``."""
+    stats = stats_for(engine_name(engine.pool))
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.increment("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.record_in_use(stats.in_use.add(1))
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.in_use.add(-1)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.increment("invalidations")
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        if context.is_pre_ping:
+            stats.increment("pre_ping_failures")
+            logger.warning(
+                "Pre-ping found a dead %s database connection: %s", stats.engine, context.original_exception
+            )
+
+
+def reset_after_fork():
+    """A forked worker starts with empty pools; counters restart with them."""
+    with _stats_lock:
+        pools = list(_stats.values())
+    for stats in pools:
+        stats.reset()
+
+
+def get_pool_stats(engine=None) -> Dict:
+    """Snapshot of this process's counters and gauges for ``engine``'s pool (default: the primary's counters)."""
+    if engine is None:
+        return stats_for(PRIMARY).snapshot()
+    return stats_for(engine_name(engine.pool)).snapshot(engine.pool)
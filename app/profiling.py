@@ -0,0 +1,243 @@
+"""
+On-demand profiling of single requests.
+A request is profiled when an admin session adds ``?profile=1`` (or
+``?profile=speedscope``) to a URL, or when it carries a valid
+``X-Profile-Token`` header minted with ``python -m app.scripts.profile_token``
+(PROFILE_SECRET must be set), which works for any session, e.g. to profile
+one student's dashboard. A sampling thread records the stacks running app
+code while the request is handled and writes them to PROFILE_DIR as
+collapsed stacks (flamegraph.pl, speedscope, Firefox Profiler) or speedscope
+JSON. Other requests only pay a substring check on the query string and
+headers.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "profiles"))
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "1"))
+# collapsed | speedscope
+PROFILE_FORMAT = os.environ.get("PROFILE_FORMAT", "collapsed").lower()
+
+FORMATS = {"collapsed": ".collapsed.txt", "speedscope": ".speedscope.json"}
+TOKEN_HEADER = b"x-profile-token"
+_APP_DIR = str(Path(__file__).resolve().parent)
+_THIS_FILE = str(Path(__file__).resolve())
+_ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+
+
+# ----------------------------------------------------------------------
+# Tokens
+# ----------------------------------------------------------------------
+
+def _sign(expires: int, secret: str) -> str:
+    return hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+
+def make_token(ttl_seconds: int = 600, secret: Optional[str] = None, now: Optional[float] = None) -> str:
+    """``<expires>.<hmac>`` value for the X-Profile-Token header."""
+    secret = secret if secret is not None else PROFILE_SECRET
+    if not secret:
+        raise ValueError("PROFILE_SECRET is not set")
+    expires = int((now if now is not None else time.time()) + ttl_seconds)
+    return f"{expires}.{_sign(expires, secret)}"
+
+
+def verify_token(token: str, secret: Optional[str] = None, now: Optional[float] = None) -> bool:
+    secret = secret if secret is not None else PROFILE_SECRET
+    if not secret or "." not in token:
+        return False
+    expires, signature = token.split(".", 1)
+    if not expires.isdigit() or int(expires) < (now if now is not None else time.time()):
+        return False
+    return hmac.compare_digest(signature, _sign(int(expires), secret))
+
+
+# ----------------------------------------------------------------------
+# Sampler
+# ----------------------------------------------------------------------
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT_DIR):
+        filename = os.path.relpath(filename, _ROOT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples every thread's stack each ``interval`` seconds and keeps those
+    running app code (the request's own frames; under load, concurrent
+    requests in the same process are included too).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        # Wall time each stack was seen for. The GIL switch interval (5 ms by
+        # default) can stretch the gap between samples of CPU-bound code.
+        self.seconds: Counter = Counter()
+        self.started = self.finished = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.finished = time.perf_counter()
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    filename = frame.f_code.co_filename
+                    if filename.startswith(_APP_DIR) and filename != _THIS_FILE:
+                        in_app = True
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if in_app:
+                    key = tuple(reversed(stack))
+                    self.samples[key] += 1
+                    self.seconds[key] += elapsed
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: ``root;child;leaf count`` per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common())
+
+    def speedscope(self, name: str) -> str:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, seconds in self.seconds.items():
+            ids = []
+            for frame_name in stack:
+                if frame_name not in index:
+                    index[frame_name] = len(frames)
+                    frames.append({"name": frame_name})
+                ids.append(index[frame_name])
+            samples.append(ids)
+            weights.append(round(seconds * 1000, 3))
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "drum-dungeon",
+        })
+
+
+# ----------------------------------------------------------------------
+# Middleware
+# ----------------------------------------------------------------------
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+
+
+def save_profile(sampler: StackSampler, method: str, path: str, fmt: str, directory: Path = None) -> Path:
+    directory = directory or PROFILE_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    target = directory / f"{stamp}-{method.lower()}-{_slug(path)}{FORMATS[fmt]}"
+    name = f"{method} {path}"
+    target.write_text(sampler.speedscope(name) if fmt == "speedscope" else sampler.collapsed())
+    return target
+
+
+class ProfilingMiddleware:
+    """Profile requests asked for by an admin (?profile=) or a signed header."""
+
+    def __init__(self, app: ASGIApp, interval_ms: float = PROFILE_INTERVAL_MS, directory: Path = None):
+        self.app = app
+        self.interval = interval_ms / 1000
+        self.directory = directory
+
+    def _requested(self, scope: Scope) -> Tuple[bool, str]:
+        """(profile?, format). Cheap substring checks first; parsing only when they hit."""
+        query = scope.get("query_string", b"")
+        fmt = PROFILE_FORMAT
+        if b"profile=" in query:
+            value = parse_qs(query.decode("latin-1")).get("profile", [""])[0].lower()
+            if value in FORMATS:
+                fmt = value
+            session = scope.get("session") or {}
+            if value not in ("", "0", "off") and session.get("role") == "admin":
+                return True, fmt
+        if PROFILE_SECRET:
+            for name, value in scope.get("headers", ()):
+                if name == TOKEN_HEADER:
+                    return verify_token(value.decode("latin-1")), fmt
+        return False, fmt
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        wanted, fmt = self._requested(scope)
+        if not wanted:
+            await self.app(scope, receive, send)
+            return
+
+        # The response is buffered so the profile's file name can be returned
+        # in an X-Profile-File header; only profiled requests pay for this.
+        messages = []
+
+        async def buffer(message: Message) -> None:
+            messages.append(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, buffer)
+        finally:
+            sampler.stop()
+            target = save_profile(sampler, scope["method"], scope["path"], fmt, self.directory)
+            logger.info(
+                "Profiled %s %s: %d samples in %.1f ms -> %s",
+                scope["method"], scope["path"], sum(sampler.samples.values()),
+                (sampler.finished - sampler.started) * 1000, target,
+            )
+        for message in messages:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-file", target.name.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
@@ -0,0 +1,164 @@
+"""
+Per-request SQL statement accounting and query budgets.
+Engine-wide cursor hooks add each statement's count and duration to the
+QueryStats of the current request (a context variable), so middleware can
+report queries and DB time per route. Routes declare how many statements
+they may run with ``@query_budget(n)``; going over fails loudly under
+QUERY_BUDGET_MODE=raise (tests, CI) and logs a warning otherwise.
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# raise | warn | off
+QUERY_BUDGET_MODE = os.environ.get(
+    "QUERY_BUDGET_MODE", "raise" if os.environ.get("ENV") == "test" else "warn"
+).lower()
+
+
+class QueryStats:
+    """Statements executed within one request (or any tracked block)."""
+
+    __slots__ = ("count", "seconds", "statements", "parent", "scope")
+
+    def __init__(
+        self,
+        record_statements: bool = False,
+        parent: Optional["QueryStats"] = None,
+        scope: Optional[dict] = None,
+    ):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if record_statements else None
+        # Enclosing tracker (e.g. the request's), which also sees our statements.
+        self.parent = parent
+        # ASGI scope of the request being tracked, inherited by nested trackers.
+        self.scope = scope if scope is not None else getattr(parent, "scope", None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more SQL statements than its declared budget."""
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def current_route() -> Optional[str]:
+    """Route template (e.g. ``/student/{student}``) of the request running SQL now."""
+    stats = _current.get()
+    scope = stats.scope if stats is not None else None
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+@contextmanager
+def track_queries(record_statements: bool = False, scope: Optional[dict] = None):
+    """
+    Collect statements executed in this context. Sync routes run in a worker
+    thread with a copy of the context, which still points at the same object.
+    Trackers nest: statements count towards every enclosing tracker.
+    """
+    stats = QueryStats(record_statements, parent=_current.get(), scope=scope)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def check_budget(name: str, limit: int, stats: QueryStats, mode: Optional[str] = None):
+    """Raise or warn when ``stats`` went over ``limit`` statements."""
+    mode = mode or QUERY_BUDGET_MODE
+    if mode == "off" or stats.count <= limit:
+        return
+
+    summary = f"{name} ran {stats.count} SQL statements (budget {limit})"
+    if mode == "raise":
+        listing = "\n".join(
+            f"  {number:>3}. {' '.join(statement.split())}"
+            for number, statement in enumerate(stats.statements or [], 1)
+        )
+        print(f"{summary}:\n{listing}", file=sys.stderr)
+        raise QueryBudgetExceeded(f"{summary}:\n{listing}")
+    logger.warning("%s; possible N+1 query", summary)
+
+
+def query_budget(limit: int):
+    """
+    Declare the most SQL statements a route may run. Put it under the
+    ``@app.get``/``@app.post`` decorator; works for sync and async routes.
+    """
+
+    def decorator(func):
+        name = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_queries(record_statements=QUERY_BUDGET_MODE == "raise") as stats:
+                    result = await func(*args, **kwargs)
+                check_budget(name, limit, stats)
+                return result
+
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with track_queries(record_statements=QUERY_BUDGET_MODE == "raise") as stats:
+                    result = func(*args, **kwargs)
+                check_budget(name, limit, stats)
+                return result
+
+            wrapper = sync_wrapper
+
+        wrapper.__query_budget__ = limit
+        return wrapper
+
+    return decorator
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    while stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(context):
+    # after_cursor_execute never fires for a failed statement.
+    connection = context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
@@ -0,0 +1,56 @@
+"""
+Read-your-writes routing for the optional read replica.
+Page reads go to the replica (database.read_session()), which can lag the
+primary by a moment. A user who has just written must still see their own
+change, so any request that may write (POST etc.) reads from the primary. It
+also opens a READ_YOUR_WRITES_SECONDS window, stored in the signed session
+cookie so that every worker and host honours it, during which that user's
+reads stay on the primary. Without a replica this middleware does nothing.
+"""
+
+import os
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import app.database as database
+
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "10"))
+SESSION_KEY = "primary_until"
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def reads_from_primary(scope: Scope, now: float) -> bool:
+    """
+    Whether this request reads from the primary. Requests that may write
+    start (or extend) the session's window; later reads check it.
+    """
+    session = scope.get("session")
+    if scope["method"] not in READ_ONLY_METHODS:
+        if session is not None and session.get("username") and READ_YOUR_WRITES_SECONDS > 0:
+            session[SESSION_KEY] = now + READ_YOUR_WRITES_SECONDS
+        return True
+    if not session or SESSION_KEY not in session:
+        return False
+    if session[SESSION_KEY] > now:
+        return True
+    # Expired: drop it so the cookie shrinks back.
+    del session[SESSION_KEY]
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Route a request's reads to the primary during its user's write window."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or database.ReadSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+        if not reads_from_primary(scope, time.time()):
+            await self.app(scope, receive, send)
+            return
+        with database.reading_from_primary():
+            await self.app(scope, receive, send)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Build resized variants for avatars already on disk and register them in the
+avatar manifest. Uploads through the admin UI do this automatically.
+  python -m app.scripts.build_avatar_variants
+  python -m app.scripts.build_avatar_variants dodko_avatar.png
+"""
+import argparse
+import sys
+
+from app.services.avatars import ALLOWED_EXTENSIONS, AVATARS_DIR, build_avatar_variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build avatar variants and update the manifest")
+    parser.add_argument("filenames", nargs="*", help="Avatar filenames (default: every avatar)")
+    args = parser.parse_args()
+
+    filenames = args.filenames or sorted(
+        path.name for path in AVATARS_DIR.iterdir()
+        if path.is_file() and path.suffix.lower() in ALLOWED_EXTENSIONS
+    )
+
+    failures = 0
+    for filename in filenames:
+        try:
+            variants = build_avatar_variants(filename)
+            print(f"{filename}: {', '.join(sorted(variants, key=int)) or 'no variants'}")
+        except Exception as e:
+            failures += 1
+            print(f"{filename}: failed ({e})", file=sys.stderr)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
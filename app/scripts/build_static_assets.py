@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Precompress static assets so they can be served with Content-Encoding
+without compressing on every request. Run after each deploy/build:
+  python -m app.scripts.build_static_assets
+  python -m app.scripts.build_static_assets --force
+"""
+import argparse
+
+from app.static_assets import STATIC_DIR, precompress_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .br/.gz variants of compressible static assets")
+    parser.add_argument("--force", action="store_true", help="Rebuild variants even if they are up to date")
+    args = parser.parse_args()
+
+    results = precompress_assets(STATIC_DIR, force=args.force)
+    for path, sizes in results.items():
+        original = (STATIC_DIR / path).stat().st_size
+        summary = ", ".join(f"{encoding} {size}B" for encoding, size in sizes.items())
+        print(f"{path} ({original}B): {summary}")
+    print(f"Precompressed {len(results)} asset(s) in {STATIC_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Fold old pad history events into daily_practice and delete them:
+  python -m app.scripts.compact_history                  # older than HISTORY_COMPACT_AFTER_DAYS (180)
+  python -m app.scripts.compact_history --after-days 365 --batch-size 500
+Totals and exports read both tables, so nothing visible changes. Safe to
+interrupt and re-run; each batch of students commits on its own.
+"""
+import argparse
+import sys
+import time
+
+
+def main():
+    from app.services.history_compaction import COMPACT_BATCH_SIZE, HISTORY_COMPACT_AFTER_DAYS
+
+    parser = argparse.ArgumentParser(description="Compact old pad history into per-day practice rollups")
+    parser.add_argument("--after-days", type=int, default=HISTORY_COMPACT_AFTER_DAYS,
+                        help=f"Compact pad events older than this many days (default {HISTORY_COMPACT_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=COMPACT_BATCH_SIZE, help="Students per transaction")
+    args = parser.parse_args()
+
+    from app.database import _load_database
+    import app.database as database
+    from app.services.history_compaction import compact_pad_history, compaction_cutoff
+
+    _load_database()
+    if not database.DB_AVAILABLE:
+        print("❌ Cannot connect to database. Please ensure PostgreSQL is running and DATABASE_URL is set.")
+        sys.exit(1)
+
+    try:
+        before = compaction_cutoff(args.after_days)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    started = time.perf_counter()
+    result = compact_pad_history(before, args.batch_size)
+    print(f"Compacted {result['events']} pad events dated before {before} "
+          f"({result['students']} students checked) in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
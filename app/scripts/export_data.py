@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Stream every student with XP, streak, attendance and history to a file or
+stdout, with flat memory use however large the database is:
+  python -m app.scripts.export_data --output backup.ndjson.gz --gzip
+  python -m app.scripts.export_data --format csv > students.csv
+The admin endpoint /admin/export serves the same stream.
+"""
+import argparse
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all student data as NDJSON or CSV")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Students read per batch")
+    args = parser.parse_args()
+
+    from app.database import _load_database
+    _load_database()
+
+    from app.services.export import EXPORT_BATCH_SIZE, export_chunks, iter_student_records
+
+    started = time.perf_counter()
+    records = iter_student_records(args.batch_size or EXPORT_BATCH_SIZE)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in export_chunks(args.format, compress=args.gzip, records=records):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Exported {written} bytes in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
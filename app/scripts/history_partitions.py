@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Maintain the monthly partitions of history_events (PostgreSQL, migration 0004):
+  python -m app.scripts.history_partitions                    # ensure the next 3 months exist
+  python -m app.scripts.history_partitions --ahead 6 --dry-run
+  python -m app.scripts.history_partitions --retain-months 24 --archive-dir /var/backups/drum-dungeon
+
+Each run creates partitions from the current month through --ahead months
+later. It also creates a partition for every month that has rows in the
+default partition (for example after importing old data), moving those rows
+into it. With --retain-months, whole months older than that are detached.
+With --archive-dir, each detached month is also written to
+<archive-dir>/history_events_YYYY_MM.csv.gz and then dropped. Without it, the
+detached table is kept for manual handling. Months that were detached
+earlier but never archived (for example because the disk was full) are
+archived by the next run with --archive-dir. Each detached month prints how
+many events leave the lifetime history totals; pad events already compacted
+into daily_practice keep counting. Runs are idempotent and serialized with
+an advisory lock, so every app host can run this on a timer.
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+TABLE = "history_events"
+DEFAULT_PARTITION = f"{TABLE}_default"
+MONTHS_AHEAD = int(os.environ.get("HISTORY_PARTITIONS_AHEAD", "3"))
+# 0 keeps every month.
+RETAIN_MONTHS = int(os.environ.get("HISTORY_RETENTION_MONTHS", "0"))
+ARCHIVE_DIR = os.environ.get("HISTORY_ARCHIVE_DIR", "")
+
+_PARTITION_NAME = re.compile(rf"^{TABLE}_(\d{{4}})_(\d{{2}})$")
+LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('history_events partitions'))"
+
+
+class Plan(NamedTuple):
+    create: List[date]
+    retire: List[str]
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def plan_maintenance(
+    existing: Iterable[str],
+    today: date,
+    ahead: int = MONTHS_AHEAD,
+    retain_months: int = RETAIN_MONTHS,
+    default_months: Iterable[date] = (),
+    detached: Iterable[str] = (),
+) -> Plan:
+    """
+    Months to create (this month through ``ahead`` months later, plus months
+    holding rows in the default partition) and partitions to retire (months
+    before ``retain_months`` months ago; 0 retires nothing). Months whose
+    ``detached`` table still exists are not created again.
+    """
+    current = today.replace(day=1)
+    existing = list(existing)
+    have = {partition_month(name) for name in [*existing, *detached]}
+    wanted = {add_months(current, offset) for offset in range(ahead + 1)} | set(default_months)
+    create = sorted(month for month in wanted if month not in have)
+
+    retire = []
+    if retain_months > 0:
+        oldest_kept = add_months(current, -retain_months)
+        months = {name: partition_month(name) for name in existing + [partition_name(month) for month in create]}
+        retire = sorted(name for name, month in months.items() if month is not None and month < oldest_kept)
+    return Plan(create, retire)
+
+
+def _run(connection, statement: str, dry_run: bool):
+    print(f"{statement};")
+    if not dry_run:
+        connection.execute(text(statement))
+
+
+def _partition_names(connection) -> List[str]:
+    return list(connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass)"
+    ), {"table": TABLE}).scalars())
+
+
+def _detached_partitions(connection) -> List[str]:
+    """history_events_YYYY_MM tables that are no longer attached (detached, not yet archived)."""
+    names = connection.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+        "AND relnamespace = current_schema()::regnamespace AND relname LIKE :pattern"
+    ), {"pattern": f"{TABLE}\\_%"}).scalars()
+    return sorted(name for name in names if partition_month(name) is not None)
+
+
+def _event_counts(connection, name: str) -> str:
+    rows = connection.execute(text(f"SELECT type, COUNT(*) FROM {name} GROUP BY type ORDER BY type")).all()
+    return ", ".join(f"{count} {event_type}" for event_type, count in rows) or "no"
+
+
+def _default_months(connection) -> List[date]:
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        return []
+    return list(connection.execute(text(
+        f"SELECT DISTINCT CAST(date_trunc('month', date) AS date) FROM {DEFAULT_PARTITION}"
+    )).scalars())
+
+
+def create_partition(connection, month: date, move_from_default: bool, dry_run: bool = False):
+    name, lower, upper = partition_name(month), month.isoformat(), add_months(month, 1).isoformat()
+    if not move_from_default:
+        _run(connection, f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ('{lower}') TO ('{upper}')",
+             dry_run)
+        return
+    # Rows for this month sit in the default partition, which would make a
+    # plain CREATE ... PARTITION OF fail: build the table, move them, attach.
+    _run(connection, f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)", dry_run)
+    _run(connection, (
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= '{lower}' AND date < '{upper}' "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+    ), dry_run)
+    _run(connection, f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')",
+         dry_run)
+
+
+def archive_partition(engine, name: str, archive_dir: Path):
+    """
+    Write a detached partition to <archive_dir>/<name>.csv.gz, then drop it.
+    Returns None when another host archived it first.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    target = archive_dir / f"{name}.csv.gz"
+    partial = target.with_name(target.name + ".partial")
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.execute(LOCK_SQL)
+            cursor.execute("SELECT to_regclass(%s)", (name,))
+            if cursor.fetchone()[0] is None:
+                raw.rollback()
+                return None
+        with gzip.open(partial, "wb") as out, raw.cursor() as cursor:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", out)
+        with open(partial, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(partial, target)
+        with raw.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}")
+        raw.commit()
+    finally:
+        raw.close()
+    return target
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create and retire monthly history_events partitions")
+    parser.add_argument("--ahead", type=int, default=MONTHS_AHEAD,
+                        help=f"Months to create ahead of the current one (default {MONTHS_AHEAD})")
+    parser.add_argument("--retain-months", type=int, default=RETAIN_MONTHS,
+                        help="Detach months older than this many months (default: keep everything)")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR or None,
+                        help="Archive detached months here as CSV.gz and drop them")
+    parser.add_argument("--dry-run", action="store_true", help="Print the statements without running them")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from app.database import _load_database
+    import app.database as database
+    from app.services import clock
+
+    _load_database()
+    if not database.DB_AVAILABLE:
+        print("❌ Cannot connect to database. Please ensure PostgreSQL is running and DATABASE_URL is set.")
+        sys.exit(1)
+    if database.engine.dialect.name != "postgresql":
+        print("history_events is only partitioned on PostgreSQL; nothing to do.")
+        return
+
+    with database.engine.connect() as connection:
+        detached = _detached_partitions(connection)
+    if detached and args.archive_dir and not args.dry_run:
+        # Left over from a run whose archiving failed after the detach.
+        for name in detached:
+            archived = archive_partition(database.engine, name, Path(args.archive_dir))
+            if archived:
+                print(f"Archived previously detached {name} to {archived}")
+    elif detached:
+        print(f"Detached and not archived: {', '.join(detached)}")
+
+    with database.engine.begin() as connection:
+        # One maintainer at a time, however many hosts run the timer.
+        connection.execute(text(LOCK_SQL))
+        kind = connection.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": TABLE})
+        if kind.scalar() != "p":
+            print(f"❌ {TABLE} is not partitioned; run `alembic upgrade head` first.")
+            sys.exit(1)
+
+        default_months = set(_default_months(connection))
+        plan = plan_maintenance(
+            _partition_names(connection), clock.today(), args.ahead, args.retain_months, default_months,
+            _detached_partitions(connection),
+        )
+        for month in plan.create:
+            create_partition(connection, month, month in default_months, args.dry_run)
+        for name in plan.retire:
+            if not args.dry_run or partition_month(name) not in plan.create:
+                # Lifetime history totals only count attached months.
+                print(f"{name}: {_event_counts(connection, name)} events leave the lifetime history totals")
+            _run(connection, f"ALTER TABLE {TABLE} DETACH PARTITION {name}", args.dry_run)
+
+    if args.archive_dir and not args.dry_run:
+        for name in plan.retire:
+            archived = archive_partition(database.engine, name, Path(args.archive_dir))
+            if archived:
+                print(f"Archived {name} to {archived}")
+    if not plan.create and not plan.retire:
+        print("Partitions are up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Bulk import of the legacy students_data archive into PostgreSQL.
+
+Full mode (default): student directories are parsed in a process pool and
+each table is streamed with one COPY FROM STDIN; secondary indexes are
+dropped for the load and rebuilt afterwards. The whole import is one
+transaction: existing rows are replaced, and any error leaves the database
+untouched.
+
+Incremental mode (--incremental): nothing is truncated. The SHA-256 of each
+stats.json is compared with the one recorded at its last import
+(import_checksums); only new or changed students are parsed and upserted,
+in batches that commit together with their checksums, so a failed run
+resumes where it stopped. Students missing from the archive are kept, and
+existing users are never overwritten (their passwords may have changed).
+
+WARNING: a changed student's XP, streak, attendance, history, month rollups
+and compacted practice are REPLACED by their stats.json; anything recorded
+in the app for that student since the archive was written is lost. Each
+batch holds the students' row locks (the lock the app's attendance and
+practice writes take), so no write is lost mid-batch, but the JSON wins.
+
+The database must already be at the Alembic head (`alembic upgrade head`);
+the importer checks alembic_version against the migration files in
+--alembic-versions and never creates tables itself.
+
+Standalone on purpose (standard library + psycopg2 only) so the migration
+role can copy it, with alembic/versions, to the database host:
+
+  python3 import_students_data.py --data-dir /opt/students_data \\
+      --alembic-versions /opt/migration/alembic/versions \\
+      --db-host 127.0.0.1 --db-name student_db --db-user app --db-pass ...
+  DATABASE_URL=postgresql://... python -m app.scripts.import_students_data --data-dir practice_data
+  DATABASE_URL=postgresql://... python -m app.scripts.import_students_data --data-dir practice_data --incremental
+
+The data directory holds users.json and one <username>/stats.json per
+student, either directly or under students/.
+"""
+
+import argparse
+import ast
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import NamedTuple, Tuple
+
+# Load order; children after their parents.
+TABLES = {
+    "users": ("username", "password", "role", "force_change"),
+    "students": ("id", "username", "display_name", "avatar", "created_at"),
+    "xp": ("student_id", "total", "pad_practice", "attendance", "consistency"),
+    "streaks": ("student_id", "current", "longest", "last_practice_date"),
+    "attendance": ("student_id", "date", "grade"),
+    "history_events": ("student_id", "type", "name", "date", "grade"),
+    "import_checksums": ("username", "digest", "imported_at"),
+}
+# Rows replaced per student by an incremental import.
+CHILD_TABLES = ("xp", "streaks", "attendance", "history_events")
+SEQUENCE_TABLES = ("students", "xp", "streaks", "attendance", "history_events")
+# Derived per-student tables, cleared with the rows they summarize:
+# attendance_months is rebuilt from attendance after loading (revision 0003);
+# daily_practice is refilled by the history compaction job (revision 0005).
+ROLLUP_TABLES = ("attendance_months", "daily_practice")
+
+# Migration files the schema must be at the head of; the migration role
+# copies them next to this script.
+ALEMBIC_VERSIONS = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+_REVISION_RE = re.compile(r"^(down_revision|revision)\s*=\s*(.+)$", re.MULTILINE)
+
+try:
+    from app.services.attendance import CONSISTENCY_LESSONS
+except ImportError:  # standalone copy on the database host
+    CONSISTENCY_LESSONS = 4
+
+# Month rollups recomputed from attendance; CONSISTENCY_LESSONS earn the bonus.
+ROLLUP_SQL = f"""
+INSERT INTO attendance_months (student_id, month, lesson_count, bonus_awarded)
+SELECT student_id, to_char(date, 'YYYY-MM'), COUNT(*), COUNT(*) >= {CONSISTENCY_LESSONS:d}
+FROM attendance {{where}}
+GROUP BY student_id, to_char(date, 'YYYY-MM')
+"""
+
+# Indexes not backing a constraint (primary keys stay, for the foreign keys).
+SECONDARY_INDEXES_SQL = """
+SELECT c.relname, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+WHERE t.relname = ANY(%s)
+  AND t.relnamespace = current_schema()::regnamespace
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+"""
+
+
+
+def migration_heads(versions_dir: Path) -> set:
+    """Head revision(s) of the Alembic migrations in ``versions_dir``."""
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        fields = {name: ast.literal_eval(value.strip()) for name, value in _REVISION_RE.findall(path.read_text())}
+        if "revision" not in fields:
+            continue
+        revisions.add(fields["revision"])
+        down = fields.get("down_revision")
+        parents.update(down if isinstance(down, (tuple, list)) else [down])
+    return revisions - parents
+
+
+def check_schema(conn, versions_dir: Path):
+    """
+    Refuse to load unless the database is at the Alembic head. The schema
+    comes from `alembic upgrade head`, never from this script (the same check
+    as app.database.check_schema_revision, without SQLAlchemy).
+    """
+    expected = migration_heads(versions_dir)
+    if not expected:
+        raise SystemExit(f"No Alembic migrations found in {versions_dir}; pass --alembic-versions")
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('alembic_version') IS NOT NULL")
+        current = set()
+        if cur.fetchone()[0]:
+            cur.execute("SELECT version_num FROM alembic_version")
+            current = {row[0] for row in cur.fetchall()}
+    conn.rollback()
+    if current != expected:
+        raise SystemExit(
+            f"Database schema revision {sorted(current) or 'none'} does not match "
+            f"code head {sorted(expected)}. Run `alembic upgrade head` before importing."
+        )
+
+
+def rebuild_index_sql(definition: str) -> str:
+    """
+    CREATE INDEX statement that restores a dropped index. pg_get_indexdef()
+    describes an index on a partitioned table (history_events, revision
+    0004) as ``ON ONLY``, which would leave an invalid index on the parent
+    and none on its partitions; plain ``ON`` builds it on every partition.
+    """
+    return definition.replace(" ON ONLY ", " ON ", 1)
+
+
+class StudentRows(NamedTuple):
+    """Rows parsed from one student directory, without the student id."""
+
+    username: str
+    digest: str
+    student: Tuple
+    xp: Tuple
+    streak: Tuple
+    attendance: Tuple
+    history: Tuple
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import a students_data archive into PostgreSQL")
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"),
+                        help="libpq/SQLAlchemy URL; default DATABASE_URL, else the --db-* options")
+    parser.add_argument("--db-host")
+    parser.add_argument("--db-port", type=int, default=5432)
+    parser.add_argument("--db-name")
+    parser.add_argument("--db-user")
+    parser.add_argument("--db-pass", default=os.environ.get("DB_PASS"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes parsing student directories")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Upsert only new or changed students; never truncate. A changed student's "
+                             "XP, streak, attendance and history are REPLACED by the JSON")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Students per committed batch in incremental mode")
+    parser.add_argument("--alembic-versions", type=Path, default=ALEMBIC_VERSIONS,
+                        help="Alembic versions directory the database must be at the head of")
+    return parser.parse_args()
+
+
+def utc_now() -> datetime:
+    """Naive UTC timestamp for the TIMESTAMP (without time zone) columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_date(value):
+    if not value:
+        return None
+    return date.fromisoformat(value)
+
+
+def student_dirs(data_dir: Path):
+    """Sorted <username>/ directories containing a stats.json."""
+    root = data_dir / "students" if (data_dir / "students").is_dir() else data_dir
+    return sorted(path for path in root.iterdir() if (path / "stats.json").is_file())
+
+
+def student_digest(student_dir: Path) -> str:
+    return hashlib.sha256((student_dir / "stats.json").read_bytes()).hexdigest()
+
+
+def changed_student_dirs(paths, known: dict):
+    """Directories whose stats.json hash differs from ``known`` (username -> digest)."""
+    return [path for path in paths if known.get(path.name) != student_digest(path)]
+
+
+def parse_student(student_dir: Path) -> StudentRows:
+    """Parse one stats.json (runs in a worker process)."""
+    raw = (student_dir / "stats.json").read_bytes()
+    stats = json.loads(raw.decode("utf-8"))
+    username = student_dir.name
+    profile = stats.get("profile", {})
+    xp_data = stats.get("xp", {})
+    categories = xp_data.get("categories", {})
+    streak = stats.get("streak", {})
+
+    attendance = tuple(
+        (parse_date(value), None)
+        for value in stats.get("attendance", {}).get("dates", [])
+        if value
+    )
+    history = tuple(
+        (event.get("type", "pad"), event.get("name", ""), parse_date(event["date"]), event.get("grade"))
+        for event in stats.get("history", {}).get("events", [])
+        if event.get("date")
+    )
+    return StudentRows(
+        username=username,
+        digest=hashlib.sha256(raw).hexdigest(),
+        student=(username, profile.get("name", username), profile.get("avatar", "")),
+        xp=(
+            xp_data.get("total", 0),
+            categories.get("pad_practice", 0),
+            categories.get("attendance", 0),
+            categories.get("consistency", 0),
+        ),
+        streak=(streak.get("current", 0), streak.get("longest", 0), parse_date(streak.get("last_practice_date"))),
+        attendance=attendance,
+        history=history,
+    )
+
+
+def _parse_or_error(student_dir: Path):
+    try:
+        return parse_student(student_dir)
+    except Exception as e:
+        return f"{student_dir}: {type(e).__name__}: {e}"
+
+
+def parse_all(paths, workers: int):
+    """Parse directories in a process pool; returns (rows, errors) in path order."""
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_or_error, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        results = [_parse_or_error(path) for path in paths]
+    rows = [result for result in results if isinstance(result, StudentRows)]
+    errors = [result for result in results if isinstance(result, str)]
+    return rows, errors
+
+
+def copy_value(value) -> str:
+    """One field in COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    text = str(value)
+    if any(char in text for char in "\\\t\n\r"):
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def copy_buffers(users: dict, students, created_at: datetime, student_ids=None):
+    """
+    COPY text per table. Full imports assign student ids here (1 upwards),
+    so child rows can reference them without a round trip per student;
+    incremental imports pass the ids returned by their upsert.
+    """
+    buffers = {table: io.StringIO() for table in TABLES}
+    student_ids = student_ids if student_ids is not None else range(1, len(students) + 1)
+
+    def write(table, row):
+        buffers[table].write("\t".join(copy_value(value) for value in row) + "\n")
+
+    for username, payload in users.items():
+        write("users", (username, payload.get("password", ""), payload.get("role", "student"),
+                        payload.get("force_change", False)))
+
+    for student_id, rows in zip(student_ids, students):
+        write("students", (student_id, *rows.student, created_at))
+        write("import_checksums", (rows.username, rows.digest, created_at))
+        write("xp", (student_id, *rows.xp))
+        write("streaks", (student_id, *rows.streak))
+        for row in rows.attendance:
+            write("attendance", (student_id, *row))
+        for row in rows.history:
+            write("history_events", (student_id, *row))
+
+    for buffer in buffers.values():
+        buffer.seek(0)
+    return buffers
+
+
+def connect(args):
+    import psycopg2
+
+    if args.database_url:
+        # Accept SQLAlchemy-style URLs (postgresql+psycopg2://) as well.
+        url = args.database_url.replace("postgresql+psycopg2://", "postgresql://", 1)
+        return psycopg2.connect(url)
+    if not all([args.db_host, args.db_name, args.db_user]):
+        raise SystemExit("Pass --database-url (or DATABASE_URL) or --db-host/--db-name/--db-user")
+    return psycopg2.connect(
+        host=args.db_host, port=args.db_port, dbname=args.db_name, user=args.db_user, password=args.db_pass
+    )
+
+
+def load(conn, buffers):
+    """Replace all rows: truncate, drop secondary indexes, COPY, rebuild, analyze."""
+    counts = {}
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join((*ROLLUP_TABLES, *reversed(list(TABLES))))} RESTART IDENTITY CASCADE")
+
+        cur.execute(SECONDARY_INDEXES_SQL, (list(TABLES),))
+        indexes = cur.fetchall()
+        for name, _ in indexes:
+            cur.execute(f'DROP INDEX "{name}"')
+
+        for table, columns in TABLES.items():
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffers[table])
+            counts[table] = cur.rowcount
+
+        cur.execute(ROLLUP_SQL.format(where=""))
+        counts["attendance_months"] = cur.rowcount
+
+        for _, definition in indexes:
+            cur.execute(rebuild_index_sql(definition))
+        for table in SEQUENCE_TABLES:
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+        cur.execute(f"ANALYZE {', '.join((*TABLES, *ROLLUP_TABLES))}")
+    return counts, len(indexes)
+
+
+def load_incremental(conn, users: dict, paths, workers: int, batch_size: int, created_at: datetime):
+    """
+    Upsert new and changed students in batches; each batch commits with its
+    checksums. A changed student's runtime rows are replaced by the JSON.
+    Returns (unchanged, imported, errors, new users).
+    """
+    from psycopg2.extras import execute_values
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT username, digest FROM import_checksums")
+        known = dict(cur.fetchall())
+        new_users = 0
+        if users:
+            execute_values(
+                cur,
+                "INSERT INTO users (username, password, role, force_change) VALUES %s "
+                "ON CONFLICT (username) DO NOTHING",
+                [(name, payload.get("password", ""), payload.get("role", "student"),
+                  payload.get("force_change", False)) for name, payload in users.items()],
+            )
+            new_users = cur.rowcount
+    conn.commit()
+
+    changed = changed_student_dirs(paths, known)
+    imported, errors = 0, []
+    for start in range(0, len(changed), batch_size):
+        students, batch_errors = parse_all(changed[start:start + batch_size], workers)
+        errors.extend(batch_errors)
+        if not students:
+            continue
+        with conn.cursor() as cur:
+            # The app's write paths lock the student row first; take the same
+            # locks in id order so a lesson recorded meanwhile waits for us.
+            cur.execute(
+                "SELECT id FROM students WHERE username = ANY(%s) ORDER BY id FOR UPDATE",
+                ([rows.username for rows in students],),
+            )
+            returned = execute_values(
+                cur,
+                "INSERT INTO students (username, display_name, avatar, created_at) VALUES %s "
+                "ON CONFLICT (username) DO UPDATE SET display_name = EXCLUDED.display_name, "
+                "avatar = EXCLUDED.avatar RETURNING username, id",
+                [(*rows.student, created_at) for rows in students],
+                fetch=True,
+            )
+            ids = dict(returned)
+            student_ids = [ids[rows.username] for rows in students]
+            for table in (*CHILD_TABLES, *ROLLUP_TABLES):
+                cur.execute(f"DELETE FROM {table} WHERE student_id = ANY(%s)", (student_ids,))
+            cur.execute("DELETE FROM import_checksums WHERE username = ANY(%s)",
+                        ([rows.username for rows in students],))
+            buffers = copy_buffers({}, students, created_at, student_ids)
+            for table in (*CHILD_TABLES, "import_checksums"):
+                cur.copy_expert(f"COPY {table} ({', '.join(TABLES[table])}) FROM STDIN", buffers[table])
+            cur.execute(ROLLUP_SQL.format(where="WHERE student_id = ANY(%s)"), (student_ids,))
+        conn.commit()
+        imported += len(students)
+        print(f"Imported {start + len(students)}/{len(changed)} changed students", flush=True)
+    return len(paths) - len(changed), imported, errors, new_users
+
+
+def main():
+    args = parse_args()
+    data_dir = Path(args.data_dir)
+    started = time.perf_counter()
+
+    users_file = data_dir / "users.json"
+    users = json.loads(users_file.read_text(encoding="utf-8")) if users_file.exists() else {}
+    paths = student_dirs(data_dir)
+    if args.incremental:
+        conn = connect(args)
+        try:
+            check_schema(conn, args.alembic_versions)
+            unchanged, imported, errors, new_users = load_incremental(
+                conn, users, paths, args.workers, args.batch_size, utc_now()
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        print(f"{unchanged} unchanged, {imported} imported, {len(errors)} failed, {new_users} new users "
+              f"in {time.perf_counter() - started:.2f} s")
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        if errors:
+            raise SystemExit(1)
+        return
+
+    students, errors = parse_all(paths, args.workers)
+    if errors:
+        print(f"{len(errors)} student directories could not be parsed; nothing was imported:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        raise SystemExit(1)
+    parsed = time.perf_counter()
+
+    buffers = copy_buffers(users, students, utc_now())
+    conn = connect(args)
+    try:
+        check_schema(conn, args.alembic_versions)
+        counts, rebuilt = load(conn, buffers)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"Parsed {len(paths)} student directories with {args.workers} workers in {parsed - started:.2f} s")
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+    print(f"Rebuilt {rebuilt} indexes; total {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
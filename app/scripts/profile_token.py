@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Mint an X-Profile-Token header value so one request is profiled by
+app/profiling.py, whatever session it belongs to. Needs the same
+PROFILE_SECRET as the app:
+  PROFILE_SECRET=... python -m app.scripts.profile_token --ttl 600
+  curl -H "X-Profile-Token: <token>" -b cookies.txt https://.../student/alice
+"""
+import argparse
+
+from app.profiling import make_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a signed X-Profile-Token header value")
+    parser.add_argument("--ttl", type=int, default=600, help="Seconds the token stays valid")
+    args = parser.parse_args()
+
+    try:
+        token = make_token(args.ttl)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(token)
+
+
+if __name__ == "__main__":
+    main()
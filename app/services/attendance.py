@@ -1,20 +1,59 @@
-from datetime import datetime, timezone
-from typing import Optional
+import csv
+import io
+from collections import Counter, defaultdict
+from datetime import date, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from sqlalchemy import bindparam, insert, update
+
+from app.models import Attendance, AttendanceMonth, HistoryEvent, Student, XP
+from app.services import clock
 from app.services.level_utils import recalculate_levels
 from app.services.medals import check_and_award_medals
-from app.services.data_reader import get_student_stats
-from app.services.db_operations import require_db_session, sync_student_data_to_db
+from app.services.data_reader import read_student_stats
+from app.services.db_operations import (
+    get_attendance_month,
+    lock_student,
+    record_attendance_month,
+    require_db_session,
+    sync_student_data_to_db,
+)
 
 
 ATTENDANCE_XP = 20
 CONSISTENCY_BONUS_XP = 10
+# Lessons in one calendar month that earn the consistency bonus.
+CONSISTENCY_LESSONS = 4
+LESSON_NAME = "Private Lesson"
+GRADE_RANGE = range(1, 11)
+
 
+def apply_attendance(student: str, date_str: str, grade: Optional[int] = None) -> bool:
+    """
+    Record one lesson. Returns False, changing nothing, when the student
+    already has a lesson on ``date_str`` (like apply_bulk_attendance's skips).
+    """
+    # Stats, month rollup and the writes share one transaction that holds the
+    # student lock, so concurrent lessons (or practice) for the same student
+    # queue up: no lost XP and no duplicate first rollup of a month.
+    db = require_db_session()
+    try:
+        applied = _apply_attendance(db, student, date_str, grade)
+        db.commit()
+        return applied
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-def apply_attendance(student: str, date_str: str, grade: Optional[int] = None):
-    stats = get_student_stats(student)
-    if stats is None:
+
+def _apply_attendance(db, student: str, date_str: str, grade: Optional[int]) -> bool:
+    if lock_student(db, student) is None:
         raise ValueError(f"Student not found: {student}")
+    stats = read_student_stats(db, student)
+    if date_str in stats.get("attendance", {}).get("dates", []):
+        return False
 
     # --------------------------------------------------
     # ENSURE STRUCTURE (CRITICAL FIX)
@@ -44,22 +83,22 @@ def apply_attendance(student: str, date_str: str, grade: Optional[int] = None):
     events = history.setdefault("events", [])
 
     # --------------------------------------------------
-    # MONTH ROLLOVER LOGIC (YYYY-MM)
+    # MONTH ROLLUP (YYYY-MM): one indexed row read
     # --------------------------------------------------
     month = date_str[:7]
-
-    if attendance["current_month"]["month"] != month:
-        attendance["current_month"] = {
-            "month": month,
-            "count": 0,
-            "bonus_awarded": False,
-        }
+    rollup = get_attendance_month(db, student, month)
+    attendance["current_month"] = {
+        "month": month,
+        "count": rollup.lesson_count if rollup else 0,
+        "bonus_awarded": rollup.bonus_awarded if rollup else False,
+    }
+    current_month = attendance["current_month"]
 
     # --------------------------------------------------
     # APPLY ATTENDANCE XP
     # --------------------------------------------------
     attendance["lifetime_lessons"] += 1
-    attendance["current_month"]["count"] += 1
+    current_month["count"] += 1
     attendance["dates"].append(date_str)
 
     categories["attendance"] += ATTENDANCE_XP
@@ -67,9 +106,9 @@ def apply_attendance(student: str, date_str: str, grade: Optional[int] = None):
     # --------------------------------------------------
     # MONTHLY CONSISTENCY BONUS
     # --------------------------------------------------
-    if attendance["current_month"]["count"] == 4:
+    if current_month["count"] >= CONSISTENCY_LESSONS and not current_month["bonus_awarded"]:
         categories["consistency"] += CONSISTENCY_BONUS_XP
-        attendance["current_month"]["bonus_awarded"] = True
+        current_month["bonus_awarded"] = True
 
     # --------------------------------------------------
     # RECOMPUTE TOTAL XP + LEVELS
@@ -83,22 +122,211 @@ def apply_attendance(student: str, date_str: str, grade: Optional[int] = None):
     # --------------------------------------------------
     events.append({
         "type": "attendance",
-        "name": "Private Lesson",
+        "name": LESSON_NAME,
         "date": date_str,
         "grade": grade,
     })
     history["last_xp_event"] = "attendance"
-    history["last_updated"] = datetime.now(timezone.utc).isoformat()
+    history["last_updated"] = clock.now(timezone.utc).isoformat()
 
     # --------------------------------------------------
     # SAVE TO POSTGRESQL
     # --------------------------------------------------
+    student_row = sync_student_data_to_db(db, student, stats)
+    record_attendance_month(
+        db, student_row.id, month, current_month["count"], current_month["bonus_awarded"], rollup
+    )
+    return True
+
+
+# ------------------------------------------------------------------
+# Bulk attendance
+# ------------------------------------------------------------------
+
+AttendanceRow = Tuple[str, str, Optional[int]]  # (username, YYYY-MM-DD, grade)
+
+
+def parse_attendance_csv(text: str) -> Tuple[List[AttendanceRow], List[str]]:
+    """
+    Parse ``student,date,grade`` lines (header optional, grade may be blank).
+    Returns (rows, errors); errors name the line they come from.
+    """
+    rows, errors = [], []
+    for line_number, record in enumerate(csv.reader(io.StringIO(text)), 1):
+        if not record or not any(field.strip() for field in record):
+            continue
+        fields = [field.strip() for field in record] + [""] * 3
+        student, date_str, grade = fields[:3]
+        if line_number == 1 and student.lower() in ("student", "username"):
+            continue
+        try:
+            rows.append(_validated_row(student, date_str, grade))
+        except ValueError as e:
+            errors.append(f"line {line_number}: {e}")
+    return rows, errors
+
+
+def _validated_row(student: str, date_str: str, grade) -> AttendanceRow:
+    if not student:
+        raise ValueError("missing student")
+    try:
+        date_str = date.fromisoformat(date_str).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date {date_str!r} (expected YYYY-MM-DD)")
+    if grade in ("", None):
+        return student, date_str, None
+    try:
+        grade = int(grade)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid grade {grade!r}")
+    if grade not in GRADE_RANGE:
+        raise ValueError(f"grade {grade} is outside 1-10")
+    return student, date_str, grade
+
+
+def _month_bounds(days: Iterable[date]) -> Tuple[date, date]:
+    days = list(days)
+    first, last = min(days), max(days)
+    end = date(last.year + (last.month == 12), last.month % 12 + 1, 1)
+    return first.replace(day=1), end
+
+
+def apply_bulk_attendance(rows: List[AttendanceRow]) -> Dict:
+    """
+    Record many lessons in one transaction with a fixed number of statements:
+    resolve students, read attendance and month rollups for the touched
+    months, insert the new attendance and history rows, add the XP deltas per
+    student and store the new month counts.
+
+    All-or-nothing: unknown students or invalid rows abort the whole batch.
+    Lessons already recorded (same student and date, in the database or
+    earlier in the batch) are skipped. A month earns the consistency bonus
+    once, when its lesson count reaches CONSISTENCY_LESSONS, also for backfills.
+    """
+    errors = []
+    valid = []
+    for number, (student, date_str, grade) in enumerate(rows, 1):
+        try:
+            valid.append(_validated_row(student, date_str, grade))
+        except ValueError as e:
+            errors.append(f"row {number}: {e}")
+    result = {"applied": 0, "skipped": [], "errors": errors, "bonuses": 0}
+    if errors or not valid:
+        return result
+
     db = require_db_session()
     try:
-        sync_student_data_to_db(db, student, stats)
+        usernames = {student for student, _, _ in valid}
+        # Locked in id order, like apply_attendance's single-student lock.
+        found = db.query(Student.username, Student.id, XP.id).outerjoin(XP, XP.student_id == Student.id).filter(
+            Student.username.in_(usernames)
+        ).order_by(Student.id).with_for_update(of=Student).all()
+        ids = {username: student_id for username, student_id, _ in found}
+        missing = sorted(usernames - ids.keys())
+        if missing:
+            result["errors"] = [f"unknown student: {username}" for username in missing]
+            return result
+
+        lesson_days = [date.fromisoformat(date_str) for _, date_str, _ in valid]
+        start, end = _month_bounds(lesson_days)
+        existing = set(
+            db.query(Attendance.student_id, Attendance.date).filter(
+                Attendance.student_id.in_(ids.values()),
+                Attendance.date >= start,
+                Attendance.date < end,
+            )
+        )
+        months = {day.strftime("%Y-%m") for day in lesson_days}
+        rollups = {
+            (student_id, month): (lesson_count, bonus_awarded)
+            for student_id, month, lesson_count, bonus_awarded in db.query(
+                AttendanceMonth.student_id,
+                AttendanceMonth.month,
+                AttendanceMonth.lesson_count,
+                AttendanceMonth.bonus_awarded,
+            ).filter(AttendanceMonth.student_id.in_(ids.values()), AttendanceMonth.month.in_(months))
+        }
+        month_counts = Counter({key: count for key, (count, _) in rollups.items()})
+        bonus_months = {key for key, (_, awarded) in rollups.items() if awarded}
+
+        new_lessons = []
+        for (student, date_str, grade), day in zip(valid, lesson_days):
+            key = (ids[student], day)
+            if key in existing:
+                result["skipped"].append(f"{student} {date_str}: already recorded")
+                continue
+            existing.add(key)
+            new_lessons.append((ids[student], day, grade))
+
+        xp_delta = defaultdict(lambda: {"attendance": 0, "consistency": 0})
+        for student_id, day, _ in sorted(new_lessons, key=lambda lesson: lesson[1]):
+            month = (student_id, day.strftime("%Y-%m"))
+            month_counts[month] += 1
+            xp_delta[student_id]["attendance"] += ATTENDANCE_XP
+            if month_counts[month] >= CONSISTENCY_LESSONS and month not in bonus_months:
+                bonus_months.add(month)
+                xp_delta[student_id]["consistency"] += CONSISTENCY_BONUS_XP
+                result["bonuses"] += 1
+
+        if new_lessons:
+            # Core statements on the session's connection: executemany, no ORM objects.
+            connection = db.connection()
+            xp_table = XP.__table__
+            months_table = AttendanceMonth.__table__
+            students_without_xp = [student_id for _, student_id, xp_id in found if xp_id is None]
+            if students_without_xp:
+                connection.execute(insert(xp_table), [
+                    {"student_id": student_id, "total": 0, "pad_practice": 0, "attendance": 0, "consistency": 0}
+                    for student_id in students_without_xp
+                ])
+            connection.execute(insert(Attendance.__table__), [
+                {"student_id": student_id, "date": day, "grade": grade}
+                for student_id, day, grade in new_lessons
+            ])
+            connection.execute(insert(HistoryEvent.__table__), [
+                {"student_id": student_id, "type": "attendance", "name": LESSON_NAME, "date": day, "grade": grade}
+                for student_id, day, grade in new_lessons
+            ])
+            connection.execute(
+                update(xp_table)
+                .where(xp_table.c.student_id == bindparam("sid"))
+                .values(
+                    attendance=xp_table.c.attendance + bindparam("attendance_xp"),
+                    consistency=xp_table.c.consistency + bindparam("consistency_xp"),
+                    total=xp_table.c.total + bindparam("attendance_xp") + bindparam("consistency_xp"),
+                ),
+                [
+                    {"sid": student_id, "attendance_xp": delta["attendance"], "consistency_xp": delta["consistency"]}
+                    for student_id, delta in xp_delta.items()
+                ],
+            )
+
+            touched = {(student_id, day.strftime("%Y-%m")) for student_id, day, _ in new_lessons}
+            month_rows = [
+                {"sid": student_id, "m": month, "lesson_count": month_counts[(student_id, month)],
+                 "bonus_awarded": (student_id, month) in bonus_months}
+                for student_id, month in sorted(touched)
+            ]
+            new_months = [row for row in month_rows if (row["sid"], row["m"]) not in rollups]
+            if new_months:
+                connection.execute(insert(months_table), [
+                    {"student_id": row["sid"], "month": row["m"], "lesson_count": row["lesson_count"],
+                     "bonus_awarded": row["bonus_awarded"]}
+                    for row in new_months
+                ])
+            changed_months = [row for row in month_rows if (row["sid"], row["m"]) in rollups]
+            if changed_months:
+                connection.execute(
+                    update(months_table)
+                    .where(months_table.c.student_id == bindparam("sid"), months_table.c.month == bindparam("m"))
+                    .values(lesson_count=bindparam("lesson_count"), bonus_awarded=bindparam("bonus_awarded")),
+                    changed_months,
+                )
         db.commit()
+        result["applied"] = len(new_lessons)
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+    return result
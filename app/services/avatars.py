@@ -0,0 +1,280 @@
+"""
+Avatar upload and variant service.
+Uploads are streamed to disk with a size cap; resized variants are built in a
+worker pool and registered in the avatar manifest once they are ready.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.models import Student
+from app.services.db_operations import require_db_session, set_student_avatar
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # Pillow not installed; uploads are stored without variants
+
+logger = logging.getLogger(__name__)
+
+AVATARS_DIR = Path(__file__).resolve().parent.parent / "static" / "avatars"
+VARIANTS_DIRNAME = "variants"
+MANIFEST_FILENAME = "manifest.json"
+
+AVATAR_MAX_BYTES = int(os.environ.get("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_WORKERS = int(os.environ.get("AVATAR_WORKERS", "2"))
+AVATAR_VARIANT_SIZES = (128, 256, 512)
+ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+# Copy buffer for moving the spooled upload to its final location.
+CHUNK_SIZE = 64 * 1024
+# Allowance for multipart boundaries, part headers and the username field.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+_USERNAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,50}$")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_manifest_cache = {"key": None, "data": {}}
+
+
+class AvatarUploadError(Exception):
+    """Raised when an avatar upload is rejected."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ------------------------------------------------------------------
+# Upload streaming
+# ------------------------------------------------------------------
+
+async def _capped_stream(stream: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > limit:
+            raise AvatarUploadError(
+                f"Avatar upload exceeds {AVATAR_MAX_BYTES // 1024} KB limit",
+                status_code=413,
+            )
+        yield chunk
+
+
+def _write_upload(source, destination: Path) -> int:
+    tmp_path = destination.with_name(f".{destination.name}.part")
+    written = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > AVATAR_MAX_BYTES:
+                    raise AvatarUploadError(
+                        f"Avatar upload exceeds {AVATAR_MAX_BYTES // 1024} KB limit",
+                        status_code=413,
+                    )
+                out.write(chunk)
+        os.replace(tmp_path, destination)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return written
+
+
+def _student_exists(username: str) -> bool:
+    db = require_db_session()
+    try:
+        return db.query(Student.id).filter(Student.username == username).first() is not None
+    finally:
+        db.close()
+
+
+def _assign_avatar(username: str, filename: str) -> bool:
+    db = require_db_session()
+    try:
+        assigned = set_student_avatar(db, username, filename)
+        db.commit()
+        return assigned
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def save_avatar_upload(headers: Headers, stream: AsyncIterator[bytes]) -> str:
+    """
+    Stream a multipart avatar upload to disk and make it the student's avatar.
+
+    Expects a ``username`` field naming an existing student and an ``avatar``
+    file part. File data is spooled to a temporary file by the parser, so
+    memory stays bounded, and the request body is aborted as soon as it
+    exceeds the size cap. Unknown students are rejected with 404 before
+    anything is written. Returns the stored avatar filename.
+    """
+    content_length = headers.get("content-length")
+    limit = AVATAR_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise AvatarUploadError(
+            f"Avatar upload exceeds {AVATAR_MAX_BYTES // 1024} KB limit",
+            status_code=413,
+        )
+
+    parser = MultiPartParser(headers, _capped_stream(stream, limit), max_files=1, max_fields=2)
+    try:
+        form = await parser.parse()
+    except MultiPartException as exc:
+        raise AvatarUploadError(str(exc)) from exc
+
+    upload = form.get("avatar")
+    try:
+        username = form.get("username")
+        if not isinstance(username, str) or not _USERNAME_RE.match(username):
+            raise AvatarUploadError("A valid username is required")
+        if not isinstance(upload, UploadFile) or not upload.filename:
+            raise AvatarUploadError("An avatar file is required")
+
+        extension = Path(upload.filename).suffix.lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise AvatarUploadError(f"Unsupported avatar type: {extension or 'none'}")
+
+        if not await run_in_threadpool(_student_exists, username):
+            raise AvatarUploadError(f"Student not found: {username}", status_code=404)
+
+        filename = f"{username}_avatar{extension}"
+        AVATARS_DIR.mkdir(parents=True, exist_ok=True)
+        await run_in_threadpool(_write_upload, upload.file, AVATARS_DIR / filename)
+        await run_in_threadpool(_assign_avatar, username, filename)
+    finally:
+        await form.close()
+
+    return filename
+
+
+# ------------------------------------------------------------------
+# Variant generation (worker pool)
+# ------------------------------------------------------------------
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=AVATAR_WORKERS,
+                thread_name_prefix="avatar-variants",
+            )
+        return _executor
+
+
+def build_avatar_variants(filename: str, avatars_dir: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Resize and encode WebP variants of an avatar and register them.
+    Returns the size -> relative path map that was written to the manifest.
+    """
+    avatars_dir = avatars_dir or AVATARS_DIR
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping variants for %s", filename)
+        return {}
+
+    source = avatars_dir / filename
+    variants_dir = avatars_dir / VARIANTS_DIRNAME
+    variants_dir.mkdir(parents=True, exist_ok=True)
+
+    variants = {}
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for size in AVATAR_VARIANT_SIZES:
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            variant_name = f"{source.stem}_{size}.webp"
+            tmp_path = variants_dir / f".{variant_name}.part"
+            variant.save(tmp_path, format="WEBP", quality=85, method=4)
+            os.replace(tmp_path, variants_dir / variant_name)
+            variants[str(size)] = f"{VARIANTS_DIRNAME}/{variant_name}"
+
+    register_avatar_variants(filename, variants, avatars_dir=avatars_dir)
+    return variants
+
+
+def _log_variant_failure(filename: str, future: Future):
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("Failed to build avatar variants for %s: %s", filename, exc)
+
+
+def schedule_avatar_variants(filename: str) -> Future:
+    """Queue variant generation without blocking the caller."""
+    future = _get_executor().submit(build_avatar_variants, filename)
+    future.add_done_callback(lambda f: _log_variant_failure(filename, f))
+    return future
+
+
+# ------------------------------------------------------------------
+# Manifest
+# ------------------------------------------------------------------
+
+def _read_manifest(manifest_path: Path) -> dict:
+    if not manifest_path.exists():
+        return {}
+    try:
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Avatar manifest %s is unreadable; rebuilding it", manifest_path)
+        return {}
+
+
+def register_avatar_variants(filename: str, variants: Dict[str, str], avatars_dir: Optional[Path] = None):
+    """Record the variants of an avatar in the manifest (atomic rewrite)."""
+    manifest_path = (avatars_dir or AVATARS_DIR) / MANIFEST_FILENAME
+    with _manifest_lock:
+        manifest = _read_manifest(manifest_path)
+        manifest[filename] = {"variants": variants}
+        tmp_path = manifest_path.with_name(f".{MANIFEST_FILENAME}.part")
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+
+
+def load_avatar_manifest() -> dict:
+    """Return the avatar manifest, re-reading it only when the file changes."""
+    manifest_path = AVATARS_DIR / MANIFEST_FILENAME
+    try:
+        stat = manifest_path.stat()
+    except OSError:
+        return {}
+    key = (str(manifest_path), stat.st_mtime_ns, stat.st_size)
+    if _manifest_cache["key"] != key:
+        _manifest_cache.update(key=key, data=_read_manifest(manifest_path))
+    return _manifest_cache["data"]
+
+
+def avatar_path(filename: Optional[str], size: Optional[int] = None) -> str:
+    """
+    Path of an avatar relative to the avatars directory, preferring the
+    smallest registered variant that is at least ``size`` pixels wide.
+    """
+    filename = filename or "default.png"
+    if size is None:
+        return filename
+
+    variants = load_avatar_manifest().get(filename, {}).get("variants", {})
+    candidates = sorted(int(s) for s in variants if int(s) >= size)
+    if candidates:
+        return variants[str(candidates[0])]
+    return filename
@@ -0,0 +1,62 @@
+"""
+Injectable clock for date-dependent logic (streaks, monthly bonuses, history
+windows). Runtime code asks this module for "today" instead of calling
+``date.today()`` directly, so simulations and tests can move time.
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+
+class SystemClock:
+    def today(self) -> date:
+        return date.today()
+
+    def now(self, tz: Optional[timezone] = None) -> datetime:
+        return datetime.now(tz)
+
+
+class FixedClock:
+    """A clock that only moves when told to; ``now()`` is noon of the current day."""
+
+    def __init__(self, current: date):
+        self.current = current
+
+    def today(self) -> date:
+        return self.current
+
+    def now(self, tz: Optional[timezone] = None) -> datetime:
+        moment = datetime.combine(self.current, time(12, 0))
+        return moment.replace(tzinfo=tz) if tz is not None else moment
+
+    def advance(self, days: int = 1) -> date:
+        self.current += timedelta(days=days)
+        return self.current
+
+
+_clock = SystemClock()
+
+
+def today() -> date:
+    return _clock.today()
+
+
+def now(tz: Optional[timezone] = None) -> datetime:
+    return _clock.now(tz)
+
+
+def set_clock(clock) -> object:
+    """Install ``clock`` process-wide and return the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock):
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
@@ -1,12 +1,23 @@
 """
 Data reader service for runtime PostgreSQL reads.
+Page reads go to the read replica when one is configured (see
+database.read_session()); login reads stay on the primary.
 JSON import/export is handled by explicit maintenance scripts, not live requests.
 """
 
+from datetime import timedelta
 from typing import Dict, List, Optional, Any
 
+from sqlalchemy import Float, and_, case, cast, func, literal, null, select, union_all
+
 import app.database as database
-from app.models import User, Student, XP, Attendance, Streak, HistoryEvent
+from app.models import User, Student, XP, Attendance, AttendanceMonth, DailyPractice, Streak, HistoryEvent
+from app.services import clock
+
+# History events older than this are not loaded with the student stats; the
+# history page shows this window and gets lifetime numbers from
+# get_history_totals(). Bounding the date lets PostgreSQL skip old partitions.
+HISTORY_WINDOW_DAYS = 30
 
 def _require_db_session():
     if not database.DB_AVAILABLE or not database.SessionLocal:
@@ -14,8 +25,14 @@ def _require_db_session():
     return database.SessionLocal()
 
 
+def _require_read_session():
+    if not database.DB_AVAILABLE or not database.SessionLocal:
+        raise RuntimeError("Database is required for runtime data reads")
+    return database.read_session()
+
+
 def get_users() -> Dict[str, Any]:
-    """Get users from PostgreSQL."""
+    """Get users from PostgreSQL (the primary: a changed password works at once)."""
     db = _require_db_session()
     try:
         users_db = db.query(User).all()
@@ -32,102 +49,161 @@ def get_users() -> Dict[str, Any]:
 
 
 def get_student_stats(username: str) -> Optional[Dict[str, Any]]:
-    """Get student stats from PostgreSQL."""
-    db = _require_db_session()
+    """Get student stats from PostgreSQL, with the last HISTORY_WINDOW_DAYS of history events."""
+    db = _require_read_session()
     try:
-        student = db.query(Student).filter(Student.username == username).first()
-        if not student:
-            return None
-
-        xp = db.query(XP).filter(XP.student_id == student.id).first()
-        streak = db.query(Streak).filter(Streak.student_id == student.id).first()
-        attendance_records = db.query(Attendance).filter(Attendance.student_id == student.id).all()
-        history_events = db.query(HistoryEvent).filter(HistoryEvent.student_id == student.id).all()
-
-        attendance_dates = [str(record.date) for record in attendance_records]
-        current_month = None
-        current_month_count = 0
-        if attendance_records:
-            latest_month = max(record.date for record in attendance_records).strftime("%Y-%m")
-            current_month = latest_month
-            current_month_count = sum(
-                1 for record in attendance_records
-                if record.date.strftime("%Y-%m") == latest_month
-            )
-
-        stats = {
-            "xp": {
-                "total": xp.total if xp else 0,
-                "categories": {
-                    "pad_practice": xp.pad_practice if xp else 0,
-                    "attendance": xp.attendance if xp else 0,
-                    "consistency": xp.consistency if xp else 0
-                }
-            },
-            "level": {
-                "current": 1,
-                "progress_xp": 0,
-                "xp_to_next": 10
-            },
-            "streak": {
-                "current": streak.current if streak else 0,
-                "longest": streak.longest if streak else 0,
-                "last_practice_date": str(streak.last_practice_date) if streak and streak.last_practice_date else None
-            },
-            "attendance": {
-                "dates": attendance_dates,
-                "lifetime_lessons": len(attendance_dates),
-                "current_month": {
-                    "month": current_month,
-                    "count": current_month_count,
-                    "bonus_awarded": False
-                }
-            },
-            "profile": {
-                "name": student.display_name or username,
-                "avatar": student.avatar or ""
-            },
-            "history": {
-                "events": [
-                    {
-                        "type": event.type,
-                        "name": event.name or "",
-                        "date": str(event.date),
-                        "grade": event.grade
-                    }
-                    for event in history_events
-                ]
-            },
-            "medals": []
-        }
+        return read_student_stats(db, username)
+    finally:
+        db.close()
+
 
-        from app.services.level_utils import recalculate_levels
-        recalculate_levels(stats)
-        return stats
+def read_student_stats(db, username: str) -> Optional[Dict[str, Any]]:
+    """get_student_stats() on the caller's session, e.g. a write transaction holding the student lock."""
+    # The student's latest month rollup rides along on the student lookup.
+    latest = (
+        select(func.max(AttendanceMonth.month))
+        .where(AttendanceMonth.student_id == Student.id)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    row = (
+        db.query(Student, AttendanceMonth)
+        .outerjoin(
+            AttendanceMonth,
+            and_(AttendanceMonth.student_id == Student.id, AttendanceMonth.month == latest),
+        )
+        .filter(Student.username == username)
+        .first()
+    )
+    if not row:
+        return None
+    student, latest_month = row
+
+    xp = db.query(XP).filter(XP.student_id == student.id).first()
+    streak = db.query(Streak).filter(Streak.student_id == student.id).first()
+    attendance_records = db.query(Attendance).filter(Attendance.student_id == student.id).all()
+    history_events = db.query(HistoryEvent).filter(
+        HistoryEvent.student_id == student.id,
+        HistoryEvent.date >= clock.today() - timedelta(days=HISTORY_WINDOW_DAYS),
+    ).order_by(HistoryEvent.date, HistoryEvent.id).all()
+
+    attendance_dates = [str(record.date) for record in attendance_records]
+
+    stats = {
+        "xp": {
+            "total": xp.total if xp else 0,
+            "categories": {
+                "pad_practice": xp.pad_practice if xp else 0,
+                "attendance": xp.attendance if xp else 0,
+                "consistency": xp.consistency if xp else 0
+            }
+        },
+        "level": {
+            "current": 1,
+            "progress_xp": 0,
+            "xp_to_next": 10
+        },
+        "streak": {
+            "current": streak.current if streak else 0,
+            "longest": streak.longest if streak else 0,
+            "last_practice_date": str(streak.last_practice_date) if streak and streak.last_practice_date else None
+        },
+        "attendance": {
+            "dates": attendance_dates,
+            "lifetime_lessons": len(attendance_dates),
+            "current_month": {
+                "month": latest_month.month if latest_month else None,
+                "count": latest_month.lesson_count if latest_month else 0,
+                "bonus_awarded": latest_month.bonus_awarded if latest_month else False
+            }
+        },
+        "profile": {
+            "name": student.display_name or username,
+            "avatar": student.avatar or ""
+        },
+        "history": {
+            "events": [
+                {
+                    "type": event.type,
+                    "name": event.name or "",
+                    "date": str(event.date),
+                    "grade": event.grade
+                }
+                for event in history_events
+            ]
+        },
+        "medals": []
+    }
+
+    from app.services.level_utils import recalculate_levels
+    recalculate_levels(stats)
+    return stats
+
+
+def get_history_totals(username: str) -> Dict[str, Any]:
+    """
+    Lifetime event counts per type and the average lesson grade (one query).
+    Pad events compacted into daily_practice are counted with the rest.
+    """
+    events = (
+        select(
+            HistoryEvent.type,
+            func.count(HistoryEvent.id),
+            func.avg(case((HistoryEvent.type == "attendance", HistoryEvent.grade))),
+        )
+        .join(Student, Student.id == HistoryEvent.student_id)
+        .where(Student.username == username)
+        .group_by(HistoryEvent.type)
+    )
+    compacted = (
+        select(literal("pad"), func.sum(DailyPractice.count), cast(null(), Float))
+        .join(Student, Student.id == DailyPractice.student_id)
+        .where(Student.username == username)
+    )
+    db = _require_read_session()
+    try:
+        rows = db.execute(union_all(events, compacted)).all()
     finally:
         db.close()
 
+    counts = {}
+    average_grade = None
+    for event_type, count, average in rows:
+        counts[event_type] = counts.get(event_type, 0) + (count or 0)
+        if event_type == "attendance":
+            average_grade = average
+    return {
+        "pad": counts.get("pad", 0),
+        "attendance": counts.get("attendance", 0),
+        "average_grade": average_grade,
+    }
+
 
 def get_all_students() -> List[Dict[str, Any]]:
-    """Get all students with their stats from PostgreSQL."""
-    students = []
-    db = _require_db_session()
+    """Get all students with their XP and level from PostgreSQL (one query)."""
+    from app.services.level_utils import recalculate_levels
+
+    db = _require_read_session()
     try:
-        students_db = db.query(Student).all()
-        usernames = [student.username for student in students_db]
+        rows = (
+            db.query(Student.username, Student.display_name, Student.avatar, XP.total)
+            .outerjoin(XP, XP.student_id == Student.id)
+            .all()
+        )
     finally:
         db.close()
 
-    for username in usernames:
-        stats = get_student_stats(username)
-        if stats:
-            students.append({
-                "username": username,
-                "xp": stats.get("xp", {}).get("total", 0),
-                "level": stats.get("level", {}).get("current", 1),
-                "display_name": stats.get("profile", {}).get("name", username),
-                "avatar": stats.get("profile", {}).get("avatar", "")
-            })
+    students = []
+    for username, display_name, avatar, total in rows:
+        level_stats = {"xp": {"total": total or 0}, "level": {}}
+        recalculate_levels(level_stats)
+        students.append({
+            "username": username,
+            "xp": total or 0,
+            "level": level_stats["level"]["current"],
+            "display_name": display_name or username,
+            "avatar": avatar or ""
+        })
 
     return students
 
@@ -5,8 +5,9 @@ JSON import/export is handled by explicit maintenance tools only.
 
 from sqlalchemy.orm import Session
 import app.database as database
-from app.models import Student, XP, Attendance, Streak, HistoryEvent
-from datetime import datetime, date
+from app.services import clock
+from app.models import Student, XP, Attendance, AttendanceMonth, Streak, HistoryEvent
+from datetime import date
 from typing import Optional
 
 
@@ -33,7 +34,7 @@ def create_or_update_student(db: Session, username: str, display_name: str = Non
             username=username,
             display_name=display_name or username,
             avatar=avatar or "",
-            created_at=datetime.now()
+            created_at=clock.now()
         )
         db.add(student)
         db.flush()
@@ -62,6 +63,14 @@ def delete_student(db: Session, username: str) -> bool:
     return True
 
 
+def set_student_avatar(db: Session, username: str, avatar: str) -> bool:
+    """Point a student's profile at an avatar file; False if there is no such student."""
+    updated = db.query(Student).filter(Student.username == username).update(
+        {"avatar": avatar}, synchronize_session=False
+    )
+    return updated > 0
+
+
 def update_student_xp(db: Session, student_id: int, total: int, pad_practice: int, attendance: int, consistency: int):
     """Update or create XP record for a student."""
     xp = db.query(XP).filter(XP.student_id == student_id).first()
@@ -111,6 +120,46 @@ def add_attendance_record(db: Session, student_id: int, date_str: str, grade: Op
     db.add(attendance)
 
 
+def lock_student(db: Session, username: str) -> Optional[int]:
+    """
+    Row-lock a student until commit (PostgreSQL) and return its id, or None.
+    Stat updates take this lock before reading, so concurrent updates of
+    one student queue up instead of overwriting each other's XP.
+    """
+    return (
+        db.query(Student.id)
+        .filter(Student.username == username)
+        .with_for_update()
+        .scalar()
+    )
+
+
+def get_attendance_month(db: Session, username: str, month: str) -> Optional[AttendanceMonth]:
+    """A student's lesson rollup for ``month`` (YYYY-MM); callers hold the student lock (lock_student)."""
+    return (
+        db.query(AttendanceMonth)
+        .join(Student, Student.id == AttendanceMonth.student_id)
+        .filter(Student.username == username, AttendanceMonth.month == month)
+        .first()
+    )
+
+
+def record_attendance_month(
+    db: Session,
+    student_id: int,
+    month: str,
+    lesson_count: int,
+    bonus_awarded: bool,
+    rollup: Optional[AttendanceMonth] = None,
+):
+    """Store a month's lesson count and bonus flag, updating ``rollup`` if it was already loaded."""
+    if rollup is None:
+        rollup = AttendanceMonth(student_id=student_id, month=month)
+        db.add(rollup)
+    rollup.lesson_count = lesson_count
+    rollup.bonus_awarded = bonus_awarded
+
+
 def add_history_event(db: Session, student_id: int, event_type: str, name: str, date_str: str, grade: Optional[float] = None):
     """Add a history event for a student."""
     event_date = date.fromisoformat(date_str)
@@ -124,8 +173,8 @@ def add_history_event(db: Session, student_id: int, event_type: str, name: str,
     db.add(history_event)
 
 
-def sync_student_data_to_db(db: Session, username: str, stats: dict):
-    """Persist complete student stats to PostgreSQL."""
+def sync_student_data_to_db(db: Session, username: str, stats: dict) -> Student:
+    """Persist complete student stats to PostgreSQL; returns the student row."""
     if not database.DB_AVAILABLE or db is None:
         raise RuntimeError("Database is required for runtime student writes")
 
@@ -161,28 +210,30 @@ def sync_student_data_to_db(db: Session, username: str, stats: dict):
         last_practice_date=streak_data.get("last_practice_date")
     )
 
-    # Sync attendance records
+    # Sync attendance records; existing rows are fetched once, not per date
+    existing_dates = {
+        row.date for row in db.query(Attendance.date).filter(Attendance.student_id == student.id)
+    }
     attendance_data = stats.get("attendance", {})
     for date_str in attendance_data.get("dates", []):
-        # Check if already exists to avoid duplicates
-        existing = db.query(Attendance).filter(
-            Attendance.student_id == student.id,
-            Attendance.date == date.fromisoformat(date_str)
-        ).first()
-        if not existing:
+        if date.fromisoformat(date_str) not in existing_dates:
             add_attendance_record(db, student.id, date_str)
 
-    # Sync history events
+    # Sync history events, keyed like the old per-event duplicate check.
+    # Only dates the stats cover can collide, so older partitions are skipped.
     history_events = stats.get("history", {}).get("events", [])
-    for event in history_events:
-        # Check if already exists to avoid duplicates
-        existing = db.query(HistoryEvent).filter(
+    if not history_events:
+        return student
+    existing_events = {
+        (row.date, row.type, row.name)
+        for row in db.query(HistoryEvent.date, HistoryEvent.type, HistoryEvent.name).filter(
             HistoryEvent.student_id == student.id,
-            HistoryEvent.date == date.fromisoformat(event["date"]),
-            HistoryEvent.type == event.get("type", "pad"),
-            HistoryEvent.name == event.get("name", "")
-        ).first()
-        if not existing:
+            HistoryEvent.date >= min(date.fromisoformat(event["date"]) for event in history_events),
+        )
+    }
+    for event in history_events:
+        key = (date.fromisoformat(event["date"]), event.get("type", "pad"), event.get("name", ""))
+        if key not in existing_events:
             add_history_event(
                 db=db,
                 student_id=student.id,
@@ -191,3 +242,5 @@ def sync_student_data_to_db(db: Session, username: str, stats: dict):
                 date_str=event["date"],
                 grade=event.get("grade")
             )
+
+    return student
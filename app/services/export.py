@@ -0,0 +1,190 @@
+"""
+Streaming export of every student with XP, streak, attendance and history.
+Students are read in id order with ``yield_per`` (a server-side cursor on
+PostgreSQL); child rows are fetched per batch of students, so memory stays
+flat however large the database is. Output is NDJSON (one record per
+student, shaped like the legacy stats.json) or CSV, optionally gzipped.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from typing import Iterator, List
+
+from sqlalchemy import select
+
+import app.database as database
+from app.models import Attendance, DailyPractice, HistoryEvent, Streak, Student, XP
+
+EXPORT_BATCH_SIZE = 500
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+CSV_COLUMNS = (
+    "record", "username", "display_name", "avatar", "created_at",
+    "xp_total", "xp_pad_practice", "xp_attendance", "xp_consistency",
+    "streak_current", "streak_longest", "last_practice_date",
+    "date", "type", "name", "grade", "count", "xp",
+)
+
+# Flush to the client in chunks of about this many bytes.
+_CHUNK_SIZE = 64 * 1024
+
+
+def _require_db_session():
+    if not database.DB_AVAILABLE or not database.SessionLocal:
+        raise RuntimeError("Database is required for exports")
+    return database.SessionLocal()
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _records_for_batch(db, students: List) -> Iterator[dict]:
+    ids = [student.id for student in students]
+    xp = {row.student_id: row for row in db.query(XP).filter(XP.student_id.in_(ids))}
+    streaks = {row.student_id: row for row in db.query(Streak).filter(Streak.student_id.in_(ids))}
+    attendance = defaultdict(list)
+    for row in (
+        db.query(Attendance.student_id, Attendance.date, Attendance.grade)
+        .filter(Attendance.student_id.in_(ids))
+        .order_by(Attendance.student_id, Attendance.date)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    ):
+        attendance[row.student_id].append({"date": row.date.isoformat(), "grade": row.grade})
+    history = defaultdict(list)
+    for row in (
+        db.query(HistoryEvent.student_id, HistoryEvent.type, HistoryEvent.name, HistoryEvent.date, HistoryEvent.grade)
+        .filter(HistoryEvent.student_id.in_(ids))
+        .order_by(HistoryEvent.student_id, HistoryEvent.date, HistoryEvent.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    ):
+        history[row.student_id].append(
+            {"type": row.type, "name": row.name or "", "date": row.date.isoformat(), "grade": row.grade}
+        )
+    # Old pad events compacted into per-day rollups (services/history_compaction.py).
+    practice = defaultdict(list)
+    for row in (
+        db.query(DailyPractice.student_id, DailyPractice.date, DailyPractice.exercise, DailyPractice.count,
+                 DailyPractice.xp)
+        .filter(DailyPractice.student_id.in_(ids))
+        .order_by(DailyPractice.student_id, DailyPractice.date, DailyPractice.exercise)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    ):
+        practice[row.student_id].append(
+            {"date": row.date.isoformat(), "exercise": row.exercise, "count": row.count, "xp": row.xp}
+        )
+
+    for student in students:
+        student_xp = xp.get(student.id)
+        streak = streaks.get(student.id)
+        yield {
+            "username": student.username,
+            "created_at": _iso(student.created_at),
+            "profile": {"name": student.display_name or student.username, "avatar": student.avatar or ""},
+            "xp": {
+                "total": student_xp.total if student_xp else 0,
+                "categories": {
+                    "pad_practice": student_xp.pad_practice if student_xp else 0,
+                    "attendance": student_xp.attendance if student_xp else 0,
+                    "consistency": student_xp.consistency if student_xp else 0,
+                },
+            },
+            "streak": {
+                "current": streak.current if streak else 0,
+                "longest": streak.longest if streak else 0,
+                "last_practice_date": _iso(streak.last_practice_date) if streak else None,
+            },
+            "attendance": {"dates": attendance.pop(student.id, [])},
+            "history": {"events": history.pop(student.id, []), "daily_practice": practice.pop(student.id, [])},
+        }
+
+
+def iter_student_records(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """Yield one record per student; six queries per ``batch_size`` students."""
+    db = _require_db_session()
+    try:
+        batch = []
+        # Plain rows rather than ORM objects: nothing accumulates in the session.
+        rows = db.execute(
+            select(Student.id, Student.username, Student.display_name, Student.avatar, Student.created_at)
+            .order_by(Student.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for student in rows:
+            batch.append(student)
+            if len(batch) == batch_size:
+                yield from _records_for_batch(db, batch)
+                batch = []
+        if batch:
+            yield from _records_for_batch(db, batch)
+    finally:
+        db.close()
+
+
+def _csv_rows(record: dict) -> Iterator[tuple]:
+    xp, streak = record["xp"], record["streak"]
+    categories = xp["categories"]
+    yield (
+        "student", record["username"], record["profile"]["name"], record["profile"]["avatar"], record["created_at"],
+        xp["total"], categories["pad_practice"], categories["attendance"], categories["consistency"],
+        streak["current"], streak["longest"], streak["last_practice_date"],
+        None, None, None, None, None, None,
+    )
+    # record and username, then the student columns left empty, then 6 detail fields.
+    blank = (None,) * (len(CSV_COLUMNS) - 8)
+    for entry in record["attendance"]["dates"]:
+        yield ("attendance", record["username"], *blank, entry["date"], None, None, entry["grade"], None, None)
+    for event in record["history"]["events"]:
+        yield ("history", record["username"], *blank, event["date"], event["type"], event["name"], event["grade"],
+               None, None)
+    for day in record["history"]["daily_practice"]:
+        yield ("practice", record["username"], *blank, day["date"], "pad", day["exercise"], None,
+               day["count"], day["xp"])
+
+
+def _text_lines(fmt: str, records: Iterator[dict]) -> Iterator[str]:
+    if fmt == "ndjson":
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        writer.writerows(_csv_rows(record))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_chunks(fmt: str = "ndjson", compress: bool = False, records: Iterator[dict] = None) -> Iterator[bytes]:
+    """
+    Encoded export as byte chunks of roughly 64 KiB, gzip-compressed when
+    ``compress`` is set. Suitable for StreamingResponse or writing to a file.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    records = records if records is not None else iter_student_records()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31: gzip container
+
+    pending, size = [], 0
+    for text in _text_lines(fmt, records):
+        data = text.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= _CHUNK_SIZE:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    tail = b"".join(pending)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
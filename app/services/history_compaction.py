@@ -0,0 +1,112 @@
+"""
+Compaction of old pad history into per-day practice rollups.
+Pad events older than HISTORY_COMPACT_AFTER_DAYS only matter as counts and
+XP. They are folded into daily_practice (one row per student, day and
+exercise) and deleted from history_events, one batch of students per
+transaction. Lifetime totals and exports read both tables.
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from app.models import DailyPractice, HistoryEvent, Student
+from app.services import clock
+from app.services.data_reader import HISTORY_WINDOW_DAYS
+from app.services.db_operations import require_db_session
+from app.services.practice import exercise_xp
+
+HISTORY_COMPACT_AFTER_DAYS = int(os.environ.get("HISTORY_COMPACT_AFTER_DAYS", "180"))
+COMPACT_BATCH_SIZE = 200
+
+
+def compaction_cutoff(after_days: int = HISTORY_COMPACT_AFTER_DAYS) -> date:
+    """Pad events dated before this are compacted."""
+    if after_days < HISTORY_WINDOW_DAYS:
+        raise ValueError(
+            f"the history page lists the last {HISTORY_WINDOW_DAYS} days event by event; "
+            f"cannot compact events after {after_days} days"
+        )
+    return clock.today() - timedelta(days=after_days)
+
+
+def _compact_students(db, student_ids: List[int], before: date) -> int:
+    history = HistoryEvent.__table__
+    practice = DailyPractice.__table__
+    old_pad = (history.c.type == "pad", history.c.date < before, history.c.student_id.in_(student_ids))
+    exercise = func.coalesce(history.c.name, "")
+
+    groups = db.execute(
+        select(history.c.student_id, history.c.date, exercise, func.count())
+        .where(*old_pad)
+        .group_by(history.c.student_id, history.c.date, exercise)
+    ).all()
+    if not groups:
+        return 0
+
+    # Days compacted by an earlier run (e.g. before a backfill) are added to.
+    existing = set(db.execute(
+        select(practice.c.student_id, practice.c.date, practice.c.exercise)
+        .where(practice.c.student_id.in_(student_ids), practice.c.date < before)
+    ).all())
+    rows = [
+        {"sid": student_id, "day": day, "name": name, "n": count, "points": exercise_xp(name) * count}
+        for student_id, day, name, count in groups
+    ]
+    new_rows = [row for row in rows if (row["sid"], row["day"], row["name"]) not in existing]
+    if new_rows:
+        db.execute(insert(practice), [
+            {"student_id": row["sid"], "date": row["day"], "exercise": row["name"], "count": row["n"], "xp": row["points"]}
+            for row in new_rows
+        ])
+    added_rows = [row for row in rows if (row["sid"], row["day"], row["name"]) in existing]
+    if added_rows:
+        db.execute(
+            update(practice)
+            .where(
+                practice.c.student_id == bindparam("sid"),
+                practice.c.date == bindparam("day"),
+                practice.c.exercise == bindparam("name"),
+            )
+            .values(count=practice.c.count + bindparam("n"), xp=practice.c.xp + bindparam("points")),
+            added_rows,
+        )
+
+    compacted = sum(row["n"] for row in rows)
+    deleted = db.execute(delete(history).where(*old_pad)).rowcount
+    if deleted != compacted:
+        raise RuntimeError(f"pad history changed during compaction ({compacted} counted, {deleted} deleted)")
+    return compacted
+
+
+def compact_pad_history(before: Optional[date] = None, batch_size: int = COMPACT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Fold pad events dated before ``before`` (default: compaction_cutoff())
+    into daily_practice and delete them. Each batch of ``batch_size``
+    students commits on its own, so an interrupted run loses nothing and
+    the next run carries on. Returns {"students": ..., "events": ...}.
+    """
+    before = before or compaction_cutoff()
+    result = {"students": 0, "events": 0}
+    after_id = 0
+    while True:
+        db = require_db_session()
+        try:
+            student_ids = db.scalars(
+                select(Student.id).where(Student.id > after_id).order_by(Student.id).limit(batch_size)
+            ).all()
+            if not student_ids:
+                break
+            compacted = _compact_students(db, student_ids, before)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        after_id = student_ids[-1]
+        result["students"] += len(student_ids)
+        result["events"] += compacted
+    return result
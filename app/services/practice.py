@@ -0,0 +1,128 @@
+"""
+Daily pad practice: streak bookkeeping and exercise completion.
+Dates come from app.services.clock so long-horizon behavior can be simulated.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from app.services import clock
+from app.services.data_reader import read_student_stats
+from app.services.db_operations import lock_student, require_db_session, sync_student_data_to_db
+from app.services.exercises import DAILY_EXERCISES
+from app.services.level_utils import recalculate_levels
+
+DEFAULT_EXERCISE_XP = 5
+
+
+def update_streak_on_practice(stats: dict):
+    """
+    Called when a student completes a practice.
+    Updates current streak, longest streak, and last_practice_date.
+    """
+    today = clock.today()
+    last_date_str = stats["streak"].get("last_practice_date")
+
+    if last_date_str:
+        last_date = date.fromisoformat(last_date_str)
+        delta = (today - last_date).days
+
+        if delta == 0:
+            # Already practiced today
+            return
+
+        elif delta == 1:
+            stats["streak"]["current"] += 1
+        else:
+            stats["streak"]["current"] = 1
+    else:
+        # First practice ever
+        stats["streak"]["current"] = 1
+
+    if stats["streak"]["current"] > stats["streak"]["longest"]:
+        stats["streak"]["longest"] = stats["streak"]["current"]
+
+    stats["streak"]["last_practice_date"] = today.isoformat()
+
+
+def validate_streak(stats: dict) -> bool:
+    """
+    Ensures the current streak is valid.
+    Resets it to 0 if at least one day was missed.
+    Returns True if the stats were modified.
+    """
+    last_date = stats["streak"].get("last_practice_date")
+
+    if not last_date:
+        return False
+
+    last = date.fromisoformat(last_date)
+    today = clock.today()
+
+    if today - last > timedelta(days=1):
+        stats["streak"]["current"] = 0
+        return True
+
+    return False
+
+
+def exercise_xp(exercise_name: str) -> int:
+    """XP configured for an exercise id, or the fallback for unknown ids."""
+    for exercises in DAILY_EXERCISES.values():
+        for ex in exercises:
+            if ex["id"] == exercise_name:
+                return ex.get("xp", DEFAULT_EXERCISE_XP)
+    return DEFAULT_EXERCISE_XP
+
+
+def complete_pad_exercise(student: str, exercise_name: str) -> Optional[dict]:
+    """
+    Award XP for a completed exercise, update the streak, record the history
+    event and persist. Returns the updated stats, or None for unknown students.
+    """
+    db = require_db_session()
+    try:
+        # Read and write under the student lock (see apply_attendance).
+        if lock_student(db, student) is None:
+            return None
+        stats = read_student_stats(db, student)
+        _apply_pad_exercise(stats, exercise_name)
+        sync_student_data_to_db(db, student, stats)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return stats
+
+
+def _apply_pad_exercise(stats: dict, exercise_name: str):
+
+    # --------------------------------------------------
+    # APPLY XP
+    # --------------------------------------------------
+    stats.setdefault("xp", {})
+    stats["xp"].setdefault("categories", {})
+    stats["xp"]["categories"].setdefault("pad_practice", 0)
+
+    stats["xp"]["categories"]["pad_practice"] += exercise_xp(exercise_name)
+    stats["xp"]["total"] = sum(stats["xp"]["categories"].values())
+
+    # ✅ UPDATE LEVEL STATE (CRITICAL)
+    recalculate_levels(stats)
+
+    # --------------------------------------------------
+    # STREAK + HISTORY
+    # --------------------------------------------------
+    update_streak_on_practice(stats)
+
+    history = stats.setdefault("history", {})
+    events = history.setdefault("events", [])
+
+    events.append({
+        "type": "pad",
+        "name": exercise_name,
+        "date": clock.today().isoformat(),
+    })
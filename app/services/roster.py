@@ -0,0 +1,133 @@
+"""
+Bulk student onboarding from a CSV roster (name, username, avatar, password).
+Passwords are hashed in parallel before any connection is taken; users,
+students, XP and streak rows are then written with one executemany per table.
+"""
+
+import csv
+import io
+from typing import Dict, List, NamedTuple, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.auth import hash_passwords
+from app.models import Streak, Student, User, XP
+from app.services import clock
+from app.services.db_operations import require_db_session
+
+HEADER = ("name", "username", "avatar", "password")
+
+
+class RosterRow(NamedTuple):
+    name: str
+    username: str
+    avatar: str
+    password: str
+
+
+def parse_roster_csv(text: str) -> Tuple[List[RosterRow], List[str]]:
+    """
+    Parse ``name,username,avatar,password`` lines (header optional, avatar
+    may be blank). Returns (rows, errors); errors name the line they come from.
+    """
+    rows, errors = [], []
+    for line_number, record in enumerate(csv.reader(io.StringIO(text)), 1):
+        if not record or not any(field.strip() for field in record):
+            continue
+        fields = [field.strip() for field in record] + [""] * 4
+        if line_number == 1 and tuple(field.lower() for field in fields[:4]) == HEADER:
+            continue
+        try:
+            rows.append(_validated_row(*fields[:4]))
+        except ValueError as e:
+            errors.append(f"line {line_number}: {e}")
+    return rows, errors
+
+
+def _validated_row(name: str, username: str, avatar: str, password: str) -> RosterRow:
+    if not username:
+        raise ValueError("missing username")
+    if len(username) > 50 or any(char.isspace() for char in username):
+        raise ValueError(f"invalid username {username!r} (no spaces, at most 50 characters)")
+    if len(name) > 100:
+        raise ValueError(f"{username}: name is longer than 100 characters")
+    if len(avatar) > 255:
+        raise ValueError(f"{username}: avatar is longer than 255 characters")
+    if not password:
+        raise ValueError(f"{username}: missing password")
+    return RosterRow(name or username, username, avatar, password)
+
+
+def import_roster(rows: List[RosterRow]) -> Dict:
+    """
+    Create a student account for every row whose username is new.
+
+    Rows with a username that already exists, or that repeats an earlier
+    row, are reported in ``errors`` and left out; the rest are created with
+    ``force_change`` set so students pick their own password on first login.
+    Returns {"created": [usernames], "errors": [messages]}.
+    """
+    result = {"created": [], "errors": []}
+    usernames = {row.username for row in rows}
+    if not usernames:
+        return result
+
+    db = require_db_session()
+    try:
+        taken = set(db.scalars(select(User.username).where(User.username.in_(usernames))))
+        taken.update(db.scalars(select(Student.username).where(Student.username.in_(usernames))))
+    finally:
+        db.close()
+
+    new_rows, seen = [], set()
+    for row in rows:
+        if row.username in taken:
+            result["errors"].append(f"{row.username}: username already exists")
+        elif row.username in seen:
+            result["errors"].append(f"{row.username}: listed more than once")
+        else:
+            seen.add(row.username)
+            new_rows.append(row)
+    if not new_rows:
+        return result
+
+    # Seconds of CPU for a large roster; done without holding a connection.
+    hashes = hash_passwords(row.password for row in new_rows)
+
+    db = require_db_session()
+    try:
+        connection = db.connection()
+        connection.execute(insert(User.__table__), [
+            {"username": row.username, "password": hashed, "role": "student", "force_change": True}
+            for row, hashed in zip(new_rows, hashes)
+        ])
+        created_at = clock.now()
+        students = Student.__table__
+        # Ids only feed the XP and streak rows, so their order does not matter.
+        student_ids = connection.execute(insert(students).returning(students.c.id), [
+            {"username": row.username, "display_name": row.name, "avatar": row.avatar, "created_at": created_at}
+            for row in new_rows
+        ]).scalars().all()
+        connection.execute(insert(XP.__table__), [
+            {"student_id": student_id, "total": 0, "pad_practice": 0, "attendance": 0, "consistency": 0}
+            for student_id in student_ids
+        ])
+        connection.execute(insert(Streak.__table__), [
+            {"student_id": student_id, "current": 0, "longest": 0, "last_practice_date": None}
+            for student_id in student_ids
+        ])
+        db.commit()
+    except IntegrityError:
+        # Someone created one of these usernames while passwords were hashing.
+        db.rollback()
+        result["errors"].append("a username was taken during the import; nothing was created, please retry")
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    result["created"] = [row.username for row in new_rows]
+    return result
@@ -0,0 +1,185 @@
+"""
+Slow-query log.
+Cursor hooks time every statement on the engine; statements slower than
+SLOW_QUERY_MS are handed to a background thread, which captures the plan
+with EXPLAIN (never ANALYZE, so the statement is not run again) and writes
+one JSON line per query to a rotating file (SLOW_QUERY_LOG). Bound
+parameters are redacted to their types; the route template of the request
+that ran the query is recorded.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from app.query_stats import current_route
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the hooks entirely.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+# Empty: entries go to this module's logger (stderr / journald) instead of a file.
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", "5"))
+# The same statement is explained at most once per this many seconds.
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_QUEUE_SIZE = 100
+
+
+def redact_parameters(parameters):
+    """Replace bound values with their type names, keeping the shape."""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the first row shows the shape.
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return None if parameters is None else f"<{type(parameters).__name__}>"
+
+
+def _explain_sql(dialect_name: str, statement: str) -> Optional[str]:
+    if not statement.lstrip()[:6].upper().startswith(EXPLAINABLE):
+        return None
+    if dialect_name == "postgresql":
+        return f"EXPLAIN (ANALYZE off, VERBOSE off) {statement}"
+    if dialect_name == "sqlite":
+        return f"EXPLAIN QUERY PLAN {statement}"
+    return None
+
+
+def _file_logger(path: str) -> logging.Logger:
+    """A dedicated non-propagating logger writing raw lines to ``path``."""
+    file_logger = logging.getLogger(f"{__name__}.file.{os.path.abspath(path)}")
+    if not file_logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        file_logger.addHandler(handler)
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+    return file_logger
+
+
+class SlowQueryLog:
+    """Queue of slow statements and the thread that explains and writes them."""
+
+    def __init__(self, engine, threshold_ms: float = SLOW_QUERY_MS, path: str = SLOW_QUERY_LOG):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.output = _file_logger(path) if path else logger
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._explained: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    # Hooks ------------------------------------------------------------
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if elapsed < self.threshold or conn.info.get("slow_query_explaining"):
+            return
+        self.record(statement, parameters, elapsed, executemany)
+
+    def on_error(self, context):
+        connection = context.connection
+        if connection is not None and connection.info.get("slow_query_started"):
+            connection.info["slow_query_started"].pop()
+
+    # Queue -------------------------------------------------------------
+
+    def record(self, statement, parameters, elapsed, executemany=False):
+        """Queue a slow statement; never blocks the request."""
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed * 1000, 1),
+            "route": current_route(),
+            "statement": " ".join(statement.split()),
+            "parameters": redact_parameters(parameters),
+            # Real values are only used for EXPLAIN and never written out.
+            "_bind": (parameters[0] if parameters else None) if executemany else parameters,
+            "_raw": statement,
+        }
+        self.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: float = 5):
+        """Wait until queued entries are written (tests, shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                self._write(entry)
+            except Exception:
+                logger.exception("Slow query log entry failed")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, entry: Dict):
+        bind, raw = entry.pop("_bind"), entry.pop("_raw")
+        plan = self._explain(raw, bind)
+        if plan is not None:
+            entry["plan"] = plan
+        self.output.warning(json.dumps(entry, default=str))
+
+    def _explain(self, statement: str, parameters):
+        sql = _explain_sql(self.engine.dialect.name, statement)
+        if sql is None:
+            return None
+        now = time.monotonic()
+        if now - self._explained.get(statement, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return "(explained recently)"
+        self._explained[statement] = now
+        try:
+            with self.engine.connect() as connection:
+                connection.info["slow_query_explaining"] = True
+                try:
+                    rows = connection.exec_driver_sql(sql, parameters or ()).fetchall()
+                finally:
+                    connection.info.pop("slow_query_explaining", None)
+                    connection.rollback()
+        except Exception as e:
+            return f"(EXPLAIN failed: {type(e).__name__})"
+        return [" ".join(str(column) for column in row) for row in rows]
+
+
+def instrument_slow_queries(engine, threshold_ms: float = SLOW_QUERY_MS, path: str = SLOW_QUERY_LOG):
+    """Attach slow-query hooks to ``engine``; returns the log, or None when disabled."""
+    if threshold_ms <= 0:
+        return None
+    slow_log = SlowQueryLog(engine, threshold_ms, path)
+    event.listen(engine, "before_cursor_execute", slow_log.before_execute)
+    event.listen(engine, "after_cursor_execute", slow_log.after_execute)
+    event.listen(engine, "handle_error", slow_log.on_error)
+    return slow_log
@@ -0,0 +1,229 @@
+"""
+Fingerprinted static assets.
+Templates link to content-hashed URLs through ``static_url`` so browsers can
+cache them forever; precompressed ``.br``/``.gz`` siblings produced by
+``app.scripts.build_static_assets`` are served when the client accepts them.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.compression import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # .br variants are skipped; gzip is always available
+
+STATIC_DIR = Path(__file__).parent / "static"
+STATIC_URL_PREFIX = "/static"
+
+FINGERPRINT_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Preferred first; the suffix is appended to the original filename.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+
+_FINGERPRINT_RE = re.compile(
+    r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<suffix>\.[^./]+)?$" % FINGERPRINT_LENGTH
+)
+
+
+def fingerprint_path(path: str, digest: str) -> str:
+    """``images/banner.png`` -> ``images/banner.<digest>.png``"""
+    head, _, name = path.rpartition("/")
+    stem, dot, suffix = name.rpartition(".")
+    if not dot or not stem:
+        fingerprinted = f"{name}.{digest}"
+    else:
+        fingerprinted = f"{stem}.{digest}.{suffix}"
+    return f"{head}/{fingerprinted}" if head else fingerprinted
+
+
+def split_fingerprint(path: str) -> Tuple[str, Optional[str]]:
+    """Inverse of ``fingerprint_path``; returns (original_path, digest or None)."""
+    head, _, name = path.rpartition("/")
+    match = _FINGERPRINT_RE.match(name)
+    if not match:
+        return path, None
+    original = match.group("stem") + (match.group("suffix") or "")
+    return (f"{head}/{original}" if head else original), match.group("digest")
+
+
+class AssetManifest:
+    """
+    Content-hash manifest for files under the static directory.
+
+    Digests are computed on first use and re-validated against the file's
+    size and mtime, so assets replaced at runtime (e.g. uploaded avatars) get
+    a new URL instead of being served stale under an immutable one.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._entries: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str) -> Optional[str]:
+        full_path = (self.directory / path).resolve()
+        if not full_path.is_relative_to(self.directory.resolve()):
+            return None
+        try:
+            stat_result = full_path.stat()
+        except (OSError, ValueError):
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        cached = self._entries.get(path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        hasher = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(256 * 1024), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()[:FINGERPRINT_LENGTH]
+
+        with self._lock:
+            self._entries[path] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        return digest
+
+    def url_for(self, path: str) -> str:
+        path = path.lstrip("/")
+        digest = self.digest(path)
+        if digest is None:
+            return f"{STATIC_URL_PREFIX}/{path}"
+        return f"{STATIC_URL_PREFIX}/{fingerprint_path(path, digest)}"
+
+    def snapshot(self) -> Dict[str, str]:
+        """Original path -> fingerprinted path for every asset hashed so far."""
+        return {
+            path: fingerprint_path(path, digest)
+            for path, (_, _, digest) in sorted(self._entries.items())
+        }
+
+
+manifest = AssetManifest(STATIC_DIR)
+
+
+def static_url(path: str) -> str:
+    """Jinja helper returning the fingerprinted URL of a static asset."""
+    return manifest.url_for(path)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles that understands fingerprinted URLs, prefers precompressed
+    variants and sets far-future caching on content-addressed paths.
+    """
+
+    def __init__(self, *args, asset_manifest: AssetManifest = manifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.asset_manifest = asset_manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        original_path, requested_digest = split_fingerprint(path)
+
+        response = None
+        compressible = Path(original_path).suffix.lower() in COMPRESSIBLE_SUFFIXES
+        if compressible and scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(original_path, scope)
+        if response is None:
+            response = await super().get_response(original_path, scope)
+
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+
+        current_digest = None
+        if requested_digest is not None:
+            current_digest = await anyio.to_thread.run_sync(self.asset_manifest.digest, original_path)
+        if requested_digest is not None and requested_digest == current_digest:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        accepted = accepted_encodings(scope)
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            except (OSError, ValueError):
+                continue
+            if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+                continue
+
+            response = self.file_response(full_path, stat_result, scope)
+            media_type = self._media_type(path)
+            if media_type:
+                response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            return response
+        return None
+
+    @staticmethod
+    def _media_type(path: str) -> Optional[str]:
+        media_type, _ = mimetypes.guess_type(path)
+        if media_type and media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        return media_type
+
+
+def precompress_assets(directory: Path = STATIC_DIR, force: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    Write ``.gz`` (and ``.br`` when brotli is installed) siblings for
+    compressible assets. Variants that do not save space are skipped.
+    Returns original path -> {encoding: compressed size}.
+    """
+    results = {}
+    for full_path in sorted(Path(directory).rglob("*")):
+        if not full_path.is_file() or full_path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+
+        source_stat = full_path.stat()
+        data = None
+        written = {}
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            target = full_path.with_name(full_path.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime_ns >= source_stat.st_mtime_ns:
+                written[encoding] = target.stat().st_size
+                continue
+
+            if data is None:
+                data = full_path.read_bytes()
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+
+            if len(compressed) >= len(data):
+                if target.exists():
+                    target.unlink()
+                continue
+            tmp_path = target.with_name(f".{target.name}.part")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, target)
+            written[encoding] = len(compressed)
+
+        if written:
+            results[full_path.relative_to(directory).as_posix()] = written
+    return results
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+HTTP load test against a running app, using accounts from seed_dataset.
+
+  python -m benchmarks.load_test --base-url http://127.0.0.1:8000 \\
+      --concurrency 16 --duration 60 --students 200
+
+Every virtual user logs in as a synthetic student (or the synthetic admin)
+and loops over a weighted mix of dashboard, exercise completion, history,
+leaderboard and admin attendance requests. Prints p50/p95/p99 latency and
+throughput per route; --json writes the same numbers to a file.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from app.services.exercises import DAILY_EXERCISES
+
+# (name, weight) of the student scenarios; admins only post attendance.
+STUDENT_MIX = (
+    ("dashboard", 40),
+    ("complete", 20),
+    ("history", 20),
+    ("leaderboard", 20),
+)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Time each request on its own; a redirect is a response, not a follow-up."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+
+class VirtualUser:
+    def __init__(self, base_url, username, password, results, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.results = results
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, route, path, form=None, expect=(200,)):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=data, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+            e.read()
+        except OSError:
+            status = None
+        self.results.record(route, time.perf_counter() - started, status in expect)
+        return status
+
+    def login(self):
+        status = self.request("login", "/login", {"username": self.username, "password": self.password}, expect=(302,))
+        return status == 302
+
+
+def _student_loop(user, rng, deadline, max_requests):
+    exercises = [exercise["id"] for level in DAILY_EXERCISES.values() for exercise in level]
+    names, weights = zip(*STUDENT_MIX)
+    sent = 0
+    while time.monotonic() < deadline and sent < max_requests:
+        scenario = rng.choices(names, weights)[0]
+        if scenario == "dashboard":
+            user.request("dashboard", "/student/dashboard")
+        elif scenario == "complete":
+            user.request(
+                "complete",
+                "/student/dashboard/daily-pad-exercises/complete",
+                {"exercise_name": rng.choice(exercises)},
+                expect=(302,),
+            )
+        elif scenario == "history":
+            user.request("history", "/student/dashboard/history")
+        else:
+            user.request("leaderboard", "/leaderboard")
+        sent += 1
+
+
+def _admin_loop(user, rng, deadline, max_requests, student_names):
+    sent = 0
+    while time.monotonic() < deadline and sent < max_requests:
+        lesson_day = date.today() - timedelta(days=rng.randrange(60))
+        user.request(
+            "admin_attendance",
+            "/admin/attendance",
+            {"student": rng.choice(student_names), "date": lesson_day.isoformat(), "grade": rng.randint(2, 6)},
+            expect=(302,),
+        )
+        sent += 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for route, latencies in sorted(results.latencies.items()):
+        values = sorted(latencies)
+        summary[route] = {
+            "requests": len(values),
+            "errors": results.errors.get(route, 0),
+            "rps": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    return summary
+
+
+def print_summary(summary, elapsed):
+    print(f"{'route':<18}{'reqs':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    total = 0
+    for route, row in summary.items():
+        total += row["requests"]
+        print(
+            f"{route:<18}{row['requests']:>8}{row['errors']:>8}{row['rps']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    print(f"{total} requests in {elapsed:.1f} s ({total / elapsed if elapsed else 0:.1f} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent HTTP load test for the Drum Dungeon app")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8, help="Virtual users")
+    parser.add_argument("--admins", type=int, default=1, help="How many virtual users act as the admin")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--requests-per-user", type=int, default=sys.maxsize, help="Stop a user after N requests")
+    parser.add_argument("--students", type=int, default=100, help="Seeded students to log in as")
+    parser.add_argument("--prefix", default="lt_")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    student_names = [f"{args.prefix}{index:05d}" for index in range(args.students)]
+    results = Results()
+
+    users = []
+    for index in range(args.concurrency):
+        is_admin = index < args.admins
+        username = f"{args.prefix}admin" if is_admin else rng.choice(student_names)
+        users.append((is_admin, VirtualUser(args.base_url, username, args.password, results, args.timeout)))
+
+    def run(item):
+        is_admin, user = item
+        user_rng = random.Random(rng.random())
+        if not user.login():
+            print(f"Login failed for {user.username}", file=sys.stderr)
+            return
+        if is_admin:
+            _admin_loop(user, user_rng, deadline, args.requests_per_user, student_names)
+        else:
+            _student_loop(user, user_rng, deadline, args.requests_per_user)
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, users))
+    elapsed = time.monotonic() - started
+
+    summary = summarize(results, elapsed)
+    print_summary(summary, elapsed)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"elapsed_s": elapsed, "concurrency": args.concurrency, "routes": summary}, f, indent=2)
+
+    sys.exit(1 if any(row["errors"] for row in summary.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Service-level micro-benchmarks with a stored baseline.
+
+  python -m benchmarks.microbench --output bench.json
+  python -m benchmarks.microbench --compare benchmarks/baseline.json
+  python -m benchmarks.microbench --update-baseline
+
+Each hot service function runs against an in-memory SQLite database seeded
+at several sizes. Timings are divided by a fixed pure-Python calibration
+loop, so a baseline recorded on one machine can be compared on another;
+a benchmark more than --threshold slower than its baseline fails the run.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.database as database
+from app.models import Base
+from benchmarks.seed_dataset import populate
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Timings below this are dominated by timer noise and never fail a comparison.
+NOISE_FLOOR_SECONDS = 20e-6
+
+# name -> (students, pad events per student)
+SIZES = {
+    "small": (10, 10),
+    "medium": (100, 100),
+    "large": (300, 1000),
+}
+QUICK_SIZES = ("small", "medium")
+
+
+def calibrate(repeat=5):
+    """Seconds for a fixed pure-Python workload; the unit timings are reported in."""
+
+    def workload():
+        total = 0
+        data = {}
+        for i in range(200_000):
+            data[i % 1000] = total
+            total += i * 3 % 7
+        return sorted(data.values())
+
+    return _best_of(workload, repeat, loops=1)
+
+
+def _best_of(func, repeat, loops):
+    """Median of ``repeat`` runs of ``loops`` calls, per call."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return statistics.median(timings)
+
+
+def _install_database(students, events_per_student):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    database.engine = engine
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    database.DB_AVAILABLE = True
+
+    db = database.SessionLocal()
+    try:
+        for _ in populate(db, students, events_per_student, 0.75, 365, "mb_", "x", random.Random(1)):
+            pass
+        db.commit()
+    finally:
+        db.close()
+    return engine
+
+
+def benchmarks_for_size():
+    """(name, callable) pairs, built once the size's database is installed."""
+    from app.services.attendance import apply_attendance
+    from app.services.data_reader import get_leaderboard_data, get_student_stats
+    from app.services.db_operations import sync_student_data_to_db
+    from app.services.level_utils import recalculate_levels
+    from app.services.medals import check_and_award_medals
+
+    username = "mb_00000"
+    stats = get_student_stats(username)
+
+    # Both only rewrite derived fields, so repeated calls on one dict are fair.
+    def run_recalculate_levels():
+        recalculate_levels(stats)
+
+    def run_check_and_award_medals():
+        check_and_award_medals(stats)
+
+    def run_get_student_stats():
+        get_student_stats(username)
+
+    def run_sync_student_data_to_db():
+        db = database.SessionLocal()
+        try:
+            sync_student_data_to_db(db, username, stats)
+            db.flush()
+        finally:
+            db.rollback()
+            db.close()
+
+    # A new date every call: a date that already has a lesson is skipped.
+    lesson_days = (date(2100, 1, 1) + timedelta(days=n) for n in itertools.count())
+
+    def run_apply_attendance():
+        apply_attendance("mb_00001", next(lesson_days).isoformat(), 5)
+
+    return [
+        ("recalculate_levels", run_recalculate_levels),
+        ("check_and_award_medals", run_check_and_award_medals),
+        ("get_student_stats", run_get_student_stats),
+        ("sync_student_data_to_db", run_sync_student_data_to_db),
+        ("apply_attendance", run_apply_attendance),
+        ("get_leaderboard_data", get_leaderboard_data),
+    ]
+
+
+def run_suite(sizes, repeat, min_time):
+    calibration = calibrate()
+    results = {}
+    for size in sizes:
+        students, events = SIZES[size]
+        engine = _install_database(students, events)
+        try:
+            for name, func in benchmarks_for_size():
+                func()  # warm up caches and compiled statements
+                single = _best_of(func, 1, 1)
+                loops = max(1, int(min_time / max(single, 1e-9)))
+                seconds = _best_of(func, repeat, loops)
+                results[f"{name}[{size}]"] = {
+                    "seconds": seconds,
+                    "relative": seconds / calibration,
+                    "students": students,
+                    "events_per_student": events,
+                }
+                print(f"{name + '[' + size + ']':<40}{seconds * 1e6:>12.1f} us{seconds / calibration:>10.4f} x cal")
+        finally:
+            engine.dispose()
+    return {
+        "calibration_seconds": calibration,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return names of benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, result in sorted(current["benchmarks"].items()):
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None:
+            print(f"{name:<40} new (no baseline)")
+            continue
+        ratio = result["relative"] / base["relative"]
+        measurable = result["seconds"] > NOISE_FLOOR_SECONDS
+        slow = ratio > 1 + threshold and measurable
+        # A baseline far slower than the code hides regressions up to that gap.
+        stale = ratio < 1 / (1 + threshold) and measurable
+        flag = "REGRESSION" if slow else "faster: refresh the baseline" if stale else ""
+        print(f"{name:<40}{ratio:>8.2f}x baseline {flag}")
+        if slow:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for hot service functions")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--quick", action="store_true", help=f"Only {', '.join(QUICK_SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per timed repeat")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", nargs="?", const=str(BASELINE_PATH), help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Allowed slowdown vs baseline before failing (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write results to {BASELINE_PATH}")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+
+    results = run_suite(sizes, args.repeat, args.min_time)
+
+    for path in filter(None, [args.output, str(BASELINE_PATH) if args.update_baseline else None]):
+        Path(path).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Wrote {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Seed a synthetic dataset for load tests and benchmarks.
+Uses the app's models and services against DATABASE_URL (SQLite or a local
+PostgreSQL; never point this at staging or production).
+
+  DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed_dataset \\
+      --students 200 --events-per-student 150 --attendance-density 0.8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from app.services.exercises import DAILY_EXERCISES
+
+ATTENDANCE_XP = 20
+CONSISTENCY_BONUS_XP = 10
+# Lessons in one calendar month that earn the consistency bonus.
+CONSISTENCY_LESSONS = 4
+DEFAULT_PASSWORD = "loadtest"
+
+
+def upgrade_schema():
+    """Bring the target database to the Alembic head (creates SQLite files)."""
+    from alembic import command
+    from alembic.config import Config
+
+    from app.database import ALEMBIC_DIR
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    command.upgrade(config, "head")
+
+
+def synthetic_student(rng, username, events_per_student, attendance_density, days, today):
+    """Events and derived XP/streak for one student, in the app's stats shape."""
+    exercises = [exercise for level in DAILY_EXERCISES.values() for exercise in level]
+    start = today - timedelta(days=days)
+
+    # Weekly lessons, each week attended with probability attendance_density.
+    lesson_dates = [
+        start + timedelta(days=week * 7 + rng.randrange(7))
+        for week in range(days // 7)
+        if rng.random() < attendance_density
+    ]
+    pad_dates = sorted(start + timedelta(days=rng.randrange(days + 1)) for _ in range(events_per_student))
+
+    events = [("pad", rng.choice(exercises), day) for day in pad_dates]
+    events += [("attendance", None, day) for day in lesson_dates]
+    events.sort(key=lambda event: event[2])
+
+    per_month = {}
+    for day in lesson_dates:
+        per_month[day.strftime("%Y-%m")] = per_month.get(day.strftime("%Y-%m"), 0) + 1
+    pad_xp = sum(exercise["xp"] for kind, exercise, _ in events if kind == "pad")
+    attendance_xp = ATTENDANCE_XP * len(lesson_dates)
+    consistency_xp = CONSISTENCY_BONUS_XP * sum(1 for count in per_month.values() if count >= CONSISTENCY_LESSONS)
+
+    practice_days = sorted(set(pad_dates))
+    longest = current = 0
+    previous = None
+    for day in practice_days:
+        current = current + 1 if previous and (day - previous).days == 1 else 1
+        longest = max(longest, current)
+        previous = day
+    if previous is None or (today - previous).days > 1:
+        current = 0
+
+    return {
+        "username": username,
+        "events": events,
+        "lesson_dates": lesson_dates,
+        "months": per_month,
+        "xp": (pad_xp + attendance_xp + consistency_xp, pad_xp, attendance_xp, consistency_xp),
+        "streak": (current, longest, previous),
+    }
+
+
+def populate(db, students, events_per_student, attendance_density, days, prefix, password_hash, rng):
+    """
+    Add synthetic students to ``db``. Yields the running row count after each
+    student so the caller decides when to commit.
+    """
+    from app.models import Attendance, AttendanceMonth, HistoryEvent, Streak, User, XP
+    from app.services.db_operations import create_or_update_student, initialize_student_records
+
+    today = date.today()
+    rows = 0
+    for index in range(students):
+        username = f"{prefix}{index:05d}"
+        data = synthetic_student(rng, username, events_per_student, attendance_density, days, today)
+
+        db.merge(User(username=username, password=password_hash, role="student", force_change=False))
+        student = create_or_update_student(db, username, f"Load Test {index}")
+        initialize_student_records(db, student.id)
+        db.flush()
+
+        total, pad_xp, attendance_xp, consistency_xp = data["xp"]
+        db.query(XP).filter(XP.student_id == student.id).update(
+            {"total": total, "pad_practice": pad_xp, "attendance": attendance_xp, "consistency": consistency_xp}
+        )
+        current, longest, last_practice = data["streak"]
+        db.query(Streak).filter(Streak.student_id == student.id).update(
+            {"current": current, "longest": longest, "last_practice_date": last_practice}
+        )
+
+        grades = {day: rng.randint(2, 6) for day in data["lesson_dates"]}
+        db.add_all(Attendance(student_id=student.id, date=day, grade=grades[day]) for day in data["lesson_dates"])
+        # Month rollups as the importer builds them from attendance.
+        db.add_all(
+            AttendanceMonth(
+                student_id=student.id, month=month, lesson_count=count, bonus_awarded=count >= CONSISTENCY_LESSONS
+            )
+            for month, count in data["months"].items()
+        )
+        db.add_all(
+            HistoryEvent(
+                student_id=student.id,
+                type=kind,
+                name=exercise["id"] if exercise else "Private Lesson",
+                date=day,
+                grade=None if exercise else grades[day],
+            )
+            for kind, exercise, day in data["events"]
+        )
+        rows += len(data["events"]) + len(data["lesson_dates"])
+        yield rows
+
+
+def seed(students, events_per_student, attendance_density, days, prefix, password, rng_seed, reset, batch_size):
+    import app.database as database
+    from app.auth import hash_password
+    from app.models import Attendance, AttendanceMonth, DailyPractice, HistoryEvent, Student, Streak, User, XP
+
+    database._load_database()
+    if not database.DB_AVAILABLE:
+        raise SystemExit("Database is not available; check DATABASE_URL")
+
+    rng = random.Random(rng_seed)
+    # One hash for every synthetic account: hashing is deliberately slow.
+    password_hash = hash_password(password)
+
+    db = database.SessionLocal()
+    try:
+        if reset:
+            ids = db.query(Student.id).filter(Student.username.like(f"{prefix}%")).scalar_subquery()
+            # Explicit child deletes: SQLite does not enforce the FK cascades by default.
+            for model in (HistoryEvent, DailyPractice, Attendance, AttendanceMonth, XP, Streak):
+                db.query(model).filter(model.student_id.in_(ids)).delete(synchronize_session=False)
+            removed = db.query(Student).filter(Student.username.like(f"{prefix}%")).delete(synchronize_session=False)
+            db.query(User).filter(User.username.like(f"{prefix}%")).delete(synchronize_session=False)
+            db.commit()
+            print(f"Removed {removed} existing {prefix}* students")
+
+        # Admin account for the load test's attendance scenario.
+        db.merge(User(username=f"{prefix}admin", password=password_hash, role="admin", force_change=False))
+
+        rows = 0
+        progress = populate(db, students, events_per_student, attendance_density, days, prefix, password_hash, rng)
+        for index, rows in enumerate(progress, 1):
+            if index % batch_size == 0:
+                db.commit()
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic students, practice history and attendance")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--events-per-student", type=int, default=100, help="Pad practice events per student")
+    parser.add_argument("--attendance-density", type=float, default=0.75,
+                        help="Share of weeks with a lesson (0-1)")
+    parser.add_argument("--days", type=int, default=365, help="History window ending today")
+    parser.add_argument("--prefix", default="lt_", help="Username prefix for synthetic students")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (same seed, same dataset)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Students per commit")
+    parser.add_argument("--reset", action="store_true", help="Delete existing students with the prefix first")
+    parser.add_argument("--no-migrate", action="store_true", help="Skip `alembic upgrade head`")
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL") and not os.environ.get("DB_HOST"):
+        print("Set DATABASE_URL (e.g. sqlite:///bench.db) first.", file=sys.stderr)
+        sys.exit(2)
+
+    if not args.no_migrate:
+        upgrade_schema()
+
+    started = time.perf_counter()
+    rows = seed(
+        args.students,
+        args.events_per_student,
+        args.attendance_density,
+        args.days,
+        args.prefix,
+        args.password,
+        args.seed,
+        args.reset,
+        args.batch_size,
+    )
+    print(f"Seeded {args.students} students and {rows} history/attendance rows "
+          f"in {time.perf_counter() - started:.1f} s (admin: {args.prefix}admin, password: {args.password!r})")
+
+
+if __name__ == "__main__":
+    main()
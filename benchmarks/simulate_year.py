@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Replay a year (or any number of days) of practice and lessons for N students
+through the real service functions under a simulated clock.
+
+  python -m benchmarks.simulate_year --students 50 --days 365
+  DATABASE_URL=postgresql+psycopg2://.../drum_dungeon_bench python -m benchmarks.simulate_year
+
+Reports DB time, statements and rows written per simulated month (write
+cost should stay flat as history grows) and the final table sizes.
+Without DATABASE_URL an in-memory SQLite database is used.
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.database as database
+from app.models import Base
+from app.query_stats import track_queries
+from app.services import clock
+from app.services.attendance import apply_attendance
+from app.services.db_operations import create_or_update_student, initialize_student_records, require_db_session
+from app.services.exercises import DAILY_EXERCISES
+from app.services.practice import complete_pad_exercise
+
+TABLES = ("students", "xp", "streaks", "attendance", "history_events")
+
+
+def _connect():
+    if os.environ.get("DATABASE_URL") or os.environ.get("DB_HOST"):
+        from benchmarks.seed_dataset import upgrade_schema
+
+        upgrade_schema()
+        database._load_database()
+        if not database.DB_AVAILABLE:
+            raise SystemExit("Database is not available; check DATABASE_URL")
+        return database.engine
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    database.engine = engine
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    database.DB_AVAILABLE = True
+    return engine
+
+
+class RowsWritten:
+    """Counts rows touched by INSERT/UPDATE/DELETE statements on an engine."""
+
+    def __init__(self, engine):
+        self.rows = 0
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip()[:6].upper()
+        if verb not in ("INSERT", "UPDATE", "DELETE"):
+            return
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            self.rows += cursor.rowcount
+        else:
+            self.rows += len(parameters) if executemany else 1
+
+
+def table_sizes(engine):
+    sizes = {}
+    with engine.connect() as connection:
+        for table in TABLES:
+            rows = connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            size = None
+            if engine.dialect.name == "postgresql":
+                size = connection.execute(text("SELECT pg_total_relation_size(:t)"), {"t": table}).scalar()
+            sizes[table] = (rows, size)
+    return sizes
+
+
+def create_students(count, prefix):
+    db = require_db_session()
+    try:
+        for index in range(count):
+            student = create_or_update_student(db, f"{prefix}{index:05d}", f"Sim {index}")
+            initialize_student_records(db, student.id)
+        db.commit()
+    finally:
+        db.close()
+    return [f"{prefix}{index:05d}" for index in range(count)]
+
+
+def simulate(students, start, days, practice_rate, attendance_density, rng, rows_written):
+    """Run the simulation day by day; returns per-month stats."""
+    exercises = [exercise["id"] for level in DAILY_EXERCISES.values() for exercise in level]
+    lesson_weekday = {student: rng.randrange(7) for student in students}
+    months = defaultdict(lambda: {"operations": 0, "statements": 0, "db_seconds": 0.0, "rows": 0, "wall_seconds": 0.0})
+
+    sim_clock = clock.FixedClock(start)
+    with clock.use_clock(sim_clock):
+        for _ in range(days):
+            today = sim_clock.today()
+            month = months[today.strftime("%Y-%m")]
+            rows_before = rows_written.rows
+            started = time.perf_counter()
+            with track_queries() as queries:
+                for student in students:
+                    if rng.random() < practice_rate:
+                        complete_pad_exercise(student, rng.choice(exercises))
+                        month["operations"] += 1
+                    if today.weekday() == lesson_weekday[student] and rng.random() < attendance_density:
+                        apply_attendance(student, today.isoformat(), rng.randint(2, 6))
+                        month["operations"] += 1
+            month["wall_seconds"] += time.perf_counter() - started
+            month["statements"] += queries.count
+            month["db_seconds"] += queries.seconds
+            month["rows"] += rows_written.rows - rows_before
+            sim_clock.advance()
+    return months
+
+
+def print_report(months, sizes, students, days):
+    print(f"{'month':<9}{'ops':>8}{'stmts':>9}{'rows':>9}{'DB ms':>10}{'DB ms/op':>10}{'stmts/op':>10}{'wall ms/op':>12}")
+    per_op = []
+    for name, month in sorted(months.items()):
+        ops = month["operations"] or 1
+        per_op.append(month["db_seconds"] * 1000 / ops)
+        print(
+            f"{name:<9}{month['operations']:>8}{month['statements']:>9}{month['rows']:>9}"
+            f"{month['db_seconds'] * 1000:>10.0f}{per_op[-1]:>10.2f}{month['statements'] / ops:>10.1f}"
+            f"{month['wall_seconds'] * 1000 / ops:>12.2f}"
+        )
+
+    total_db = sum(month["db_seconds"] for month in months.values())
+    total_rows = sum(month["rows"] for month in months.values())
+    total_ops = sum(month["operations"] for month in months.values())
+    print(f"\n{total_ops} operations, {total_rows} rows written, {total_db:.1f} s DB time")
+    if len(per_op) > 1 and per_op[0]:
+        print(f"DB time per operation, last month vs first: {per_op[-1] / per_op[0]:.2f}x")
+
+    print(f"\n{'table':<16}{'rows':>10}{'rows/student/year':>20}{'size':>12}")
+    for table, (rows, size) in sizes.items():
+        yearly = rows / len(students) * 365 / days if students else 0
+        size_text = f"{size / 1024:.0f} KiB" if size is not None else "n/a"
+        print(f"{table:<16}{rows:>10}{yearly:>20.1f}{size_text:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a year of student activity under a fake clock")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(date.today().year - 1, 1, 1),
+                        help="First simulated day (YYYY-MM-DD)")
+    parser.add_argument("--practice-rate", type=float, default=0.6, help="Chance a student practices on a day")
+    parser.add_argument("--attendance-density", type=float, default=0.8, help="Chance a weekly lesson happens")
+    parser.add_argument("--prefix", default="sim_")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine = _connect()
+    rows_written = RowsWritten(engine)
+    rng = random.Random(args.seed)
+
+    students = create_students(args.students, args.prefix)
+    started = time.perf_counter()
+    months = simulate(
+        students, args.start, args.days, args.practice_rate, args.attendance_density, rng, rows_written
+    )
+    print(f"Simulated {args.days} days for {len(students)} students in {time.perf_counter() - started:.1f} s "
+          f"({engine.dialect.name})\n")
+    print_report(months, table_sizes(engine), students, args.days)
+
+
+if __name__ == "__main__":
+    main()
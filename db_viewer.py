@@ -1,127 +1,170 @@
 #!/usr/bin/env python3
 """
-Database Viewer - visual inspection of PostgreSQL runtime contents.
-Run this to see your database data in a readable format.
+Database Viewer - page through PostgreSQL runtime contents.
+
+  python db_viewer.py                                   # tables with estimated row counts
+  python db_viewer.py history_events --student alice    # first 20 rows for one student
+  python db_viewer.py history_events --after 1200 --limit 50 --columns id,date,name
+  python db_viewer.py daily_practice --after 3,2025-03-01,ex1
+  python db_viewer.py students --exact-count
+
+Rows are read in primary-key order with a keyset cursor: each page ends with
+the --after value for the next one, so no page scans or transfers more than
+--limit rows. Counts come from planner statistics (pg_class.reltuples)
+rather than COUNT(*) unless --exact-count is given.
 """
 
-import sys
+import argparse
+import json
 import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import shlex
+import sys
+from datetime import date
 
-# Set environment
-os.environ["PRACTICE_DATA_DIR"] = os.path.join(os.path.dirname(os.path.abspath(__file__)), "practice_data")
+from sqlalchemy import func, select, text, tuple_
 
-from app.database import _load_database
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Load the database to check availability
-_load_database()
+from app.models import Base
+
+TABLES = tuple(table.name for table in Base.metadata.sorted_tables)
+
+
+def _key_columns(table):
+    return list(table.primary_key.columns)
+
+
+def _parse_key(key, after: str):
+    """Key values from an --after string; composite keys are comma-separated."""
+    parts = after.split(",", len(key) - 1)
+    if len(parts) != len(key):
+        raise ValueError(f"--after needs {len(key)} comma-separated values: {', '.join(c.name for c in key)}")
+    return tuple(
+        date.fromisoformat(value) if column.type.python_type is date else column.type.python_type(value)
+        for column, value in zip(key, parts)
+    )
+
+
+def estimated_counts(connection, exact: bool = False):
+    """
+    Row count per table: planner statistics on PostgreSQL (None if the table
+    was never analyzed), COUNT(*) elsewhere or when ``exact`` is set.
+    """
+    counts = {}
+    for name in TABLES:
+        if exact or connection.dialect.name != "postgresql":
+            counts[name] = connection.execute(select(func.count()).select_from(Base.metadata.tables[name])).scalar()
+            continue
+        # A partitioned table (history_events) has no statistics of its own.
+        estimate = connection.execute(text(
+            "SELECT COALESCE("
+            "(SELECT SUM(GREATEST(c.reltuples, 0))::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:name)), "
+            "(SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)))"
+        ), {"name": name}).scalar()
+        counts[name] = estimate if estimate is not None and estimate >= 0 else None
+    return counts
+
+
+def fetch_page(connection, table_name, student=None, after=None, limit=20, columns=None):
+    """
+    One page of ``table_name`` in primary-key order, starting after key
+    ``after`` (a string; "3,2025-03" for a composite key). Returns (column
+    names, rows, next ``after`` value or None on the last page).
+    """
+    table = Base.metadata.tables[table_name]
+    key = _key_columns(table)
+    if columns:
+        unknown = [name for name in columns if name not in table.c]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table_name}: {', '.join(unknown)}; "
+                             f"available: {', '.join(table.c.keys())}")
+        selected = [table.c[name] for name in columns]
+    else:
+        selected = list(table.c)
+    # The key is always read so the next page can start after it.
+    query = select(*selected, *(column.label(f"_key_{column.name}") for column in key))
+
+    if student:
+        students = Base.metadata.tables["students"]
+        if "student_id" in table.c:
+            student_ids = select(students.c.id).where(students.c.username == student).scalar_subquery()
+            query = query.where(table.c.student_id == student_ids)
+        else:
+            query = query.where(table.c.username == student)
+    if after is not None:
+        values = _parse_key(key, str(after))
+        query = query.where(tuple_(*key) > tuple_(*values) if len(key) > 1 else key[0] > values[0])
+
+    # One row more than asked tells whether another page exists.
+    result = connection.execution_options(stream_results=True).execute(query.order_by(*key).limit(limit + 1))
+    rows = result.fetchall()
+    names = [column.name for column in selected]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_after = ",".join(str(value) for value in rows[-1][len(names):]) if has_more and rows else None
+    return names, [row[:len(names)] for row in rows], next_after
+
+
+def _print_table(names, rows):
+    cells = [[("" if value is None else str(value)) for value in row] for row in rows]
+    widths = [max([len(name)] + [len(row[i]) for row in cells]) for i, name in enumerate(names)]
+    print("  ".join(name.ljust(width) for name, width in zip(names, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in cells:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Page through Drum Dungeon tables")
+    parser.add_argument("table", nargs="?", choices=TABLES, help="Table to page through (default: list tables)")
+    parser.add_argument("--student", help="Only rows of this student (username)")
+    parser.add_argument("--limit", type=int, default=20, help="Rows per page (default 20)")
+    parser.add_argument("--after", help="Primary key to continue after, comma-separated for composite keys (printed at the end of each page)")
+    parser.add_argument("--columns", help="Comma-separated columns to show")
+    parser.add_argument("--exact-count", action="store_true", help="COUNT(*) instead of statistics estimates")
+    parser.add_argument("--json", action="store_true", help="Print rows as NDJSON")
+    return parser.parse_args()
 
-# Now import the database components after loading
-from app.database import SessionLocal, User, Student, XP, Attendance, Streak, HistoryEvent
-from app.services.db_operations import get_db_session
 
 def view_database():
-    """Display all database contents in a readable format."""
-    print("🎯 DRUM DUNGEON DATABASE VIEWER")
-    print("=" * 50)
+    """Print table counts, or one page of a table."""
+    args = parse_args()
 
-    db = get_db_session()
-    if db is None:
-        print("❌ Cannot connect to database. Please ensure PostgreSQL is running and DATABASE_URL is set.")
-        return
-
-    try:
-        # Users
-        print("\n👥 USERS:")
-        print("-" * 20)
-        users = db.query(User).all()
-        if users:
-            for user in users:
-                print(f"  Username: {user.username}")
-                print(f"  Role: {user.role}")
-                print(f"  Force Change: {user.force_change}")
-                print()
-        else:
-            print("  No users found")
-
-        # Students
-        print("\n🎓 STUDENTS:")
-        print("-" * 20)
-        students = db.query(Student).all()
-        if students:
-            for student in students:
-                print(f"  ID: {student.id}")
-                print(f"  Username: {student.username}")
-                print(f"  Display Name: {student.display_name}")
-                print(f"  Avatar: {student.avatar}")
-                print(f"  Created: {student.created_at}")
-                print()
-        else:
-            print("  No students found")
-
-        # XP
-        print("\n⭐ EXPERIENCE POINTS (XP):")
-        print("-" * 30)
-        xps = db.query(XP).all()
-        if xps:
-            for xp in xps:
-                print(f"  Student ID: {xp.student_id}")
-                print(f"  Total XP: {xp.total}")
-                print(f"  Pad Practice: {xp.pad_practice}")
-                print(f"  Attendance: {xp.attendance}")
-                print(f"  Consistency: {xp.consistency}")
-                print()
-        else:
-            print("  No XP records found")
-
-        # Streaks
-        print("\n🔥 STREAKS:")
-        print("-" * 15)
-        streaks = db.query(Streak).all()
-        if streaks:
-            for streak in streaks:
-                print(f"  Student ID: {streak.student_id}")
-                print(f"  Current: {streak.current}")
-                print(f"  Longest: {streak.longest}")
-                print(f"  Last Practice: {streak.last_practice_date}")
-                print()
-        else:
-            print("  No streak records found")
-
-        # Attendance
-        print("\n📅 ATTENDANCE RECORDS:")
-        print("-" * 25)
-        attendances = db.query(Attendance).all()
-        if attendances:
-            for att in attendances:
-                print(f"  Student ID: {att.student_id}")
-                print(f"  Date: {att.date}")
-                print(f"  Grade: {att.grade}")
-                print()
-        else:
-            print("  No attendance records found")
-
-        # History Events
-        print("\n📜 HISTORY EVENTS:")
-        print("-" * 20)
-        events = db.query(HistoryEvent).all()
-        if events:
-            for event in events:
-                print(f"  Student ID: {event.student_id}")
-                print(f"  Type: {event.type}")
-                print(f"  Name: {event.name}")
-                print(f"  Date: {event.date}")
-                print(f"  Grade: {event.grade}")
-                print()
-        else:
-            print("  No history events found")
+    from app.database import _load_database
+    import app.database as database
 
-        print("\n✅ Database view complete!")
+    _load_database()
+    if not database.DB_AVAILABLE:
+        print("❌ Cannot connect to database. Please ensure PostgreSQL is running and DATABASE_URL is set.")
+        sys.exit(1)
+
+    with database.engine.connect() as connection:
+        if not args.table:
+            print("🎯 DRUM DUNGEON DATABASE VIEWER")
+            print("=" * 50)
+            for name, count in estimated_counts(connection, exact=args.exact_count).items():
+                shown = "unknown (not analyzed yet; use --exact-count)" if count is None else f"{count:,}"
+                print(f"  {name:<20}{shown}")
+            return
+
+        columns = [name.strip() for name in args.columns.split(",")] if args.columns else None
+        try:
+            names, rows, next_after = fetch_page(
+                connection, args.table, args.student, args.after, args.limit, columns
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(dict(zip(names, row)), default=str))
+    else:
+        _print_table(names, rows)
+    if next_after is not None:
+        print(f"\nNext page: --after {shlex.quote(next_after)}", file=sys.stderr)
 
-    except Exception as e:
-        print(f"❌ Error viewing database: {e}")
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     view_database()
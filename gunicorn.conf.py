@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for multi-process serving:
+  gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master (preload) so templates and other
+read-only module state are shared copy-on-write with the uvicorn workers.
+Database connections are only opened in the workers (FastAPI lifespan).
+"""
+
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Defaults when the environment sets neither: at most MAX_DEFAULT_WORKERS
+# workers sharing DEFAULT_CONNECTION_BUDGET PostgreSQL connections, instead
+# of a 10 + 20 pool per worker on every core.
+MAX_DEFAULT_WORKERS = 8
+DEFAULT_CONNECTION_BUDGET = 20
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), MAX_DEFAULT_WORKERS)))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Recycle workers now and then to bound slow memory growth.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+# Pool sizing in app.database reads WEB_CONCURRENCY to split the budget.
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+os.environ.setdefault("DB_CONNECTION_BUDGET", str(DEFAULT_CONNECTION_BUDGET))
+
+# /metrics aggregates the per-worker files in this directory. It must be set
+# before prometheus_client is imported (preload) and emptied on each start.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "drum-dungeon-metrics")
+)
+shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    # Everything loaded so far (modules, compiled templates, exercise and
+    # medal tables) is long-lived: move it out of the GC's tracked generations
+    # so collections in the workers don't touch, and un-share, those pages.
+    gc.collect()
+    gc.freeze()
+    server.log.info("Froze %d objects before forking workers", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    from app import database
+
+    database.dispose_engine_after_fork()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight requests, pool sizes).
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,96 @@
+"""
+Test cases that swap a throwaway database into app.database.
+InMemoryDatabaseTestCase gives every test a fresh in-memory SQLite database
+built from the models; PostgresDatabaseTestCase migrates the database named
+by TEST_POSTGRES_URL (skipped without it; its tables are dropped).
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app.models import Base
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+APP_TABLES = (
+    "alembic_version", "import_checksums", "daily_practice", "attendance_months",
+    "history_events", "attendance", "streaks", "xp", "students", "users",
+)
+
+
+def drop_app_tables(connection):
+    """Drop every table the migrations or the importer create (partitions go with their parent)."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {', '.join(APP_TABLES)} CASCADE"))
+
+
+def use_database(engine):
+    """Make ``engine`` the app's database; returns its sessionmaker."""
+    database.DB_AVAILABLE = True
+    database.engine = engine
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return database.SessionLocal
+
+
+class InMemoryDatabaseTestCase(unittest.TestCase):
+    """Each test runs against a fresh database; app.database is restored afterwards."""
+
+    def setUp(self):
+        super().setUp()
+        previous = (
+            database.DB_AVAILABLE,
+            database.engine,
+            database.SessionLocal,
+            database.read_engine,
+            database.ReadSessionLocal,
+        )
+        self.addCleanup(self._restore_database, previous)
+        self.engine = self.create_engine()
+        self.addCleanup(self.engine.dispose)
+        self.create_schema(self.engine)
+        use_database(self.engine)
+
+    @staticmethod
+    def _restore_database(previous):
+        (
+            database.DB_AVAILABLE,
+            database.engine,
+            database.SessionLocal,
+            database.read_engine,
+            database.ReadSessionLocal,
+        ) = previous
+
+    def create_engine(self):
+        return create_engine("sqlite:///:memory:")
+
+    def create_schema(self, engine):
+        Base.metadata.create_all(bind=engine)
+
+
+@unittest.skipUnless(TEST_POSTGRES_URL, "set TEST_POSTGRES_URL to a throwaway PostgreSQL database")
+class PostgresDatabaseTestCase(InMemoryDatabaseTestCase):
+    """Like InMemoryDatabaseTestCase, on TEST_POSTGRES_URL upgraded to the Alembic head."""
+
+    def create_engine(self):
+        return create_engine(TEST_POSTGRES_URL)
+
+    def create_schema(self, engine):
+        from alembic import command
+        from alembic.config import Config
+
+        with engine.begin() as connection:
+            drop_app_tables(connection)
+        self.addCleanup(self._drop_tables, engine)
+        config = Config()
+        config.set_main_option("script_location", str(database.ALEMBIC_DIR))
+        with mock.patch.dict(os.environ, {"DATABASE_URL": TEST_POSTGRES_URL}):
+            command.upgrade(config, "head")
+
+    @staticmethod
+    def _drop_tables(engine):
+        with engine.begin() as connection:
+            drop_app_tables(connection)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from starlette.datastructures import Headers
+
+import app.database as database
+import app.services.avatars as avatars
+from app.models import Student
+from app.services.db_operations import create_or_update_student
+from database_case import InMemoryDatabaseTestCase
+
+
+def _multipart_body(boundary: str, username: str, filename: str, payload: bytes) -> bytes:
+    return (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="username"\r\n\r\n'
+        f"{username}\r\n"
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="avatar"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+
+async def _chunked(body: bytes, size: int = 1024):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+class AvatarServiceTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        create_or_update_student(db, "student1", "Student One")
+        db.commit()
+        db.close()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.avatars_dir = Path(self.tmp.name)
+        patcher = mock.patch.object(avatars, "AVATARS_DIR", self.avatars_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def create_engine(self):
+        # The upload checks the student from a threadpool thread.
+        return create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    def _upload(self, payload: bytes, filename: str = "photo.png", username: str = "student1"):
+        boundary = "drumdungeonboundary"
+        body = _multipart_body(boundary, username, filename, payload)
+        headers = Headers({"content-type": f"multipart/form-data; boundary={boundary}"})
+        return asyncio.run(avatars.save_avatar_upload(headers, _chunked(body)))
+
+    def test_upload_is_streamed_to_avatars_dir(self):
+        payload = b"\x89PNG" + b"x" * 5000
+
+        filename = self._upload(payload)
+
+        self.assertEqual(filename, "student1_avatar.png")
+        self.assertEqual((self.avatars_dir / filename).read_bytes(), payload)
+        db = database.SessionLocal()
+        self.addCleanup(db.close)
+        self.assertEqual(db.query(Student.avatar).filter(Student.username == "student1").scalar(), filename)
+
+    def test_upload_for_unknown_student_is_rejected(self):
+        with self.assertRaises(avatars.AvatarUploadError) as ctx:
+            self._upload(b"\x89PNG", username="nobody")
+
+        self.assertEqual(ctx.exception.status_code, 404)
+        self.assertEqual(list(self.avatars_dir.iterdir()), [])
+
+    def test_upload_over_size_cap_is_rejected(self):
+        with mock.patch.object(avatars, "AVATAR_MAX_BYTES", 1024):
+            with self.assertRaises(avatars.AvatarUploadError) as ctx:
+                self._upload(b"x" * (avatars.MULTIPART_OVERHEAD_BYTES + 4096))
+
+        self.assertEqual(ctx.exception.status_code, 413)
+        self.assertEqual(list(self.avatars_dir.iterdir()), [])
+
+    def test_unsupported_extension_is_rejected(self):
+        with self.assertRaises(avatars.AvatarUploadError):
+            self._upload(b"#!/bin/sh", filename="evil.sh")
+
+    def test_variants_are_built_and_registered(self):
+        Image.new("RGBA", (600, 600), (255, 0, 0, 255)).save(self.avatars_dir / "student1_avatar.png")
+
+        variants = avatars.build_avatar_variants("student1_avatar.png", avatars_dir=self.avatars_dir)
+
+        self.assertEqual(set(variants), {str(size) for size in avatars.AVATAR_VARIANT_SIZES})
+        with Image.open(self.avatars_dir / variants["128"]) as small:
+            self.assertEqual(small.size, (128, 128))
+        manifest = json.loads((self.avatars_dir / avatars.MANIFEST_FILENAME).read_text())
+        self.assertEqual(manifest["student1_avatar.png"]["variants"], variants)
+        self.assertEqual(avatars.avatar_path("student1_avatar.png", 200), variants["256"])
+        self.assertEqual(avatars.avatar_path("missing.png", 200), "missing.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+import app.database as database
+from app.models import Attendance, AttendanceMonth, HistoryEvent, Student, XP
+from app.query_stats import track_queries
+from app.services.attendance import apply_attendance, apply_bulk_attendance, parse_attendance_csv
+from app.services.db_operations import create_or_update_student, initialize_student_records
+from database_case import InMemoryDatabaseTestCase
+
+
+class BulkAttendanceTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        for username in ("alice", "bob", "carol"):
+            student = create_or_update_student(db, username, username.title())
+            initialize_student_records(db, student.id)
+        db.commit()
+        db.close()
+
+    def xp(self, username):
+        db = database.SessionLocal()
+        try:
+            row = db.query(XP).join(Student, Student.id == XP.student_id).filter(Student.username == username).one()
+            return row.total, row.attendance, row.consistency
+        finally:
+            db.close()
+
+    def test_bulk_matches_one_by_one_and_awards_monthly_bonus(self):
+        days = ["2025-03-03", "2025-03-10", "2025-03-17", "2025-03-24", "2025-03-31", "2025-04-07"]
+        for day in days:
+            apply_attendance("alice", day, 7)
+
+        result = apply_bulk_attendance([("bob", day, 7) for day in days])
+        self.assertEqual(result["errors"], [])
+        self.assertEqual((result["applied"], result["bonuses"]), (6, 1))
+        self.assertEqual(self.xp("bob"), self.xp("alice"))
+        self.assertEqual(self.xp("bob"), (6 * 20 + 10, 120, 10))
+
+    def test_backfill_counts_lessons_already_in_the_month(self):
+        for day in ("2025-05-05", "2025-05-12", "2025-05-19"):
+            apply_attendance("carol", day, 5)
+        result = apply_bulk_attendance([("carol", "2025-05-26", 5), ("carol", "2025-05-05", 5)])
+        self.assertEqual((result["applied"], result["bonuses"]), (1, 1))
+        self.assertEqual(result["skipped"], ["carol 2025-05-05: already recorded"])
+
+        db = database.SessionLocal()
+        try:
+            self.assertEqual(db.query(Attendance).count(), 4)
+            self.assertEqual(db.query(HistoryEvent).filter(HistoryEvent.type == "attendance").count(), 4)
+        finally:
+            db.close()
+
+    def test_month_rollup_is_kept_by_single_and_bulk_writes(self):
+        for day in ("2025-06-02", "2025-06-09", "2025-06-16", "2025-06-23"):
+            apply_attendance("alice", day, 6)
+        # A lesson after the bonus month closed must not earn it again.
+        apply_bulk_attendance([("alice", "2025-06-30", 6), ("alice", "2025-07-07", 6)])
+        apply_attendance("alice", "2025-06-27", 6)
+
+        db = database.SessionLocal()
+        try:
+            rollups = [
+                (row.month, row.lesson_count, row.bonus_awarded)
+                for row in db.query(AttendanceMonth).order_by(AttendanceMonth.month)
+            ]
+        finally:
+            db.close()
+        self.assertEqual(rollups, [("2025-06", 6, True), ("2025-07", 1, False)])
+        self.assertEqual(self.xp("alice"), (7 * 20 + 10, 140, 10))
+
+    def test_lesson_on_an_already_recorded_date_changes_nothing(self):
+        self.assertTrue(apply_attendance("bob", "2025-08-04", 6))
+        self.assertFalse(apply_attendance("bob", "2025-08-04", 8))
+
+        db = database.SessionLocal()
+        try:
+            self.assertEqual(db.query(AttendanceMonth.lesson_count).scalar(), 1)
+            self.assertEqual(db.query(Attendance).count(), 1)
+            self.assertEqual(db.query(HistoryEvent).filter(HistoryEvent.type == "attendance").count(), 1)
+        finally:
+            db.close()
+        self.assertEqual(self.xp("bob"), (20, 20, 0))
+
+    def test_invalid_rows_abort_the_whole_batch(self):
+        result = apply_bulk_attendance([("alice", "2025-03-03", 7), ("nobody", "2025-03-03", 7)])
+        self.assertEqual(result["errors"], ["unknown student: nobody"])
+        result = apply_bulk_attendance([("alice", "2025-03-03", 11)])
+        self.assertEqual(result["applied"], 0)
+        self.assertIn("outside 1-10", result["errors"][0])
+        self.assertEqual(self.xp("alice"), (0, 0, 0))
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        def statements(rows):
+            with track_queries() as queries:
+                apply_bulk_attendance(rows)
+            return queries.count
+
+        few = statements([("alice", "2025-01-02", 5), ("bob", "2025-01-02", 5)])
+        many = statements([(name, f"2025-02-{day:02d}", 5) for name in ("alice", "bob", "carol") for day in range(1, 28)])
+        self.assertEqual(few, many)
+
+    def test_csv_parsing_reports_bad_lines(self):
+        rows, errors = parse_attendance_csv("student,date,grade\nalice,2025-03-03,8\nbob,03/03/2025,8\ncarol,2025-03-03,\n")
+        self.assertEqual(rows, [("alice", "2025-03-03", 8), ("carol", "2025-03-03", None)])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("line 3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+import unittest
+
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+from app.compression import CompressionMiddleware
+
+
+def _call(app, accept_encoding: str = "gzip"):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], headers, body
+
+
+class CompressionMiddlewareTests(unittest.TestCase):
+    def test_large_html_is_gzipped(self):
+        html = "<div class='row'>student</div>\n" * 200
+        app = CompressionMiddleware(Response(html, media_type="text/html"), minimum_size=500)
+
+        status, headers, body = _call(app, "gzip")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertEqual(headers["vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["content-length"]), len(body))
+        self.assertEqual(gzip.decompress(body).decode(), html)
+        self.assertLess(len(body) * 5, len(html))
+
+    def test_small_json_is_left_alone(self):
+        app = CompressionMiddleware(JSONResponse({"status": "healthy"}), minimum_size=500)
+
+        _, headers, body = _call(app, "gzip")
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(body, b'{"status":"healthy"}')
+
+    def test_disallowed_content_type_and_304_pass_through(self):
+        png = Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+        _, headers, _ = _call(CompressionMiddleware(png, minimum_size=10))
+        self.assertNotIn("content-encoding", headers)
+
+        not_modified = Response(status_code=304, headers={"content-type": "text/html"})
+        status, headers, body = _call(CompressionMiddleware(not_modified, minimum_size=0))
+        self.assertEqual(status, 304)
+        self.assertNotIn("content-encoding", headers)
+
+    def test_already_encoded_response_is_not_recompressed(self):
+        encoded = PlainTextResponse("x" * 2000, headers={"content-encoding": "br"})
+        _, headers, body = _call(CompressionMiddleware(encoded, minimum_size=10))
+
+        self.assertEqual(headers["content-encoding"], "br")
+        self.assertEqual(body, b"x" * 2000)
+
+    def test_client_without_accept_encoding_gets_identity(self):
+        app = CompressionMiddleware(Response("x" * 2000, media_type="text/html"), minimum_size=10)
+
+        _, headers, body = _call(app, "")
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(len(body), 2000)
+
+    def test_codings_refused_with_q_zero_are_not_used(self):
+        app = CompressionMiddleware(Response("x" * 2000, media_type="text/html"), minimum_size=10)
+
+        _, headers, body = _call(app, "br;q=0, gzip;q=0, identity")
+
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(len(body), 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
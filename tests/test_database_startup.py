@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+import app.database as database
+
+
+class DatabaseStartupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.url = f"sqlite:///{os.path.join(self.tmp.name, 'startup.db')}"
+        self.engine = create_engine(self.url)
+        self.addCleanup(self.engine.dispose)
+
+    def _upgrade_to_head(self, revision="head"):
+        config = Config()
+        config.set_main_option("script_location", str(database.ALEMBIC_DIR))
+        with mock.patch.dict(os.environ, {"DATABASE_URL": self.url}):
+            command.upgrade(config, revision)
+
+    def test_unmigrated_database_fails_fast(self):
+        with self.engine.connect() as connection:
+            with self.assertRaises(database.SchemaVersionError):
+                database.check_schema_revision(connection)
+
+    def test_migrated_database_passes_schema_check(self):
+        self._upgrade_to_head()
+
+        with self.engine.connect() as connection:
+            database.check_schema_revision(connection)
+            tables = set(inspect(connection).get_table_names())
+
+        self.assertTrue({"users", "students", "xp", "attendance", "streaks", "history_events"} <= tables)
+
+    def test_stale_revision_fails_fast(self):
+        self._upgrade_to_head()
+        with self.engine.begin() as connection:
+            connection.execute(text("UPDATE alembic_version SET version_num = 'stale'"))
+
+        with self.engine.connect() as connection:
+            with self.assertRaises(database.SchemaVersionError):
+                database.check_schema_revision(connection)
+
+    def test_attendance_months_are_backfilled(self):
+        self._upgrade_to_head("0002")
+        with self.engine.begin() as connection:
+            connection.execute(text("INSERT INTO students (id, username) VALUES (1, 'alice')"))
+            for day in ("2025-03-03", "2025-03-10", "2025-03-17", "2025-03-24", "2025-04-07"):
+                connection.execute(text("INSERT INTO attendance (student_id, date) VALUES (1, :day)"), {"day": day})
+        self._upgrade_to_head()
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(text(
+                "SELECT month, lesson_count, bonus_awarded FROM attendance_months ORDER BY month"
+            )).all()
+        self.assertEqual([tuple(row) for row in rows], [("2025-03", 4, 1), ("2025-04", 1, 0)])
+
+    def test_connection_budget_is_split_across_workers(self):
+        self.assertEqual(database.pool_limits_for_worker(budget=0, workers=4), (10, 20))
+        pool_size, max_overflow = database.pool_limits_for_worker(budget=20, workers=4)
+        self.assertEqual((pool_size, max_overflow), (3, 2))
+        self.assertLessEqual((pool_size + max_overflow) * 4, 20)
+        with self.assertNoLogs("app.database", level="WARNING"):
+            self.assertEqual(database.pool_limits_for_worker(budget=8, workers=8), (1, 0))
+
+    def test_budget_below_the_worker_count_is_reported(self):
+        with self.assertLogs("app.database", level="WARNING") as logs:
+            self.assertEqual(database.pool_limits_for_worker(budget=3, workers=4), (1, 0))
+        self.assertIn("4 in total", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
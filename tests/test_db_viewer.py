@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, DailyPractice
+from app.services.db_operations import add_history_event, create_or_update_student, initialize_student_records
+from db_viewer import estimated_counts, fetch_page
+
+
+class DbViewerTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(self.engine)
+        db = sessionmaker(bind=self.engine)()
+        for username in ("alice", "bob"):
+            student = create_or_update_student(db, username, username.title())
+            initialize_student_records(db, student.id)
+            for day in range(1, 6):
+                add_history_event(db, student.id, "pad", f"ex{day}", f"2025-03-0{day}")
+                db.add(DailyPractice(student_id=student.id, date=date(2025, 2, day), exercise="ex", count=1, xp=5))
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_keyset_pages_cover_a_students_rows_once(self):
+        seen, after = [], None
+        with self.engine.connect() as connection:
+            while True:
+                names, rows, after = fetch_page(
+                    connection, "history_events", student="bob", after=after, limit=2, columns=["name"]
+                )
+                seen.extend(row[0] for row in rows)
+                if after is None:
+                    break
+        self.assertEqual(names, ["name"])
+        self.assertEqual(seen, ["ex1", "ex2", "ex3", "ex4", "ex5"])
+
+    def test_unknown_columns_and_counts(self):
+        with self.engine.connect() as connection:
+            with self.assertRaises(ValueError):
+                fetch_page(connection, "students", columns=["password"])
+            counts = estimated_counts(connection)
+        self.assertEqual(counts["students"], 2)
+        self.assertEqual(counts["history_events"], 10)
+        self.assertEqual(counts["daily_practice"], 10)
+        self.assertEqual(counts["attendance_months"], 0)
+
+    def test_composite_keys_page_through_every_row(self):
+        seen, after = [], None
+        with self.engine.connect() as connection:
+            while True:
+                names, rows, after = fetch_page(
+                    connection, "daily_practice", student="alice", after=after, limit=2, columns=["date"]
+                )
+                seen.extend(row[0].day for row in rows)
+                if after is None:
+                    break
+            with self.assertRaises(ValueError):
+                fetch_page(connection, "daily_practice", after="1")
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import date
+
+import app.database as database
+from app.query_stats import track_queries
+from app.services.db_operations import (
+    add_attendance_record,
+    add_history_event,
+    create_or_update_student,
+    initialize_student_records,
+)
+from app.services.export import CSV_COLUMNS, export_chunks, iter_student_records
+from database_case import InMemoryDatabaseTestCase
+
+
+class ExportTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        for index in range(5):
+            student = create_or_update_student(db, f"student{index}", f"Student {index}")
+            initialize_student_records(db, student.id)
+            add_attendance_record(db, student.id, "2025-03-01", None)
+            add_history_event(db, student.id, "pad", "warmup", date(2025, 3, index + 1).isoformat())
+        db.commit()
+        db.close()
+
+    def test_records_are_batched_with_a_fixed_number_of_queries(self):
+        with track_queries() as queries:
+            records = list(iter_student_records(batch_size=2))
+        self.assertEqual([record["username"] for record in records], [f"student{i}" for i in range(5)])
+        self.assertEqual(records[3]["history"]["events"][0]["date"], "2025-03-04")
+        self.assertEqual(records[0]["attendance"]["dates"], [{"date": "2025-03-01", "grade": None}])
+        # One student cursor plus five child queries per batch of two.
+        self.assertEqual(queries.count, 1 + 5 * 3)
+
+    def test_gzipped_ndjson_round_trips(self):
+        data = gzip.decompress(b"".join(export_chunks("ndjson", compress=True)))
+        lines = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0]["profile"]["name"], "Student 0")
+
+    def test_csv_has_student_attendance_and_history_rows(self):
+        rows = list(csv.reader(io.StringIO(b"".join(export_chunks("csv")).decode())))
+        self.assertEqual(tuple(rows[0]), CSV_COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:4]], ["student", "attendance", "history"])
+        self.assertEqual(len(rows), 1 + 5 * 3)
+        self.assertTrue(all(len(row) == len(CSV_COLUMNS) for row in rows))
+        attendance, history = (dict(zip(CSV_COLUMNS, row)) for row in rows[2:4])
+        self.assertEqual((attendance["date"], attendance["type"]), ("2025-03-01", ""))
+        self.assertEqual((history["date"], history["type"], history["name"]), ("2025-03-01", "pad", "warmup"))
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            next(export_chunks("xml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
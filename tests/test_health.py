@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import app.database as database
+from app.health import HealthProber, probe_database
+from database_case import InMemoryDatabaseTestCase
+
+
+class HealthProberTests(InMemoryDatabaseTestCase):
+    def create_engine(self):
+        # The prober connects from its own thread.
+        return create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    def test_connected_database_is_ready(self):
+        prober = HealthProber(probe=probe_database)
+        self.assertFalse(prober.snapshot()["ready"])
+        prober.check_once()
+        snapshot = prober.snapshot()
+        self.assertTrue(snapshot["ready"])
+        self.assertEqual(snapshot["database"], "connected")
+
+    def test_hung_probe_is_bounded_by_timeout(self):
+        release = threading.Event()
+        prober = HealthProber(timeout=0.05, probe=lambda: release.wait(5) and "connected")
+        try:
+            started = time.monotonic()
+            prober.check_once()
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertIn("timeout", prober.snapshot()["database"])
+            # The stuck probe is not stacked with another one.
+            prober.check_once()
+            self.assertIn("previous probe still running", prober.snapshot()["database"])
+        finally:
+            release.set()
+
+    def test_failing_and_stale_results_are_not_ready(self):
+        def broken():
+            raise RuntimeError("connection refused")
+
+        prober = HealthProber(probe=broken)
+        prober.check_once()
+        self.assertEqual(prober.snapshot()["database"], "error: connection refused")
+
+        prober = HealthProber(stale_after=0.01, probe=lambda: "connected")
+        prober.check_once()
+        time.sleep(0.02)
+        snapshot = prober.snapshot()
+        self.assertFalse(snapshot["ready"])
+        self.assertEqual(snapshot["database"], "stale")
+
+
+class HealthRouteTests(unittest.TestCase):
+    def test_probe_routes_serve_cached_state(self):
+        with mock.patch.dict(os.environ, {"SESSION_SECRET_KEY": "test-secret"}):
+            from fastapi.testclient import TestClient
+
+            from app import health
+            from app.main import app
+
+        client = TestClient(app)
+        prober = HealthProber(probe=lambda: "error: down")
+        prober.check_once()
+        with mock.patch.object(health, "prober", prober):
+            self.assertEqual(client.get("/livez").status_code, 200)
+            self.assertEqual(client.get("/readyz").status_code, 503)
+            self.assertEqual(client.get("/health").json()["database"], "error: down")
+
+
+if __name__ == "__main__":
+    unittest.main()
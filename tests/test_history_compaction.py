@@ -0,0 +1,79 @@
+import unittest
+from datetime import date
+
+import app.database as database
+from app.models import DailyPractice, HistoryEvent
+from app.query_stats import track_queries
+from app.services import clock
+from app.services.data_reader import get_history_totals
+from app.services.db_operations import add_history_event, create_or_update_student, initialize_student_records
+from app.services.history_compaction import compact_pad_history, compaction_cutoff
+from app.services.practice import exercise_xp
+from database_case import InMemoryDatabaseTestCase
+
+
+class HistoryCompactionTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        for username in ("alice", "bob", "carol"):
+            student = create_or_update_student(db, username, username.title())
+            initialize_student_records(db, student.id)
+            for day in ("2025-01-05", "2025-01-05", "2025-01-06", "2025-06-01"):
+                add_history_event(db, student.id, "pad", "single_strokes", day)
+            add_history_event(db, student.id, "pad", "paradiddles", "2025-01-05")
+            add_history_event(db, student.id, "attendance", "Private Lesson", "2025-01-07", grade=8)
+        db.commit()
+        db.close()
+
+    def test_old_pad_events_move_to_daily_practice_and_totals_hold(self):
+        before_totals = get_history_totals("bob")
+        with track_queries() as queries:
+            result = compact_pad_history(date(2025, 3, 1), batch_size=2)
+        self.assertEqual(result, {"students": 3, "events": 12})
+        # Two batches of students with one insert each, plus the empty batch that ends the run.
+        self.assertEqual(queries.count, 2 * 5 + 1)
+        self.assertEqual(get_history_totals("bob"), before_totals)
+
+        db = database.SessionLocal()
+        try:
+            self.assertEqual(db.query(HistoryEvent).filter(HistoryEvent.type == "pad").count(), 3)
+            self.assertEqual(db.query(HistoryEvent).filter(HistoryEvent.type == "attendance").count(), 3)
+            day = db.query(DailyPractice).filter(
+                DailyPractice.date == date(2025, 1, 5), DailyPractice.exercise == "single_strokes"
+            ).first()
+            self.assertEqual((day.count, day.xp), (2, 2 * exercise_xp("single_strokes")))
+        finally:
+            db.close()
+
+    def test_later_runs_add_to_compacted_days(self):
+        compact_pad_history(date(2025, 3, 1))
+        db = database.SessionLocal()
+        try:
+            student_id = db.query(DailyPractice.student_id).first()[0]
+            add_history_event(db, student_id, "pad", "single_strokes", "2025-01-05")
+            db.commit()
+        finally:
+            db.close()
+
+        self.assertEqual(compact_pad_history(date(2025, 3, 1))["events"], 1)
+        db = database.SessionLocal()
+        try:
+            day = db.query(DailyPractice).filter(
+                DailyPractice.student_id == student_id,
+                DailyPractice.date == date(2025, 1, 5),
+                DailyPractice.exercise == "single_strokes",
+            ).one()
+            self.assertEqual(day.count, 3)
+        finally:
+            db.close()
+
+    def test_cutoff_never_reaches_into_the_history_window(self):
+        with clock.use_clock(clock.FixedClock(date(2025, 7, 1))):
+            self.assertEqual(compaction_cutoff(180), date(2025, 1, 2))
+            with self.assertRaises(ValueError):
+                compaction_cutoff(7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from datetime import date
+
+from app.scripts.history_partitions import add_months, partition_month, partition_name, plan_maintenance
+
+
+class HistoryPartitionPlanTests(unittest.TestCase):
+    def test_months_wrap_across_years(self):
+        self.assertEqual(add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(partition_name(date(2026, 2, 1)), "history_events_2026_02")
+        self.assertEqual(partition_month("history_events_2026_02"), date(2026, 2, 1))
+        self.assertIsNone(partition_month("history_events_default"))
+
+    def test_missing_future_months_are_created(self):
+        existing = ["history_events_2025_10", "history_events_2025_11", "history_events_default"]
+        plan = plan_maintenance(existing, date(2025, 11, 20), ahead=2, retain_months=0)
+        self.assertEqual(plan.create, [date(2025, 12, 1), date(2026, 1, 1)])
+        self.assertEqual(plan.retire, [])
+
+    def test_default_partition_months_get_their_own_partition(self):
+        plan = plan_maintenance(
+            ["history_events_2025_11"], date(2025, 11, 2), ahead=0, retain_months=0,
+            default_months=[date(2023, 5, 1)],
+        )
+        self.assertEqual(plan.create, [date(2023, 5, 1)])
+
+    def test_retention_retires_whole_months_only(self):
+        existing = [partition_name(date(2024, month, 1)) for month in range(1, 13)] + ["history_events_default"]
+        plan = plan_maintenance(existing, date(2024, 12, 31), ahead=0, retain_months=3)
+        # December plus the three months before it stay.
+        self.assertEqual(plan.retire, [partition_name(date(2024, month, 1)) for month in range(1, 9)])
+        self.assertNotIn("history_events_default", plan.retire)
+
+    def test_months_still_detached_are_not_created_again(self):
+        plan = plan_maintenance(
+            ["history_events_2025_11"], date(2025, 11, 2), ahead=0, retain_months=0,
+            default_months=[date(2023, 5, 1)], detached=["history_events_2023_05"],
+        )
+        self.assertEqual(plan.create, [])
+        self.assertEqual(plan.retire, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import json
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+import app.database as database
+from app.scripts.import_students_data import (
+    ALEMBIC_VERSIONS,
+    changed_student_dirs,
+    check_schema,
+    copy_buffers,
+    copy_value,
+    load,
+    migration_heads,
+    parse_all,
+    rebuild_index_sql,
+    student_dirs,
+)
+from database_case import PostgresDatabaseTestCase
+
+
+def write_student(root: Path, username: str, stats: dict):
+    (root / username).mkdir(parents=True)
+    (root / username / "stats.json").write_text(json.dumps(stats), encoding="utf-8")
+
+
+class ImportStudentsDataTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "students"
+        write_student(self.root, "bob", {
+            "profile": {"name": "Bob\tB", "avatar": ""},
+            "xp": {"total": 30, "categories": {"pad_practice": 20, "attendance": 10}},
+            "streak": {"current": 2, "longest": 5, "last_practice_date": "2025-03-02"},
+            "attendance": {"dates": ["2025-03-01"]},
+            "history": {"events": [
+                {"type": "pad", "name": "warmup", "date": "2025-03-02"},
+                {"type": "attendance", "name": "Lesson", "date": "2025-03-01", "grade": 5},
+            ]},
+        })
+        write_student(self.root, "alice", {"profile": {"name": "Alice"}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_students_get_sequential_ids_and_copy_rows(self):
+        paths = student_dirs(self.root.parent)
+        self.assertEqual([path.name for path in paths], ["alice", "bob"])
+        students, errors = parse_all(paths, workers=2)
+        self.assertEqual(errors, [])
+
+        users = {"admin": {"password": "hash", "role": "admin"}}
+        buffers = copy_buffers(users, students, datetime(2025, 1, 1))
+        tables = {table: buffer.read().splitlines() for table, buffer in buffers.items()}
+
+        self.assertEqual(tables["users"], ["admin\thash\tadmin\tf"])
+        self.assertEqual(tables["students"][1], "2\tbob\tBob\\tB\t\t2025-01-01T00:00:00")
+        self.assertEqual(tables["xp"][1], "2\t30\t20\t10\t0")
+        self.assertEqual(tables["streaks"][0], "1\t0\t0\t\\N")
+        self.assertEqual(tables["attendance"], ["2\t2025-03-01\t\\N"])
+        self.assertEqual(tables["history_events"][1], "2\tattendance\tLesson\t2025-03-01\t5")
+
+    def test_invalid_directories_are_reported(self):
+        write_student(self.root, "carol", {"streak": {"last_practice_date": "yesterday"}})
+        students, errors = parse_all(student_dirs(self.root.parent), workers=1)
+        self.assertEqual(len(students), 2)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("carol", errors[0])
+
+    def test_only_changed_students_are_reimported(self):
+        paths = student_dirs(self.root.parent)
+        students, _ = parse_all(paths, workers=1)
+        known = {rows.username: rows.digest for rows in students}
+        self.assertEqual(changed_student_dirs(paths, known), [])
+
+        (self.root / "alice" / "stats.json").write_text(json.dumps({"profile": {"name": "Alice B"}}))
+        write_student(self.root, "dave", {})
+        changed = changed_student_dirs(student_dirs(self.root.parent), known)
+        self.assertEqual([path.name for path in changed], ["alice", "dave"])
+
+        buffers = copy_buffers({}, students, datetime(2025, 1, 1), student_ids=[7, 9])
+        self.assertTrue(buffers["xp"].read().startswith("7\t"))
+        self.assertEqual(buffers["import_checksums"].read().splitlines()[1].split("\t")[:2],
+                         ["bob", known["bob"]])
+
+    def test_copy_value_escapes_text_format(self):
+        self.assertEqual(copy_value(None), "\\N")
+        self.assertEqual(copy_value(True), "t")
+        self.assertEqual(copy_value(date(2025, 1, 2)), "2025-01-02")
+        self.assertEqual(copy_value("a\\b\nc"), "a\\\\b\\nc")
+
+    def test_partitioned_indexes_are_rebuilt_on_every_partition(self):
+        self.assertEqual(
+            rebuild_index_sql("CREATE INDEX ix_history_events_id ON ONLY public.history_events USING btree (id)"),
+            "CREATE INDEX ix_history_events_id ON public.history_events USING btree (id)",
+        )
+        plain = "CREATE UNIQUE INDEX ix_students_username ON public.students USING btree (username)"
+        self.assertEqual(rebuild_index_sql(plain), plain)
+
+    def test_schema_head_is_read_from_the_migration_files(self):
+        self.assertEqual(migration_heads(ALEMBIC_VERSIONS), database._alembic_heads())
+        self.assertEqual(migration_heads(Path(self.tmp.name)), set())
+
+
+class FullImportPostgresTests(PostgresDatabaseTestCase):
+    def setUp(self):
+        import psycopg2
+
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        url = self.engine.url.set(drivername="postgresql")
+        self.conn = psycopg2.connect(url.render_as_string(hide_password=False))
+        self.addCleanup(self.conn.close)
+
+    def test_full_import_keeps_history_indexes_on_every_partition(self):
+        root = Path(self.tmp.name) / "students"
+        write_student(root, "bob", {"history": {"events": [{"type": "pad", "name": "warmup", "date": "2025-03-02"}]}})
+        students, _ = parse_all(student_dirs(root.parent), workers=1)
+
+        check_schema(self.conn, ALEMBIC_VERSIONS)
+        load(self.conn, copy_buffers({}, students, datetime(2025, 1, 1)))
+        self.conn.commit()
+
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM pg_inherits WHERE inhparent = 'history_events'::regclass")
+            partitions = cur.fetchone()[0]
+            cur.execute(
+                "SELECT c.relname, i.indisvalid, "
+                "(SELECT count(*) FROM pg_inherits p WHERE p.inhparent = i.indexrelid) "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = 'history_events'::regclass"
+            )
+            indexes = {name: (valid, children) for name, valid, children in cur.fetchall()}
+
+        self.assertGreater(partitions, 0)
+        self.assertIn("ix_history_events_student_date", indexes)
+        self.assertIn("ix_history_events_id", indexes)
+        for name, (valid, children) in indexes.items():
+            self.assertTrue(valid, name)
+            self.assertEqual(children, partitions, name)
+
+    def test_database_behind_the_migration_head_is_refused(self):
+        with self.conn.cursor() as cur:
+            cur.execute("UPDATE alembic_version SET version_num = '0001'")
+        self.conn.commit()
+        with self.assertRaises(SystemExit) as raised:
+            check_schema(self.conn, ALEMBIC_VERSIONS)
+        self.assertIn("alembic upgrade head", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
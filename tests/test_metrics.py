@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app import metrics
+from app.metrics import MetricsMiddleware, refresh_gauges_if_due, render_metrics
+
+
+def _get(app, path: str):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages[0]["status"]
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTests(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        self.addCleanup(engine.dispose)
+
+        api = FastAPI()
+
+        @api.get("/metrics-test/students/{student_id}")
+        def student(student_id: str):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+            return {"id": student_id}
+
+        self.app = MetricsMiddleware(api)
+
+    def test_requests_are_labelled_by_route_template(self):
+        route = "/metrics-test/students/{student_id}"
+        before_requests = _sample("http_requests_total", method="GET", route=route, status="200")
+        before_queries = _sample("db_queries_per_request_sum", route=route)
+
+        self.assertEqual(_get(self.app, "/metrics-test/students/alice"), 200)
+        self.assertEqual(_get(self.app, "/metrics-test/students/bob"), 200)
+
+        self.assertEqual(_sample("http_requests_total", method="GET", route=route, status="200") - before_requests, 2)
+        self.assertEqual(_sample("db_queries_per_request_sum", route=route) - before_queries, 4)
+        self.assertGreater(_sample("http_request_duration_seconds_count", method="GET", route=route), 0)
+        self.assertEqual(_sample("http_requests_in_progress", method="GET"), 0)
+
+    def test_unknown_paths_share_one_label(self):
+        before = _sample("http_requests_total", method="GET", route="unmatched", status="404")
+
+        self.assertEqual(_get(self.app, "/no/such/page-1"), 404)
+        self.assertEqual(_get(self.app, "/no/such/page-2"), 404)
+
+        self.assertEqual(_sample("http_requests_total", method="GET", route="unmatched", status="404") - before, 2)
+
+    def test_render_metrics_uses_prometheus_text_format(self):
+        _get(self.app, "/metrics-test/students/carol")
+
+        body, content_type = render_metrics()
+
+        self.assertTrue(content_type.startswith("text/plain"))
+        self.assertIn(b"# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn(b"db_time_per_request_seconds_bucket", body)
+
+
+class GaugeRefreshTests(unittest.TestCase):
+    def test_gauges_are_refreshed_at_most_once_per_interval(self):
+        with mock.patch.object(metrics, "_gauges_refreshed_at", None), \
+                mock.patch.object(metrics, "METRICS_GAUGE_INTERVAL", 5.0), \
+                mock.patch.object(metrics, "refresh_gauges") as refresh:
+            self.assertTrue(refresh_gauges_if_due(now=100.0))
+            self.assertFalse(refresh_gauges_if_due(now=103.0))
+            self.assertTrue(refresh_gauges_if_due(now=105.0))
+        self.assertEqual(refresh.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, exc, text
+
+import app.database as database
+from app import pool_metrics
+
+
+class PoolMetricsTests(unittest.TestCase):
+    def setUp(self):
+        pool_metrics.reset_after_fork()
+        self.addCleanup(pool_metrics.reset_after_fork)
+
+    def _engine(self, **options):
+        engine = create_engine("sqlite://", poolclass=pool_metrics.InstrumentedQueuePool, **options)
+        pool_metrics.instrument_engine(engine)
+        self.addCleanup(engine.dispose)
+        return engine
+
+    def test_checkouts_and_in_use_are_recorded(self):
+        engine = self._engine(pool_size=2, max_overflow=1)
+
+        first = engine.connect()
+        second = engine.connect()
+        third = engine.connect()
+        snapshot = pool_metrics.get_pool_stats(engine)
+        for connection in (first, second, third):
+            connection.close()
+
+        self.assertEqual(snapshot["checkouts"], 3)
+        self.assertEqual(snapshot["in_use"], 3)
+        self.assertEqual(snapshot["overflow"], 1)
+        self.assertEqual(snapshot["peak_in_use"], 3)
+        self.assertEqual(sum(snapshot["checkout_buckets"].values()), 3)
+        self.assertEqual(pool_metrics.get_pool_stats(engine)["in_use"], 0)
+
+    def test_engines_are_counted_separately(self):
+        primary = self._engine(pool_size=1, max_overflow=0)
+        replica = self._engine(pool_size=1, max_overflow=0, pool_logging_name="replica")
+        events = []
+        pool_metrics.add_listener(lambda name, value, engine: events.append((name, engine)))
+        self.addCleanup(pool_metrics._listeners.pop)
+
+        with primary.connect(), replica.connect():
+            pass
+        with replica.connect():
+            pass
+
+        self.assertEqual(pool_metrics.get_pool_stats(primary)["checkouts"], 1)
+        self.assertEqual(pool_metrics.get_pool_stats(replica)["checkouts"], 2)
+        self.assertEqual(pool_metrics.get_pool_stats(replica)["peak_in_use"], 1)
+        self.assertIn(("checkout", "replica"), events)
+
+    def test_exhausted_pool_counts_timeout(self):
+        engine = self._engine(pool_size=1, max_overflow=0, pool_timeout=0.01)
+
+        held = engine.connect()
+        self.addCleanup(held.close)
+        with self.assertLogs("app.pool_metrics", level="WARNING"):
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+
+        self.assertEqual(pool_metrics.get_pool_stats(engine)["timeouts"], 1)
+
+    def test_pre_ping_failure_is_counted(self):
+        engine = self._engine(pool_size=1, max_overflow=0, pool_pre_ping=True)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        # Make the next liveness ping fail once, like a server-side disconnect.
+        original_ping = engine.dialect._do_ping_w_event
+        calls = []
+
+        def failing_ping(dbapi_connection):
+            if not calls:
+                calls.append(1)
+                raise engine.dialect.loaded_dbapi.OperationalError("server closed the connection")
+            return original_ping(dbapi_connection)
+
+        with mock.patch.object(engine.dialect, "is_disconnect", return_value=True), \
+                mock.patch.object(engine.dialect, "do_ping", side_effect=failing_ping), \
+                self.assertLogs("app.pool_metrics", level="WARNING"):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        self.assertEqual(pool_metrics.get_pool_stats(engine)["pre_ping_failures"], 1)
+
+    def test_null_pool_mode_for_pgbouncer(self):
+        with mock.patch.object(database, "DB_POOL_MODE", "null"):
+            options = database.engine_options("postgresql+psycopg://u:p@h/db")
+        self.assertIs(options["poolclass"], pool_metrics.InstrumentedNullPool)
+        self.assertEqual(options["connect_args"], {"prepare_threshold": None})
+
+        with mock.patch.object(database, "DB_POOL_MODE", "queue"), \
+                mock.patch.object(database, "DB_CONNECTION_BUDGET", 0), \
+                mock.patch.dict("os.environ", {"DB_POOL_SIZE": "4", "DB_MAX_OVERFLOW": "2"}):
+            options = database.engine_options("postgresql+psycopg2://u:p@h/db")
+        self.assertEqual((options["pool_size"], options["max_overflow"]), (4, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,32 +1,18 @@
 import unittest
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
 import app.database as database
-from app.models import Base, User, XP, HistoryEvent
+from app.models import AttendanceMonth, User, XP, HistoryEvent
 from app.auth import add_user, load_users, update_password, verify_password
 from app.services.attendance import apply_attendance
-from app.services.data_reader import get_student_stats
-from app.services.db_operations import create_or_update_student, initialize_student_records
-
-
-class PostgresOnlyRuntimeTests(unittest.TestCase):
-    def setUp(self):
-        self.previous_state = (
-            database.DB_AVAILABLE,
-            database.engine,
-            database.SessionLocal,
-        )
-        engine = create_engine("sqlite:///:memory:")
-        Base.metadata.create_all(bind=engine)
-        database.DB_AVAILABLE = True
-        database.engine = engine
-        database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-    def tearDown(self):
-        database.DB_AVAILABLE, database.engine, database.SessionLocal = self.previous_state
+from app.services import clock
+from app.services.data_reader import get_history_totals, get_student_stats
+from app.services.db_operations import add_history_event, create_or_update_student, initialize_student_records
+from database_case import InMemoryDatabaseTestCase, PostgresDatabaseTestCase
+
 
+class PostgresOnlyRuntimeTests(InMemoryDatabaseTestCase):
     def test_auth_uses_database_without_users_json(self):
         add_user("student1", "temporary-password", "student", True)
 
@@ -77,6 +63,50 @@ class PostgresOnlyRuntimeTests(unittest.TestCase):
         finally:
             db.close()
 
+    def test_stats_load_recent_history_and_totals_cover_all_of_it(self):
+        db = database.SessionLocal()
+        try:
+            student = create_or_update_student(db, "student1", "Student One")
+            initialize_student_records(db, student.id)
+            add_history_event(db, student.id, "pad", "old", "2024-01-10")
+            add_history_event(db, student.id, "attendance", "Private Lesson", "2024-01-11", grade=6)
+            add_history_event(db, student.id, "pad", "recent", "2026-04-20")
+            add_history_event(db, student.id, "attendance", "Private Lesson", "2026-04-21", grade=9)
+            add_history_event(db, student.id, "attendance", "Private Lesson", "2026-04-22")
+            db.commit()
+        finally:
+            db.close()
+
+        with clock.use_clock(clock.FixedClock(date(2026, 5, 1))):
+            stats = get_student_stats("student1")
+        self.assertEqual([event["date"] for event in stats["history"]["events"]],
+                         ["2026-04-20", "2026-04-21", "2026-04-22"])
+        self.assertEqual(get_history_totals("student1"), {"pad": 2, "attendance": 3, "average_grade": 7.5})
+
+
+class ConcurrentAttendanceTests(PostgresDatabaseTestCase):
+    def test_concurrent_lessons_for_one_student_all_count(self):
+        db = database.SessionLocal()
+        try:
+            student = create_or_update_student(db, "student1", "Student One")
+            initialize_student_records(db, student.id)
+            db.commit()
+        finally:
+            db.close()
+
+        days = ["2026-05-04", "2026-05-11", "2026-05-18", "2026-05-25"]
+        with ThreadPoolExecutor(max_workers=len(days)) as pool:
+            list(pool.map(lambda day: apply_attendance("student1", day, grade=8), days))
+
+        db = database.SessionLocal()
+        try:
+            xp = db.query(XP).one()
+            rollup = db.query(AttendanceMonth).one()
+        finally:
+            db.close()
+        self.assertEqual((xp.attendance, xp.consistency), (80, 10))
+        self.assertEqual((rollup.month, rollup.lesson_count, rollup.bonus_awarded), ("2026-05", 4, True))
+
 
 if __name__ == "__main__":
     unittest.main()
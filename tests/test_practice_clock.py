@@ -0,0 +1,48 @@
+import unittest
+from datetime import date
+
+import app.database as database
+from app.models import HistoryEvent
+from app.services import clock
+from app.services.data_reader import get_student_stats
+from app.services.db_operations import create_or_update_student, initialize_student_records
+from app.services.practice import complete_pad_exercise, validate_streak
+from database_case import InMemoryDatabaseTestCase
+
+
+class PracticeClockTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        student = create_or_update_student(db, "student1", "Student One")
+        initialize_student_records(db, student.id)
+        db.commit()
+        db.close()
+
+    def test_streak_follows_the_injected_clock(self):
+        sim_clock = clock.FixedClock(date(2025, 3, 1))
+        with clock.use_clock(sim_clock):
+            for _ in range(3):
+                complete_pad_exercise("student1", "rudimental_warmup")
+                sim_clock.advance()
+            sim_clock.advance(2)
+            stats = get_student_stats("student1")
+            self.assertEqual(stats["streak"]["current"], 3)
+            self.assertTrue(validate_streak(stats))
+            self.assertEqual(stats["streak"]["current"], 0)
+
+        db = database.SessionLocal()
+        try:
+            dates = sorted(event.date for event in db.query(HistoryEvent).all())
+        finally:
+            db.close()
+        self.assertEqual(dates, [date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)])
+        self.assertIsInstance(clock.today(), date)
+        self.assertNotEqual(clock.today(), date(2025, 3, 6))
+
+    def test_unknown_student_returns_none(self):
+        self.assertIsNone(complete_pad_exercise("missing", "rudimental_warmup"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app import profiling
+from app.profiling import ProfilingMiddleware, make_token, verify_token
+from app.services.level_utils import recalculate_levels
+
+
+async def busy_app(scope, receive, send):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        recalculate_levels({"xp": {"total": 2_000_000}, "level": {}})
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def run(app, query=b"", headers=(), session=None):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/student/alice",
+        "query_string": query,
+        "headers": list(headers),
+        "session": session or {},
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.app = ProfilingMiddleware(busy_app, interval_ms=1, directory=self.directory)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_admin_query_parameter_writes_collapsed_stacks(self):
+        headers = run(self.app, query=b"profile=1", session={"role": "admin"})
+        profile = self.directory / headers[b"x-profile-file"].decode()
+        lines = profile.read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("recalculate_levels" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(";", stack)
+
+    def test_signed_header_writes_speedscope_json(self):
+        token = make_token(60, secret="s3cret")
+        with mock.patch.object(profiling, "PROFILE_SECRET", "s3cret"):
+            headers = run(self.app, query=b"profile=speedscope", headers=[(b"x-profile-token", token.encode())])
+        profile = json.loads((self.directory / headers[b"x-profile-file"].decode()).read_text())
+        self.assertEqual(profile["profiles"][0]["type"], "sampled")
+        self.assertTrue(profile["shared"]["frames"])
+
+    def test_other_requests_are_not_profiled(self):
+        self.assertNotIn(b"x-profile-file", run(self.app, query=b"profile=1", session={"role": "student"}))
+        with mock.patch.object(profiling, "PROFILE_SECRET", "s3cret"):
+            forged = [(b"x-profile-token", make_token(60, secret="other").encode())]
+            self.assertNotIn(b"x-profile-file", run(self.app, headers=forged))
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_tokens_expire(self):
+        token = make_token(10, secret="s3cret", now=1000)
+        self.assertTrue(verify_token(token, secret="s3cret", now=1005))
+        self.assertFalse(verify_token(token, secret="s3cret", now=1011))
+        self.assertFalse(verify_token(token, secret="", now=1005))
+
+
+if __name__ == "__main__":
+    unittest.main()
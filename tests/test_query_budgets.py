@@ -0,0 +1,108 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+
+from sqlalchemy import text
+
+import app.database as database
+from app import query_stats
+from app.query_stats import QueryBudgetExceeded, query_budget, track_queries
+from app.services.attendance import apply_attendance
+from app.services.data_reader import get_all_students
+from app.services.db_operations import create_or_update_student, initialize_student_records
+from database_case import InMemoryDatabaseTestCase
+
+
+class QueryBudgetTests(InMemoryDatabaseTestCase):
+    def _run_statements(self, count):
+        with database.engine.connect() as connection:
+            for number in range(count):
+                connection.execute(text(f"SELECT {number}"))
+
+    def _add_students(self, count, start=0):
+        db = database.SessionLocal()
+        try:
+            for number in range(start, start + count):
+                student = create_or_update_student(db, f"student{number}", f"Student {number}")
+                initialize_student_records(db, student.id)
+            db.commit()
+        finally:
+            db.close()
+
+    def test_over_budget_raises_and_prints_statements(self):
+        @query_budget(2)
+        def view():
+            self._run_statements(3)
+
+        stderr = io.StringIO()
+        with mock.patch.object(query_stats, "QUERY_BUDGET_MODE", "raise"), redirect_stderr(stderr):
+            with self.assertRaises(QueryBudgetExceeded) as raised:
+                view()
+
+        self.assertIn("view ran 3 SQL statements (budget 2)", str(raised.exception))
+        self.assertIn("SELECT 2", stderr.getvalue())
+
+    def test_over_budget_only_warns_in_production(self):
+        @query_budget(1)
+        def view():
+            self._run_statements(2)
+            return "rendered"
+
+        with mock.patch.object(query_stats, "QUERY_BUDGET_MODE", "warn"):
+            with self.assertLogs("app.query_stats", level="WARNING"):
+                self.assertEqual(view(), "rendered")
+
+    def test_budgeted_statements_also_count_for_the_request(self):
+        @query_budget(5)
+        def view():
+            self._run_statements(2)
+
+        with track_queries() as request_stats:
+            view()
+            self._run_statements(1)
+
+        self.assertEqual(request_stats.count, 3)
+
+    def test_student_list_query_count_does_not_grow_with_students(self):
+        self._add_students(2)
+        with track_queries() as few:
+            get_all_students()
+
+        self._add_students(20, start=2)
+        with track_queries() as many:
+            students = get_all_students()
+
+        self.assertEqual(len(students), 22)
+        self.assertEqual(few.count, many.count)
+
+    def test_attendance_sync_query_count_does_not_grow_with_history(self):
+        self._add_students(1)
+        with track_queries() as first:
+            apply_attendance("student0", "2026-01-05", 5)
+        for day in range(6, 26):
+            apply_attendance("student0", f"2026-01-{day:02d}", 5)
+        with track_queries() as later:
+            apply_attendance("student0", "2026-01-26", 5)
+
+        self.assertLessEqual(later.count, first.count)
+
+
+class RouteBudgetTests(unittest.TestCase):
+    def test_every_route_declares_a_query_budget(self):
+        with mock.patch.dict(os.environ, {"SESSION_SECRET_KEY": os.environ.get("SESSION_SECRET_KEY", "test")}):
+            from app.main import app
+
+        missing = [
+            f"{sorted(route.methods)} {route.path}"
+            for route in app.routes
+            if getattr(route, "methods", None)
+            and route.path not in ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc")
+            and not hasattr(route.endpoint, "__query_budget__")
+        ]
+        self.assertEqual(missing, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import app.database as database
+from app import read_routing
+from app.read_routing import ReadYourWritesMiddleware
+from app.services.data_reader import get_all_students, get_users
+from app.services.db_operations import create_or_update_student, initialize_student_records
+from database_case import InMemoryDatabaseTestCase
+
+
+def _add_student(sessions, username):
+    db = sessions()
+    try:
+        student = create_or_update_student(db, username)
+        initialize_student_records(db, student.id)
+        db.commit()
+    finally:
+        db.close()
+
+
+class ReadReplicaTests(InMemoryDatabaseTestCase):
+    """Two SQLite files stand in for the primary and a replica that never catches up."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        super().setUp()
+        _add_student(database.SessionLocal, "fresh")
+
+        replica = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}")
+        self.addCleanup(replica.dispose)
+        self.create_schema(replica)
+        database.read_engine = replica
+        database.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica)
+        _add_student(database.ReadSessionLocal, "stale")
+
+    def create_engine(self):
+        return create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'primary.db')}")
+
+    def _usernames(self):
+        return [student["username"] for student in get_all_students()]
+
+    def _client(self):
+        def page(request):
+            return PlainTextResponse(",".join(self._usernames()))
+
+        def login(request):
+            request.session["username"] = "fresh"
+            return PlainTextResponse("ok")
+
+        app = Starlette(
+            routes=[Route("/page", page, methods=["GET", "POST"]), Route("/login", login)],
+            middleware=[
+                Middleware(SessionMiddleware, secret_key="test"),
+                Middleware(ReadYourWritesMiddleware),
+            ],
+        )
+        return TestClient(app)
+
+    def test_reads_use_the_replica_unless_the_primary_is_asked_for(self):
+        self.assertEqual(self._usernames(), ["stale"])
+        with database.reading_from_primary():
+            self.assertEqual(self._usernames(), ["fresh"])
+        self.assertEqual(self._usernames(), ["stale"])
+
+    def test_logins_read_the_primary(self):
+        db = database.SessionLocal()
+        try:
+            db.add(database.User(username="fresh", password="hash", role="student", force_change=False))
+            db.commit()
+        finally:
+            db.close()
+
+        self.assertIn("fresh", get_users())
+
+    def test_reads_without_a_replica_use_the_primary(self):
+        database.ReadSessionLocal = None
+        self.assertEqual(self._usernames(), ["fresh"])
+
+    def test_writes_open_a_read_your_writes_window(self):
+        client = self._client()
+        self.assertEqual(client.get("/page").text, "stale")
+        client.get("/login")
+
+        self.assertEqual(client.post("/page").text, "fresh")
+        self.assertEqual(client.get("/page").text, "fresh")
+
+        with mock.patch.object(read_routing.time, "time", return_value=read_routing.time.time() + 60):
+            self.assertEqual(client.get("/page").text, "stale")
+        self.assertEqual(client.get("/page").text, "stale")
+
+    def test_anonymous_writes_do_not_touch_the_session(self):
+        client = self._client()
+        self.assertEqual(client.post("/page").text, "fresh")
+        self.assertNotIn("session", client.cookies)
+        self.assertEqual(client.get("/page").text, "stale")
+
+    def test_replica_behind_the_migration_head_is_left_out(self):
+        database.read_engine = database.ReadSessionLocal = None
+        unmigrated = os.path.join(self.tmp.name, "unmigrated.db")
+        with mock.patch.object(database, "DB_SCHEMA_CHECK", True), \
+                self.assertLogs("app.database", level="WARNING") as logs:
+            database._load_read_replica(f"sqlite:///{unmigrated}")
+        self.assertIn("migration head", logs.output[0])
+        self.assertIsNone(database.ReadSessionLocal)
+
+    def test_unreachable_replica_is_left_out(self):
+        database.read_engine = database.ReadSessionLocal = None
+        missing = os.path.join(self.tmp.name, "missing", "replica.db")
+        with self.assertLogs("app.database", level="WARNING"):
+            database._load_read_replica(f"sqlite:///{missing}")
+        self.assertIsNone(database.ReadSessionLocal)
+        self.assertEqual(self._usernames(), ["fresh"])
+
+
+if __name__ == "__main__":
+    unittest.main()
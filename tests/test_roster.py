@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+import app.auth as auth
+import app.database as database
+from app.models import Streak, Student, User, XP
+from app.query_stats import track_queries
+from app.services.db_operations import create_or_update_student
+from app.services.roster import RosterRow, import_roster, parse_roster_csv
+from database_case import InMemoryDatabaseTestCase
+
+
+class RosterImportTests(InMemoryDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db = database.SessionLocal()
+        db.add(User(username="taken", password="x", role="student", force_change=False))
+        create_or_update_student(db, "taken", "Taken")
+        db.commit()
+        db.close()
+
+    def test_csv_parsing_reports_bad_lines(self):
+        rows, errors = parse_roster_csv(
+            "name,username,avatar,password\n"
+            "Ana Petrova,ana,ana.png,drums1\n"
+            "No Password,nopass,,\n"
+            "Bad Name,has space,,pw\n"
+            ",ivo,,pw\n"
+        )
+        self.assertEqual(rows, [RosterRow("Ana Petrova", "ana", "ana.png", "drums1"), RosterRow("ivo", "ivo", "", "pw")])
+        self.assertEqual([error.split(":")[0] for error in errors], ["line 3", "line 4"])
+
+    def test_import_creates_accounts_and_reports_conflicts(self):
+        rows = [
+            RosterRow("Ana", "ana", "ana.png", "first"),
+            RosterRow("Taken Again", "taken", "", "pw"),
+            RosterRow("Ana Twice", "ana", "", "pw"),
+            RosterRow("Ivo", "ivo", "", "second"),
+        ]
+        with mock.patch.object(auth, "HASH_WORKERS", 4):
+            result = import_roster(rows)
+        self.assertEqual(result["created"], ["ana", "ivo"])
+        self.assertEqual(result["errors"], ["taken: username already exists", "ana: listed more than once"])
+
+        db = database.SessionLocal()
+        try:
+            ana = db.query(User).filter(User.username == "ana").one()
+            self.assertTrue(auth.verify_password("first", ana.password))
+            self.assertEqual((ana.role, ana.force_change), ("student", True))
+            student = db.query(Student).filter(Student.username == "ivo").one()
+            self.assertEqual(db.query(XP).filter(XP.student_id == student.id).one().total, 0)
+            self.assertEqual(db.query(Streak).filter(Streak.student_id == student.id).one().current, 0)
+        finally:
+            db.close()
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        def statements(prefix, count):
+            rows = [RosterRow(f"S{i}", f"{prefix}{i}", "", "pw") for i in range(count)]
+            with mock.patch.object(auth, "hash_password", lambda password: "hashed"):
+                with track_queries() as queries:
+                    self.assertEqual(len(import_roster(rows)["created"]), count)
+            return queries.count
+
+        self.assertEqual(statements("few", 2), statements("many", 200))
+
+    def test_hash_passwords_keeps_input_order(self):
+        with mock.patch.object(auth, "HASH_WORKERS", 3):
+            hashes = auth.hash_passwords(["a", "b", "c", "d"])
+        self.assertEqual([auth.verify_password(p, h) for p, h in zip("abcd", hashes)], [True] * 4)
+        self.assertFalse(auth.verify_password("a", hashes[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
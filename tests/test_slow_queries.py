@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.query_stats import track_queries
+from app.slow_queries import instrument_slow_queries, redact_parameters
+
+
+class SlowQueryLogTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.log_dir.name, "slow", "slow_queries.log")
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.log_dir.cleanup()
+
+    def read_entries(self):
+        with open(self.path) as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_slow_statement_is_logged_with_route_plan_and_redacted_parameters(self):
+        slow_log = instrument_slow_queries(self.engine, threshold_ms=0.0001, path=self.path)
+        scope = {"path": "/student/alice", "route": SimpleNamespace(path="/student/{student}")}
+        with track_queries(scope=scope):
+            with self.engine.connect() as connection:
+                connection.execute(
+                    text("SELECT id FROM students WHERE username = :username"), {"username": "secret-name"}
+                )
+        slow_log.flush()
+
+        entries = self.read_entries()
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["route"], "/student/{student}")
+        self.assertIn("FROM students", entry["statement"])
+        self.assertIsInstance(entry["plan"], list)
+        self.assertTrue(entry["plan"])
+        self.assertNotIn("secret-name", json.dumps(entry))
+
+    def test_fast_statements_and_disabled_log_write_nothing(self):
+        self.assertIsNone(instrument_slow_queries(self.engine, threshold_ms=0, path=self.path))
+        slow_log = instrument_slow_queries(self.engine, threshold_ms=60_000, path=self.path)
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        slow_log.flush()
+        self.assertEqual(self.read_entries(), [])
+
+    def test_redaction_keeps_shape_only(self):
+        self.assertEqual(redact_parameters({"a": 1, "b": "x"}), {"a": "<int>", "b": "<str>"})
+        self.assertEqual(redact_parameters(("x", None)), ["<str>", "<NoneType>"])
+        self.assertEqual(
+            redact_parameters([{"a": 1}, {"a": 2}]), {"rows": 2, "first": {"a": "<int>"}}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
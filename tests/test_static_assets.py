@@ -0,0 +1,74 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.static_assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    AssetManifest,
+    FingerprintedStaticFiles,
+    fingerprint_path,
+    precompress_assets,
+    split_fingerprint,
+)
+
+
+def _scope(path: str, accept_encoding: str = "") -> dict:
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return {"type": "http", "method": "GET", "path": path, "headers": headers}
+
+
+class StaticAssetTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static_dir = Path(self.tmp.name)
+        (self.static_dir / "css").mkdir()
+        (self.static_dir / "css" / "app.css").write_text("body { color: black; }\n" * 200)
+        self.manifest = AssetManifest(self.static_dir)
+        self.static_files = FingerprintedStaticFiles(directory=self.static_dir, asset_manifest=self.manifest)
+
+    def _get(self, url: str, accept_encoding: str = ""):
+        path = url.removeprefix("/static/")
+        return asyncio.run(self.static_files.get_response(path, _scope(url, accept_encoding)))
+
+    def test_fingerprint_round_trip(self):
+        fingerprinted = fingerprint_path("images/login_banner.png", "0123456789ab")
+        self.assertEqual(fingerprinted, "images/login_banner.0123456789ab.png")
+        self.assertEqual(split_fingerprint(fingerprinted), ("images/login_banner.png", "0123456789ab"))
+        self.assertEqual(split_fingerprint("images/login_banner.png"), ("images/login_banner.png", None))
+
+    def test_fingerprinted_url_is_immutable(self):
+        url = self.manifest.url_for("css/app.css")
+        self.assertRegex(url, r"^/static/css/app\.[0-9a-f]{12}\.css$")
+
+        response = self._get(url)
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE_CACHE_CONTROL)
+
+        plain = self._get("/static/css/app.css")
+        self.assertEqual(plain.headers["cache-control"], REVALIDATE_CACHE_CONTROL)
+
+    def test_changed_file_gets_new_url(self):
+        old_url = self.manifest.url_for("css/app.css")
+        (self.static_dir / "css" / "app.css").write_text("body { color: red; }\n")
+
+        self.assertNotEqual(self.manifest.url_for("css/app.css"), old_url)
+        self.assertEqual(self._get(old_url).headers["cache-control"], REVALIDATE_CACHE_CONTROL)
+
+    def test_precompressed_variant_is_served_when_accepted(self):
+        results = precompress_assets(self.static_dir)
+        self.assertIn("gzip", results["css/app.css"])
+        url = self.manifest.url_for("css/app.css")
+
+        response = self._get(url, accept_encoding="gzip, deflate")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertTrue(response.headers["content-type"].startswith("text/css"))
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+
+        identity = self._get(url, accept_encoding="gzip;q=0")
+        self.assertNotIn("content-encoding", identity.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()